@@ -8,4 +8,62 @@ INPUT_FILE_NAME = "projects.xlsx"
 PROJECTS_SHEET_NAME = "projects"
 
 # The name for the output file for the simulation.
+# The extension chooses the format: .xlsx (Excel), .npz (compressed NumPy), .npy (memory-mappable NumPy) or .csv
 OUTPUT_FILE_NAME = "project_results.xlsx"
+
+# Overrides the output format given by the extension of OUTPUT_FILE_NAME, e.g. ".npz", None uses the extension.
+OUTPUT_FORMAT = None
+
+# Number of worker processes the iterations are sharded across, 1 runs the simulation serially.
+WORKERS = 1
+
+# The root seed of the random draws, None creates a new random seed for every run.
+SEED = None
+
+# If True, all managers face the same project draws and risk outcomes in each iteration (common random numbers),
+# which reduces the variance of the differences between the strategies.
+COMMON_RANDOM_NUMBERS = False
+
+# If True, only the summary statistics of the value and cash are kept, instead of every iteration.
+# This keeps the memory constant for very large amounts of iterations.
+AGGREGATE = False
+
+# Stops the simulation once the 95% confidence interval of the mean final value of every manager is at most
+# TARGET_HALF_WIDTH wide on each side, in which case ITERATIONS is the maximum. None always runs ITERATIONS.
+# With TARGET_PAIRED_MANAGERS, e.g. ("greedy_manager", "optimal_manager"), the target is for their difference instead.
+TARGET_HALF_WIDTH = None
+TARGET_PAIRED_MANAGERS = None
+
+# The name of the file in resources, which the progress of the simulation is written to about every
+# CHECKPOINT_INTERVAL seconds. Running main.py with --resume continues from it. None disables the checkpoints.
+CHECKPOINT_FILE_NAME = None
+CHECKPOINT_INTERVAL = 10.0
+
+# The name of the directory in resources, which caches the iterations of seeded runs. A run asking for more
+# iterations than are cached only runs the missing ones, and adds them to the cache. None disables the cache.
+RESULT_CACHE_DIRECTORY = None
+
+# The name of the file in resources, which `python main.py --sweep grid.json` writes the results of every grid point to,
+# and the amount of iterations of a manager at a grid point which each task of the sweep runs.
+SWEEP_OUTPUT_FILE_NAME = "sweep_results.npz"
+SWEEP_SHARD_SIZE = 500
+
+# The name of the directory in resources, which `python main.py --shard k/N` writes the shard files to,
+# and `python main.py --merge-shards` merges them from. It can be on a filesystem shared by several machines.
+SHARD_DIRECTORY = "shards"
+
+# Caps the probability tree of the OptimalStrategy, the defaults evaluate the whole tree.
+# Branches with a probability below OPTIMAL_EPSILON are skipped, at most OPTIMAL_MAX_CONFLICT_DEPTH conflict years
+# are traversed, and OPTIMAL_TIME_BUDGET is the seconds each decision may take (which makes seeded runs depend on timing).
+OPTIMAL_EPSILON = 0.0
+OPTIMAL_MAX_CONFLICT_DEPTH = None
+OPTIMAL_TIME_BUDGET = None
+
+# The number of decisions the OptimalStrategy caches across iterations, None disables the cache.
+# The cache pays off for small catalogues, where the same portfolios recur, and costs a little time for large ones.
+OPTIMAL_DECISION_CACHE_SIZE = 100_000
+
+# The name of the file in resources, which stores the compiled decisions of the OptimalStrategy (see src/policy.py).
+# The policy is compiled on the first run and recompiled when the projects, funds or strategy settings change.
+# None evaluates every decision during the simulation instead.
+POLICY_FILE_NAME = None
@@ -1,48 +1,233 @@
+import argparse
+import functools
+import json
+import sys
 from pathlib import Path
 
 from config import (
     ITERATIONS,
     INPUT_FILE_NAME,
     OUTPUT_FILE_NAME,
+    OUTPUT_FORMAT,
+    WORKERS,
+    SEED,
+    COMMON_RANDOM_NUMBERS,
+    AGGREGATE,
+    TARGET_HALF_WIDTH,
+    TARGET_PAIRED_MANAGERS,
+    CHECKPOINT_FILE_NAME,
+    CHECKPOINT_INTERVAL,
+    RESULT_CACHE_DIRECTORY,
+    SHARD_DIRECTORY,
+    SWEEP_OUTPUT_FILE_NAME,
+    SWEEP_SHARD_SIZE,
+    OPTIMAL_EPSILON,
+    OPTIMAL_MAX_CONFLICT_DEPTH,
+    OPTIMAL_TIME_BUDGET,
+    OPTIMAL_DECISION_CACHE_SIZE,
+    POLICY_FILE_NAME,
 )
 
+from src.policy import CompiledOptimalStrategy, load_or_compile_policy
 from src.project_manager import ProjectManager
+from src.result_cache import store_results
+from src.shard import load_shards, merge_shards, parse_shard, run_shard, save_shard
 from src.simulation import Simulation
+from src.statistics import PrecisionTarget
 from src.strategy import (
     GreedyStrategy,
     MinusOneStrategy,
     OptimalStrategy,
 )
+from src.sweep import ParameterSweep, SweepGrid, save_sweep_results
 from src.year import STANDARD_YEARS
 import src.file_handling as fh
-
+import src.output as output
 
 INPUT_FILE_PATH = Path("resources", INPUT_FILE_NAME)
 OUTPUT_FILE_PATH = Path("resources", OUTPUT_FILE_NAME)
+SWEEP_OUTPUT_FILE_PATH = Path("resources", SWEEP_OUTPUT_FILE_NAME)
+SHARD_DIRECTORY_PATH = Path("resources", SHARD_DIRECTORY)
 
 
 if __name__ == "__main__":
 
+    parser = argparse.ArgumentParser(description="Runs the portfolio simulation.")
+    # Only one of the modes can be given, without any the configured simulation is run.
+    modes = parser.add_mutually_exclusive_group()
+    modes.add_argument(
+        "--resume",
+        action="store_true",
+        help="continue the simulation from the checkpoint in CHECKPOINT_FILE_NAME",
+    )
+    modes.add_argument(
+        "--sweep",
+        metavar="GRID_FILE",
+        help="simulate every point of the parameter grid in the JSON file, see src/sweep.py",
+    )
+    modes.add_argument(
+        "--shard",
+        type=parse_shard,
+        metavar="k/N",
+        help="run only the iterations i where i %% N == k, and write them to a shard file in SHARD_DIRECTORY",
+    )
+    modes.add_argument(
+        "--merge-shards",
+        nargs="*",
+        type=Path,
+        metavar="PATH",
+        help="merge the shard files, or directories of shard files (SHARD_DIRECTORY by default), "
+        "into the output file",
+    )
+    arguments = parser.parse_args()
+    if arguments.shard is not None:
+        if SEED is None:
+            parser.error("--shard requires SEED to be set in config.py")
+        if AGGREGATE or TARGET_HALF_WIDTH is not None:
+            parser.error(
+                "--shard can not be combined with AGGREGATE or TARGET_HALF_WIDTH"
+            )
+    if TARGET_HALF_WIDTH is not None and ITERATIONS < 2:
+        parser.error(
+            "TARGET_HALF_WIDTH requires ITERATIONS to be at least 2, "
+            "as the confidence interval needs at least 2 iterations"
+        )
+    if arguments.resume and CHECKPOINT_FILE_NAME is None:
+        parser.error("--resume requires CHECKPOINT_FILE_NAME to be set in config.py")
+
+    checkpoint_path = None
+    if CHECKPOINT_FILE_NAME is not None:
+        checkpoint_path = Path("resources", CHECKPOINT_FILE_NAME)
+
+    result_cache = None
+    if RESULT_CACHE_DIRECTORY is not None:
+        result_cache = Path("resources", RESULT_CACHE_DIRECTORY)
+
+    if arguments.merge_shards is not None:
+        # Put the iterations of the shards of a run back together, as a single run would have given them.
+        shards = load_shards(arguments.merge_shards or [SHARD_DIRECTORY_PATH])
+        simulation_result, metadata = merge_shards(shards)
+        print(f"Merged {len(shards)} shards of {metadata.iterations} iterations!")
+
+        if result_cache is not None:
+            store_results(result_cache, shards[0].result_key, simulation_result)
+
+        output.save_simulation(
+            simulation_result, OUTPUT_FILE_PATH, metadata, OUTPUT_FORMAT
+        )
+        print("Simulation saved to file: " + str(OUTPUT_FILE_PATH))
+        sys.exit()
+
+    # Load the projects from a file.
+    projects = fh.load_catalogue_from_file(INPUT_FILE_PATH)
+
+    if arguments.sweep is not None:
+        # Simulate every point of the grid, with the strategies created for the parameters of each point.
+        grid = SweepGrid.from_dict(json.loads(Path(arguments.sweep).read_text()))
+        sweep = ParameterSweep(
+            grid.get_points(),
+            ITERATIONS,
+            {
+                "greedy_manager": GreedyStrategy,
+                "minus_one_manager": MinusOneStrategy,
+                "optimal_manager": functools.partial(
+                    OptimalStrategy,
+                    epsilon=OPTIMAL_EPSILON,
+                    max_conflict_depth=OPTIMAL_MAX_CONFLICT_DEPTH,
+                    time_budget=OPTIMAL_TIME_BUDGET,
+                    decision_cache_size=OPTIMAL_DECISION_CACHE_SIZE,
+                ),
+            },
+            projects,
+            WORKERS,
+            SEED,
+            COMMON_RANDOM_NUMBERS,
+            SWEEP_SHARD_SIZE,
+        )
+
+        print(f"Loaded sweep of {len(sweep.points)} points!")
+        save_sweep_results(sweep.run_sweep(), SWEEP_OUTPUT_FILE_PATH)
+        print("Sweep saved to file: " + str(SWEEP_OUTPUT_FILE_PATH))
+        sys.exit()
+
+    optimal_strategy = OptimalStrategy(
+        epsilon=OPTIMAL_EPSILON,
+        max_conflict_depth=OPTIMAL_MAX_CONFLICT_DEPTH,
+        time_budget=OPTIMAL_TIME_BUDGET,
+        decision_cache_size=OPTIMAL_DECISION_CACHE_SIZE,
+    )
+    if POLICY_FILE_NAME is not None:
+        # Look the decisions up in the compiled policy, which is compiled if it is missing or outdated.
+        policy = load_or_compile_policy(
+            Path("resources", POLICY_FILE_NAME),
+            projects,
+            STANDARD_YEARS,
+            optimal_strategy,
+        )
+        optimal_strategy = CompiledOptimalStrategy(
+            policy,
+            epsilon=OPTIMAL_EPSILON,
+            max_conflict_depth=OPTIMAL_MAX_CONFLICT_DEPTH,
+            decision_cache_size=OPTIMAL_DECISION_CACHE_SIZE,
+        )
+
     # Define the manager strategies that will be used in the simulation.
     managers = {
         "greedy_manager": ProjectManager([], [], [], GreedyStrategy()),
         "minus_one_manager": ProjectManager([], [], [], MinusOneStrategy()),
-        "optimal_manager": ProjectManager([], [], [], OptimalStrategy()),
+        "optimal_manager": ProjectManager([], [], [], optimal_strategy),
     }
-    # Load the projects from a file.
-    projects = fh.load_projects_from_file(INPUT_FILE_PATH)
+
+    # Run until the target precision is reached, with ITERATIONS as the maximum.
+    precision = None
+    if TARGET_HALF_WIDTH is not None:
+        precision = PrecisionTarget(
+            TARGET_HALF_WIDTH,
+            paired_managers=TARGET_PAIRED_MANAGERS,
+            min_iterations=min(100, ITERATIONS),
+            max_iterations=ITERATIONS,
+        )
 
     # Setup the simulation that will be ran.
-    simulation = Simulation(STANDARD_YEARS, ITERATIONS, managers, projects)
+    simulation = Simulation(
+        STANDARD_YEARS,
+        ITERATIONS,
+        managers,
+        projects,
+        WORKERS,
+        SEED,
+        COMMON_RANDOM_NUMBERS,
+        AGGREGATE,
+        precision,
+        checkpoint_path,
+        CHECKPOINT_INTERVAL,
+        arguments.resume,
+        result_cache,
+    )
 
     print("Loaded simulation!")
 
+    if arguments.shard is not None:
+        shard_index, shard_count = arguments.shard
+        shard_path = save_shard(
+            run_shard(simulation, shard_index, shard_count), SHARD_DIRECTORY_PATH
+        )
+        print("Shard saved to file: " + str(shard_path))
+        sys.exit()
+
     # Run the simulation and collect the resulting data in simulation_result
     simulation_result = simulation.run_simulation()
 
     print("Simulation finished!")
+    if simulation.achieved_half_width is not None:
+        print(
+            f"Ran {simulation.iteration_limit} iterations, "
+            f"with a confidence interval half-width of {simulation.achieved_half_width:.2f}"
+        )
 
-    # Save the simulation_result to the output Excel file.
-    fh.save_simulation_results_to_excel(simulation_result, OUTPUT_FILE_PATH)
+    # Save the simulation_result to the output file, in the format given by its extension.
+    output.save_simulation(
+        simulation_result, OUTPUT_FILE_PATH, simulation.get_metadata(), OUTPUT_FORMAT
+    )
 
     print("Simulation saved to file: " + str(OUTPUT_FILE_PATH))
@@ -0,0 +1,337 @@
+import numpy as np
+
+from src.catalogue import ProjectCatalogue
+from src.data import ManagerResult, SimulationResult
+from src.parameters import DEFAULT_PARAMETERS, ModelParameters
+from src.project import Project
+from src.project_manager import ProjectManager
+from src.random_stream import create_seed
+from src.strategy import ThresholdStrategy
+from src.year import Year
+
+# The stream number of the batch generators, which is separate from the streams of the reference simulation.
+BATCH_STREAM = 2**32 - 2
+
+# The default amount of iterations simulated at once.
+BATCH_SIZE = 10_000
+
+
+class BatchSimulation:
+    """
+    A vectorised engine, which simulates many iterations of threshold strategies (GreedyStrategy and
+    MinusOneStrategy) at once with NumPy arrays of shape (iterations, ...).
+    The rules are the same as ProjectManager.run, but the random draws are made in bulk, so the results are
+    statistically equivalent to, but not identical with, a Simulation with the same seed. The closures of the
+    iterations that have a deficit are solved together as well.
+    """
+
+    projects: ProjectCatalogue
+    years: list[Year]
+    iteration_limit: int
+    managers: dict[str, ProjectManager]
+    seed: int
+    batch_size: int
+    parameters: ModelParameters
+
+    def __init__(
+        self,
+        years: list[Year],
+        iterations: int,
+        managers: dict[str, ProjectManager],
+        projects: list[Project] | ProjectCatalogue,
+        seed: int | None = None,
+        batch_size: int = BATCH_SIZE,
+        parameters: ModelParameters = DEFAULT_PARAMETERS,
+    ):
+        for name, manager in managers.items():
+            if not isinstance(manager.strategy, ThresholdStrategy):
+                raise ValueError(
+                    f"The batch simulation only supports threshold strategies, manager '{name}' uses "
+                    f"{type(manager.strategy).__name__}"
+                )
+
+        if not isinstance(projects, ProjectCatalogue):
+            projects = ProjectCatalogue.from_projects(projects)
+
+        # The constants of the model, which the strategies of the managers must have been made with.
+        if projects.project_length != parameters.project_length:
+            raise ValueError(
+                f"The templates have {projects.project_length} sub-projects, but the project length is "
+                f"{parameters.project_length}, see ProjectCatalogue.with_project_length"
+            )
+        for name, manager in managers.items():
+            if manager.strategy.parameters != parameters:
+                raise ValueError(
+                    f"The strategy of manager '{name}' was made with other parameters than the simulation"
+                )
+
+        self.years = years
+        self.iteration_limit = iterations
+        self.managers = managers
+        self.projects = projects
+        self.seed = create_seed() if seed is None else seed
+        self.batch_size = batch_size
+        self.parameters = parameters
+
+    def run_simulation(self) -> SimulationResult:
+        simulation_results = SimulationResult({})
+
+        for stream, (manager_name, manager) in enumerate(self.managers.items()):
+            manager_result = ManagerResult.allocate(
+                self.iteration_limit, len(self.years)
+            )
+
+            for start in range(0, self.iteration_limit, self.batch_size):
+                stop = min(start + self.batch_size, self.iteration_limit)
+                generator = create_batch_generator(self.seed, start, stream)
+                manager_result.extend(
+                    run_threshold_batch(
+                        manager.strategy,
+                        self.years,
+                        self.projects,
+                        stop - start,
+                        generator,
+                        self.parameters,
+                    )
+                )
+
+            simulation_results.managers[manager_name] = manager_result
+
+        return simulation_results
+
+
+def create_batch_generator(seed: int, start: int, stream: int) -> np.random.Generator:
+    """
+    :return: The generator of the batch starting at the given iteration, for the manager with the given stream.
+    """
+    return np.random.Generator(
+        np.random.Philox(
+            np.random.SeedSequence(seed, spawn_key=(BATCH_STREAM, start, stream))
+        )
+    )
+
+
+def run_threshold_batch(
+    strategy: ThresholdStrategy,
+    funds_per_year: list[Year],
+    catalogue: ProjectCatalogue,
+    iterations: int,
+    generator: np.random.Generator,
+    parameters: ModelParameters = DEFAULT_PARAMETERS,
+) -> ManagerResult:
+    """
+    Runs the given amount of iterations of a threshold strategy at once.
+    :return: The value and cash of every iteration and year.
+    """
+    years = len(funds_per_year)
+    rows = np.arange(iterations)
+    project_length = parameters.project_length
+    sub_project_cost = parameters.sub_project_cost
+
+    funds = np.tile(
+        np.array([year.allocated_funds for year in funds_per_year], dtype=np.int64),
+        (iterations, 1),
+    )
+
+    # Every project takes a slot, the active projects of an iteration are kept in the first slots in their order.
+    templates = np.zeros((iterations, 0), dtype=np.int64)
+    created_at = np.zeros((iterations, 0), dtype=np.int64)
+    active = np.zeros((iterations, 0), dtype=bool)
+    completed = np.zeros(iterations, dtype=np.int64)
+
+    has_risk = catalogue.has_risk_array
+    canonical_templates = get_canonical_templates(catalogue)
+    risk_values = np.array(parameters.risk_values, dtype=np.int64)
+
+    total_cash = np.zeros(iterations, dtype=np.int64)
+    value_result = np.zeros((iterations, years), dtype=np.int64)
+    cash_result = np.zeros((iterations, years), dtype=np.int64)
+
+    for i in range(years):
+        current_year = i + 1
+        project_end = min(i + project_length, years)
+
+        # Step 1: Accept the projects that fit in one step, like ThresholdStrategy.max_acceptable.
+        accepted = np.clip(
+            funds[:, i:project_end].min(axis=1) // sub_project_cost
+            - strategy.reserved_projects,
+            0,
+            None,
+        )
+        active_count = active.sum(axis=1)
+        templates, created_at, active = compact_projects(
+            templates, created_at, active, int((active_count + accepted).max(initial=0))
+        )
+        for j in range(int(accepted.max(initial=0))):
+            accepting = rows[accepted > j]
+            slots = active_count[accepting] + j
+            templates[accepting, slots] = generator.integers(
+                len(catalogue), size=len(accepting)
+            )
+            created_at[accepting, slots] = current_year
+            active[accepting, slots] = True
+
+        funds[:, i:project_end] -= accepted[:, np.newaxis] * sub_project_cost
+
+        # Step 2: Draw the risk cost of every active sub-project with risk.
+        ages = np.clip(current_year - created_at, 0, project_length - 1)
+        risky = active & has_risk[templates, ages]
+        risky_rows = np.nonzero(risky)[0]
+        risk_draws = risk_values[
+            generator.integers(len(risk_values), size=len(risky_rows))
+        ]
+        risk_cost = np.bincount(risky_rows, risk_draws, iterations).astype(np.int64)
+
+        # Step 3: Resolve the deficits, the iterations without a deficit keep the surplus as cash.
+        possible_deficit = funds[:, i] - risk_cost
+        current_year_cash = np.maximum(possible_deficit, 0)
+
+        deficit_rows = np.flatnonzero(possible_deficit < 0)
+        current_year_cash[deficit_rows] = reacquire_deficit_values(
+            deficit_rows,
+            possible_deficit[deficit_rows],
+            current_year,
+            catalogue,
+            canonical_templates,
+            templates,
+            created_at,
+            active,
+            funds,
+            parameters,
+        )
+
+        # Step 4: Complete the finished projects.
+        finished = active & (current_year - created_at >= project_length - 1)
+        completed += finished.sum(axis=1)
+        active &= ~finished
+
+        # Step 5: Accumulate the cash, and calculate the value of the current year.
+        total_cash += current_year_cash
+        cash_result[:, i] = total_cash
+        value_result[:, i] = (
+            np.where(active, current_year - created_at + 1, 0).sum(axis=1)
+            + completed * project_length
+        ) * parameters.sub_project_value
+
+    return ManagerResult.from_arrays(value_result, cash_result)
+
+
+def compact_projects(
+    templates: np.ndarray, created_at: np.ndarray, active: np.ndarray, width: int
+) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Moves the active projects of every iteration to the first slots in their order, which is the order of
+    ProjectManager.current_projects, and drops or adds empty slots to give every iteration 'width' slots.
+    """
+    order = np.argsort(~active, axis=1, kind="stable")[:, :width]
+    # The flat indices of the kept slots, which are cheaper to take than the slots along the rows.
+    order += np.arange(len(active))[:, np.newaxis] * active.shape[1]
+    padding = ((0, 0), (0, width - order.shape[1]))
+
+    return (
+        np.pad(templates.ravel()[order], padding),
+        np.pad(created_at.ravel()[order], padding),
+        np.pad(active.ravel()[order], padding),
+    )
+
+
+def get_canonical_templates(catalogue: ProjectCatalogue) -> np.ndarray:
+    """
+    :return: The id of the first template with the same sub-projects for every template, since projects are
+    compared by value when they are closed.
+    """
+    rows = np.column_stack(
+        (catalogue.sunk_cost, catalogue.salvageable_cost, catalogue.risk_mask)
+    )
+    _, first_templates, inverse = np.unique(
+        rows, axis=0, return_index=True, return_inverse=True
+    )
+    return first_templates[inverse.reshape(-1)]
+
+
+def reacquire_deficit_values(
+    rows: np.ndarray,
+    deficits: np.ndarray,
+    current_year: int,
+    catalogue: ProjectCatalogue,
+    canonical_templates: np.ndarray,
+    templates: np.ndarray,
+    created_at: np.ndarray,
+    active: np.ndarray,
+    funds: np.ndarray,
+    parameters: ModelParameters = DEFAULT_PARAMETERS,
+) -> np.ndarray:
+    """
+    The same as ProjectManager.reacquire_deficit_value, for every iteration of the batch with a deficit at once.
+    The closures are the covering knapsack of find_optimal_closures, solved for all rows together over the
+    salvage capped at the deficit of each row, with the same ties broken on the closures and the project order.
+    The active flags and funds of the rows are updated in place.
+    :return: The excess cash of each row after the closures.
+    """
+    row_active = active[rows]
+    row_created_at = created_at[rows]
+    row_templates = templates[rows]
+    ages = np.clip(current_year - row_created_at, 0, parameters.project_length - 1)
+    salvage = np.where(row_active, catalogue.salvageable_cost[row_templates, ages], 0)
+    required_salvage = -deficits
+
+    # Every slot is an item of the knapsack, but only the projects with salvage can be closed.
+    # Only the relative values matter, like in find_optimal_closures. A value and an amount of closures are
+    # compared as a single key, where the value weighs more than any amount of closures.
+    slot_count = row_active.shape[1]
+    closable = salvage > 0
+    keys = (current_year - row_created_at + 1) * (slot_count + 1) + 1
+
+    # costs[r, s] is the least key of closing projects from the current slot on to cover a salvage s of row r.
+    # Solving from the last slot back allows the closures to be chosen from the first slot on, where closing a
+    # project whenever that is optimal gives the same closures as the order of find_optimal_closures.
+    unreachable = np.iinfo(np.int64).max // 2
+    capped_salvage = np.arange(int(required_salvage.max(initial=0)) + 1)
+    costs = np.where(capped_salvage == 0, 0, unreachable)[np.newaxis, :].repeat(
+        len(rows), axis=0
+    )
+    closing_optimal = np.zeros((slot_count, len(rows), len(capped_salvage)), dtype=bool)
+
+    # The flat index of the first capped salvage of every row, to look the costs of the remaining salvage up.
+    row_offsets = np.arange(len(rows))[:, np.newaxis] * len(capped_salvage)
+
+    for slot in range(slot_count - 1, -1, -1):
+        remaining = np.maximum(capped_salvage - salvage[:, slot, np.newaxis], 0)
+        closing = costs.ravel()[row_offsets + remaining] + keys[:, slot, np.newaxis]
+        closing = np.where(closable[:, slot, np.newaxis], closing, unreachable)
+        closing_optimal[slot] = closing <= costs
+        costs = np.minimum(costs, closing)
+
+    indices = np.arange(len(rows))
+    covered = costs[indices, required_salvage] < unreachable
+    needed = np.where(covered, required_salvage, 0)
+    optimal_closures = np.zeros_like(row_active)
+
+    for slot in range(slot_count):
+        closing = (needed > 0) & closing_optimal[slot, indices, needed]
+        optimal_closures[:, slot] = closing
+        needed = np.where(closing, np.maximum(needed - salvage[:, slot], 0), needed)
+
+    # No combination covers the deficit, every project is closed. Otherwise the projects are closed by value,
+    # like close_projects, so equal projects are closed as well.
+    closed = row_active & ~covered[:, np.newaxis]
+    row_canonical_templates = canonical_templates[row_templates]
+    for slot in range(slot_count):
+        closed |= (
+            row_active
+            & optimal_closures[:, slot, np.newaxis]
+            & (row_canonical_templates == row_canonical_templates[:, slot, np.newaxis])
+            & (row_created_at == row_created_at[:, slot, np.newaxis])
+        )
+
+    active[rows] = row_active & ~closed
+    for year in range(current_year - 1, funds.shape[1]):
+        # The closed projects return the cost of their remaining sub-projects.
+        returned = (
+            closed & (row_created_at + parameters.project_length - 1 > year)
+        ).sum(axis=1)
+        funds[rows, year] += returned * parameters.sub_project_cost
+
+    return np.where(
+        covered, deficits + np.where(optimal_closures, salvage, 0).sum(axis=1), 0
+    )
@@ -0,0 +1,196 @@
+import hashlib
+from typing import Sequence
+
+import numpy as np
+
+from src.parameters import DEFAULT_PARAMETERS, ModelParameters
+from src.project import Project, SubProject
+
+#   The key of a template is the (has_risk, sunk cost, salvageable cost) of every sub-project, so equal
+#   templates have equal keys regardless of the catalogue they are from.
+TemplateKey = tuple[tuple[bool, int, int], ...]
+
+
+class ProjectCatalogue:
+    """
+    The project templates that new projects are drawn from, stored as arrays of shape (templates, project length).
+    The catalogue is built once and is read-only, projects created from it only hold their template and start year.
+    """
+
+    sunk_cost: np.ndarray
+    salvageable_cost: np.ndarray
+    risk_mask: np.ndarray  # bit i is set if the i'th sub-project has risk
+    sub_projects: list[tuple[SubProject, ...]]  # shared sub-projects of each template
+    risk_counts: list[tuple[int, ...]]  # 1 for each sub-project with risk, else 0
+    template_keys: list[TemplateKey]  # see get_template_key
+
+    def __init__(
+        self, sunk_cost: np.ndarray, salvageable_cost: np.ndarray, risk_mask: np.ndarray
+    ):
+        assert sunk_cost.shape == salvageable_cost.shape
+        assert sunk_cost.shape[0] == len(risk_mask)
+
+        self.sunk_cost = sunk_cost
+        self.salvageable_cost = salvageable_cost
+        self.risk_mask = risk_mask
+        self.template_ids = range(len(risk_mask))
+        self.risk_counts = [
+            tuple(int(has_risk) for has_risk in row) for row in self.has_risk_array
+        ]
+        self.sub_projects = [
+            tuple(
+                SubProject(
+                    self.has_risk(template_id, age),
+                    int(sunk_cost[template_id, age]),
+                    int(salvageable_cost[template_id, age]),
+                )
+                for age in range(self.project_length)
+            )
+            for template_id in self.template_ids
+        ]
+        self.template_keys = [
+            get_sub_projects_key(sub_projects) for sub_projects in self.sub_projects
+        ]
+
+    @classmethod
+    def from_projects(cls, projects: list[Project]) -> "ProjectCatalogue":
+        project_length = DEFAULT_PARAMETERS.project_length
+        if len(projects) > 0:
+            project_length = len(projects[0].sub_projects)
+
+        sunk_cost = np.zeros((len(projects), project_length), dtype=np.int64)
+        salvageable_cost = np.zeros((len(projects), project_length), dtype=np.int64)
+        risk_mask = np.zeros(len(projects), dtype=np.int64)
+
+        for template_id, project in enumerate(projects):
+            assert len(project.sub_projects) == project_length
+
+            for age, sub_project in enumerate(project.sub_projects):
+                sunk_cost[template_id, age] = sub_project.sunk_cost
+                salvageable_cost[template_id, age] = sub_project.salvageable_cost
+                if sub_project.has_risk:
+                    risk_mask[template_id] |= 1 << age
+
+        return cls(sunk_cost, salvageable_cost, risk_mask)
+
+    def __len__(self) -> int:
+        return len(self.risk_mask)
+
+    @property
+    def project_length(self) -> int:
+        return self.sunk_cost.shape[1]
+
+    @property
+    def has_risk_array(self) -> np.ndarray:
+        """
+        :return: A boolean array of shape (templates, project length) of the sub-projects with risk.
+        """
+        return (
+            self.risk_mask[:, np.newaxis] >> np.arange(self.project_length)
+        ) & 1 == 1
+
+    def with_project_length(self, project_length: int) -> "ProjectCatalogue":
+        """
+        :return: The catalogue with the first 'project_length' sub-projects of every template, e.g. to simulate
+        shorter projects with ModelParameters.project_length. This catalogue is returned if the length is equal.
+        """
+        if project_length == self.project_length:
+            return self
+        if not 1 <= project_length < self.project_length:
+            raise ValueError(
+                f"The templates have {self.project_length} sub-projects, "
+                f"they can not be used for projects of length {project_length}"
+            )
+
+        return ProjectCatalogue(
+            self.sunk_cost[:, :project_length].copy(),
+            self.salvageable_cost[:, :project_length].copy(),
+            self.risk_mask & ((1 << project_length) - 1),
+        )
+
+    def has_risk(self, template_id: int, age: int) -> bool:
+        return bool((int(self.risk_mask[template_id]) >> age) & 1)
+
+    def create_project(self, template_id: int, created_at: int) -> "LiveProject":
+        return LiveProject(self, template_id, created_at)
+
+    def to_projects(self) -> list[Project]:
+        return [Project(0, list(sub_projects)) for sub_projects in self.sub_projects]
+
+    def get_hash(self) -> str:
+        """
+        :return: A hash of the templates, used to identify the catalogue of a run.
+        """
+        catalogue_hash = hashlib.sha256()
+
+        for array in (self.sunk_cost, self.salvageable_cost, self.risk_mask):
+            catalogue_hash.update(str(array.shape).encode())
+            catalogue_hash.update(array.astype(np.int64).tobytes())
+
+        return catalogue_hash.hexdigest()
+
+
+class LiveProject:
+    """
+    A project in a portfolio, which is a template of the catalogue started in a given year.
+    It has the same interface as Project, but shares the sub-projects of its template instead of copying them.
+    """
+
+    __slots__ = ("catalogue", "template_id", "created_at")
+
+    def __init__(self, catalogue: ProjectCatalogue, template_id: int, created_at: int):
+        self.catalogue = catalogue
+        self.template_id = template_id
+        self.created_at = created_at
+
+    @property
+    def sub_projects(self) -> tuple[SubProject, ...]:
+        return self.catalogue.sub_projects[self.template_id]
+
+    def get_current_value(
+        self, current_year: int, parameters: ModelParameters = DEFAULT_PARAMETERS
+    ) -> int:
+        assert current_year >= self.created_at
+
+        return (current_year - (self.created_at - 1)) * parameters.sub_project_value
+
+    def get_current_sub_project(self, current_year: int) -> SubProject:
+        return self.catalogue.sub_projects[self.template_id][
+            current_year - self.created_at
+        ]
+
+    def __eq__(self, other: object) -> bool:
+        # Projects are equal by value, like the Project dataclass.
+        if not isinstance(other, LiveProject):
+            return NotImplemented
+
+        if self.created_at != other.created_at:
+            return False
+
+        return (
+            self.catalogue is other.catalogue and self.template_id == other.template_id
+        ) or self.sub_projects == other.sub_projects
+
+    __hash__ = None
+
+    def __repr__(self) -> str:
+        return (
+            f"LiveProject(template_id={self.template_id}, created_at={self.created_at})"
+        )
+
+
+def get_sub_projects_key(sub_projects: Sequence[SubProject]) -> TemplateKey:
+    return tuple(
+        (sub_project.has_risk, sub_project.sunk_cost, sub_project.salvageable_cost)
+        for sub_project in sub_projects
+    )
+
+
+def get_template_key(project: Project | LiveProject) -> TemplateKey:
+    """
+    :return: A hashable and sortable key of the sub-projects of the project.
+    """
+    if isinstance(project, LiveProject):
+        return project.catalogue.template_keys[project.template_id]
+
+    return get_sub_projects_key(project.sub_projects)
@@ -0,0 +1,110 @@
+import hashlib
+import os
+import pickle
+from dataclasses import dataclass
+from pathlib import Path
+
+from src.data import ManagerResult, SimulationResult
+from src.parameters import ModelParameters
+from src.statistics import SimulationSummary
+
+# The version of the checkpoints, which is changed when the iterations or the checkpoint format change.
+CHECKPOINT_VERSION = 1
+
+# The default seconds between two checkpoints of a simulation.
+CHECKPOINT_INTERVAL = 10.0
+
+# The default amount of iterations each worker runs between two checks whether a checkpoint is due.
+CHECKPOINT_BATCH_SIZE = 100
+
+
+@dataclass
+class Checkpoint:
+    """
+    The progress of a simulation. Every iteration draws from its own random streams derived from the seed, so the
+    amount of completed iterations is all the random state that is needed to continue the run.
+    """
+
+    checkpoint_hash: str
+    seed: int
+    iterations: int  # the amount of completed iterations
+    result: SimulationResult | SimulationSummary
+
+
+def get_checkpoint_hash(
+    seed: int,
+    funding_profile: list[int],
+    catalogue_hash: str,
+    strategies: dict[str, str],
+    common_random_numbers: bool,
+    aggregate: bool,
+    parameters: ModelParameters,
+) -> str:
+    """
+    :param strategies: The settings of the strategy of each manager, see ProjectStrategy.get_settings.
+    :return: A hash of everything the iterations depend on, so a run can only be resumed with the same inputs.
+    """
+    checkpoint_hash = hashlib.sha256()
+
+    for part in (
+        CHECKPOINT_VERSION,
+        seed,
+        funding_profile,
+        catalogue_hash,
+        list(strategies.items()),
+        common_random_numbers,
+        aggregate,
+        parameters,
+    ):
+        checkpoint_hash.update(repr(part).encode())
+
+    return checkpoint_hash.hexdigest()
+
+
+def save_checkpoint(checkpoint: Checkpoint, path: Path):
+    """
+    Writes the checkpoint to a temporary file, which replaces the previous checkpoint at once,
+    so an interrupted write leaves the previous checkpoint intact.
+    """
+    result = checkpoint.result
+    if isinstance(result, SimulationResult):
+        # Only the completed rows are stored, not the room reserved for later iterations.
+        result = SimulationResult(
+            {
+                name: ManagerResult.from_arrays(manager.value, manager.cash)
+                for name, manager in result.managers.items()
+            }
+        )
+
+    temporary_path = path.with_name(path.name + ".tmp")
+    with open(temporary_path, "wb") as file:
+        pickle.dump(
+            Checkpoint(
+                checkpoint.checkpoint_hash,
+                checkpoint.seed,
+                checkpoint.iterations,
+                result,
+            ),
+            file,
+            protocol=pickle.HIGHEST_PROTOCOL,
+        )
+        file.flush()
+        os.fsync(file.fileno())
+
+    os.replace(temporary_path, path)
+
+
+def load_checkpoint(path: Path) -> Checkpoint | None:
+    """
+    :return: The stored checkpoint, or None if there is none.
+    """
+    if not path.exists():
+        return None
+
+    with open(path, "rb") as file:
+        checkpoint = pickle.load(file)
+
+    if not isinstance(checkpoint, Checkpoint):
+        raise ValueError(f"The file {path} is not a checkpoint of a simulation")
+
+    return checkpoint
@@ -2,23 +2,160 @@ from dataclasses import dataclass
 
 import numpy as np
 
+# The type of the value and cash results.
+RESULT_TYPE = np.int32
+
+
 @dataclass
 class Portfolio:
     value: list[int]
     cash: list[int]
 
 
-@dataclass
 class ManagerResult:
-    year_1: Portfolio
-    year_2: Portfolio
-    year_3: Portfolio
-    year_4: Portfolio
-    year_5: Portfolio
-    year_6: Portfolio
-    year_7: Portfolio
-    year_8: Portfolio
-    year_9: Portfolio
+    """
+    The results of a single manager, stored column wise as (iterations, years) arrays of the value and cash.
+    The arrays are preallocated and grown when needed, only the first 'count' rows hold results.
+    The years can also be accessed as year_1, year_2, ... which give a Portfolio view of that year's column.
+    """
+
+    def __init__(self, *years: Portfolio, **named_years: Portfolio):
+        """
+        :param years: The results of each year, where every Portfolio holds the value and cash of all iterations.
+        :param named_years: The results of the following years by name, year_1=..., year_2=..., like the
+        fields of the former dataclass.
+        """
+        if len(named_years) > 0:
+            first_named = len(years) + 1
+            names = [
+                f"year_{year}"
+                for year in range(first_named, first_named + len(named_years))
+            ]
+            if set(named_years) != set(names):
+                raise TypeError(
+                    f"Expected the years {', '.join(names)} after {len(years)} positional years, "
+                    f"given: {', '.join(named_years)}"
+                )
+            years += tuple(named_years[name] for name in names)
+
+        if len(years) == 0:
+            self.value_buffer = np.zeros((0, 0), dtype=RESULT_TYPE)
+            self.cash_buffer = np.zeros((0, 0), dtype=RESULT_TYPE)
+        else:
+            self.value_buffer = np.column_stack(
+                [np.asarray(year.value, dtype=RESULT_TYPE) for year in years]
+            )
+            self.cash_buffer = np.column_stack(
+                [np.asarray(year.cash, dtype=RESULT_TYPE) for year in years]
+            )
+
+        self.count = len(self.value_buffer)
+
+    @classmethod
+    def allocate(cls, iterations: int, years: int) -> "ManagerResult":
+        """
+        Creates an empty result with room for the given amount of iterations.
+        """
+        result = cls()
+        result.value_buffer = np.zeros((iterations, years), dtype=RESULT_TYPE)
+        result.cash_buffer = np.zeros((iterations, years), dtype=RESULT_TYPE)
+
+        return result
+
+    @classmethod
+    def from_arrays(cls, value: np.ndarray, cash: np.ndarray) -> "ManagerResult":
+        """
+        Creates a result from (iterations, years) arrays of the value and cash.
+        """
+        result = cls()
+        result.value_buffer = np.array(value, dtype=RESULT_TYPE, ndmin=2)
+        result.cash_buffer = np.array(cash, dtype=RESULT_TYPE, ndmin=2)
+        result.count = len(result.value_buffer)
+
+        return result
+
+    @property
+    def value(self) -> np.ndarray:
+        return self.value_buffer[: self.count]
+
+    @property
+    def cash(self) -> np.ndarray:
+        return self.cash_buffer[: self.count]
+
+    @property
+    def years(self) -> int:
+        return self.value_buffer.shape[1]
+
+    def add(self, portfolio: Portfolio):
+        """
+        Adds the result of an iteration, as the next row.
+        """
+        if self.count == len(self.value_buffer):
+            self.reserve(max(1, 2 * self.count), len(portfolio.value))
+
+        self.value_buffer[self.count] = portfolio.value
+        self.cash_buffer[self.count] = portfolio.cash
+        self.count += 1
+
+    def extend(self, other: "ManagerResult"):
+        """
+        Adds all iterations of another result, as the next rows.
+        """
+        if self.count + other.count > len(self.value_buffer):
+            # Grown at least twofold, so extending batch by batch takes linear time.
+            self.reserve(max(self.count + other.count, 2 * self.count), other.years)
+
+        self.value_buffer[self.count : self.count + other.count] = other.value
+        self.cash_buffer[self.count : self.count + other.count] = other.cash
+        self.count += other.count
+
+    def reserve(self, iterations: int, years: int):
+        """
+        Grows the arrays to hold the given amount of iterations.
+        """
+        assert self.count == 0 or years == self.years
+
+        value_buffer = np.zeros((iterations, years), dtype=RESULT_TYPE)
+        cash_buffer = np.zeros((iterations, years), dtype=RESULT_TYPE)
+        value_buffer[: self.count] = self.value
+        cash_buffer[: self.count] = self.cash
+
+        self.value_buffer = value_buffer
+        self.cash_buffer = cash_buffer
+
+    def get_year(self, year: int) -> Portfolio:
+        """
+        :param year: The year, starting from 1.
+        :return: A view of the value and cash of all iterations in the given year.
+        """
+        return Portfolio(self.value[:, year - 1], self.cash[:, year - 1])
+
+    def __getattr__(self, name: str) -> Portfolio:
+        # Compatibility with the year_1, year_2, ... attributes of the results.
+        # The buffers are looked up in the __dict__, as they are missing while e.g. copy or pickle probe the object.
+        value_buffer = self.__dict__.get("value_buffer")
+        if (
+            value_buffer is not None
+            and name.startswith("year_")
+            and name[5:].isdigit()
+            and 1 <= int(name[5:]) <= value_buffer.shape[1]
+        ):
+            return self.get_year(int(name[5:]))
+
+        raise AttributeError(
+            f"'{type(self).__name__}' object has no attribute '{name}'"
+        )
+
+    def __eq__(self, other: object) -> bool:
+        if not isinstance(other, ManagerResult):
+            return NotImplemented
+
+        return np.array_equal(self.value, other.value) and np.array_equal(
+            self.cash, other.cash
+        )
+
+    def __repr__(self) -> str:
+        return f"ManagerResult(iterations={self.count}, years={self.years})"
 
 
 @dataclass
@@ -27,37 +164,150 @@ class SimulationResult:
 
     def add_iteration_result(self, iteration_result: dict[str, Portfolio]):
         for name, portfolio in iteration_result.items():
-            # Year 1
-            self.managers[name].year_1.cash.append(portfolio.cash[0])
-            self.managers[name].year_1.value.append(portfolio.value[0])
-            # Year 2
-            self.managers[name].year_2.cash.append(portfolio.cash[1])
-            self.managers[name].year_2.value.append(portfolio.value[1])
-            # Year 3
-            self.managers[name].year_3.cash.append(portfolio.cash[2])
-            self.managers[name].year_3.value.append(portfolio.value[2])
-            # Year 4
-            self.managers[name].year_4.cash.append(portfolio.cash[3])
-            self.managers[name].year_4.value.append(portfolio.value[3])
-            # Year 5
-            self.managers[name].year_5.cash.append(portfolio.cash[4])
-            self.managers[name].year_5.value.append(portfolio.value[4])
-            # Year 6
-            self.managers[name].year_6.cash.append(portfolio.cash[5])
-            self.managers[name].year_6.value.append(portfolio.value[5])
-            # Year 7
-            self.managers[name].year_7.cash.append(portfolio.cash[6])
-            self.managers[name].year_7.value.append(portfolio.value[6])
-            # Year 8
-            self.managers[name].year_8.cash.append(portfolio.cash[7])
-            self.managers[name].year_8.value.append(portfolio.value[7])
-            # Year 9
-            self.managers[name].year_9.cash.append(portfolio.cash[8])
-            self.managers[name].year_9.value.append(portfolio.value[8])
+            self.managers[name].add(portfolio)
+
+    def extend(self, other: "SimulationResult"):
+        """
+        Appends all iterations of another simulation result, e.g. from a parallel worker, to this result.
+        """
+        for name, manager in other.managers.items():
+            self.managers[name].extend(manager)
+
+
+@dataclass
+class ManagerDistribution:
+    """
+    The exact probability of every value and cash of a manager in each year, as computed by the ExactSimulation.
+    """
+
+    value: list[dict[int, float]]  # the probability of each value, per year
+    cash: list[dict[int, float]]  # the probability of each cash, per year
+
+    @property
+    def years(self) -> int:
+        return len(self.value)
+
+    def get_distribution(self, metric: str, year: int) -> tuple[np.ndarray, np.ndarray]:
+        """
+        :param metric: Either "value" or "cash".
+        :param year: The year, starting at 1.
+        :return: The sorted outcomes and their probabilities.
+        """
+        distribution = getattr(self, metric)[year - 1]
+        outcomes = np.array(sorted(distribution), dtype=np.int64)
+        probabilities = np.array([distribution[outcome] for outcome in outcomes])
+
+        return outcomes, probabilities
+
+    def get_mean(self, metric: str) -> np.ndarray:
+        """
+        :return: The expected value of the metric in each year.
+        """
+        return np.array(
+            [
+                sum(outcome * probability for outcome, probability in year.items())
+                for year in getattr(self, metric)
+            ]
+        )
+
+    def get_standard_deviation(self, metric: str) -> np.ndarray:
+        means = self.get_mean(metric)
+
+        return np.sqrt(
+            [
+                sum(
+                    (outcome - mean) ** 2 * probability
+                    for outcome, probability in year.items()
+                )
+                for year, mean in zip(getattr(self, metric), means)
+            ]
+        )
+
+
+@dataclass
+class ExactSimulationResult:
+    managers: dict[str, ManagerDistribution]
+
+
+@dataclass
+class RunMetadata:
+    """
+    The description of a simulation run, which is stored alongside the results.
+    """
+
+    seed: int
+    iterations: int
+    funding_profile: list[int]  # the allocated funds of each year
+    catalogue_hash: str
+    managers: list[str]
+    common_random_numbers: bool = False
+    # The precision an adaptive run aimed for and reached, see PrecisionTarget. None for a fixed iteration count.
+    target_half_width: float | None = None
+    achieved_half_width: float | None = None
+    # The ModelParameters of the run as a dictionary, None if they were not recorded.
+    model_parameters: dict[str, object] | None = None
+
+
+@dataclass
+class PairedDifference:
+    first_manager: str
+    second_manager: str
+    metric: str  # either "value" or "cash"
+    year: int
+    mean: float
+    standard_deviation: float
+    standard_error: float
+
+
+def get_paired_differences(
+    simulation_result: SimulationResult,
+) -> list[PairedDifference]:
+    """
+    Calculates the per iteration differences between each pair of managers, for the value and cash of every year.
+    The iterations are paired by their index, which with common random numbers means the managers faced the same draws.
+    :return: The statistics of the differences (first manager minus second manager).
+    """
+    differences = []
+    names = list(simulation_result.managers.keys())
+
+    for first_index, first_name in enumerate(names):
+        for second_name in names[first_index + 1 :]:
+            first = simulation_result.managers[first_name]
+            second = simulation_result.managers[second_name]
+
+            if first.count == 0:
+                continue
+
+            for metric in ("value", "cash"):
+                difference = np.subtract(
+                    getattr(first, metric), getattr(second, metric), dtype=float
+                )
+
+                mean = np.mean(difference, axis=0)
+                standard_deviation = np.zeros(first.years)
+                if first.count > 1:
+                    standard_deviation = np.std(difference, axis=0, ddof=1)
+
+                standard_error = standard_deviation / np.sqrt(first.count)
+
+                for year in range(1, first.years + 1):
+                    differences.append(
+                        PairedDifference(
+                            first_name,
+                            second_name,
+                            metric,
+                            year,
+                            float(mean[year - 1]),
+                            float(standard_deviation[year - 1]),
+                            float(standard_error[year - 1]),
+                        )
+                    )
+
+    return differences
 
 
 def get_average_value_over_years_for_managers(manager_results: SimulationResult):
     for name, manager in manager_results.managers.items():
-        avg = str(np.average(manager.year_9.value))
+        avg = str(np.average(manager.value[:, -1]))
 
         print(name + ": final_value=" + avg)
@@ -0,0 +1,334 @@
+from collections import defaultdict
+
+import numpy as np
+
+from src.catalogue import ProjectCatalogue
+from src.data import ExactSimulationResult, ManagerDistribution
+from src.parameters import DEFAULT_PARAMETERS, ModelParameters
+from src.probability import get_risk_distribution
+from src.project import Project
+from src.project_manager import ProjectManager
+from src.strategy import ProjectStrategy
+from src.year import Year
+
+# The default limit of distinct states in a year, above which the exact distribution is considered intractable.
+MAX_EXACT_STATES = 1_000_000
+
+#   A state of a manager is (funds of every year, (template id, created_at) of every current project in the
+#   order they were accepted, number of completed projects). The cash does not change what the manager does, so
+#   every state holds the probability of each accumulated cash as an array indexed by the cash.
+ExactState = tuple[tuple[int, ...], tuple[tuple[int, int], ...], int]
+
+
+class ExactSimulation:
+    """
+    Computes the exact distribution of the value and cash of each manager in each year, instead of sampling it.
+    The distribution over the states of a manager is propagated year by year, where the project draws are uniform
+    over the catalogue and the risk costs follow the risk values of the parameters, and equal states are merged.
+    This is only tractable for small catalogues and short horizons, see MAX_EXACT_STATES.
+    """
+
+    projects: ProjectCatalogue
+    years: list[Year]
+    managers: dict[str, ProjectManager]
+    max_states: int
+    parameters: ModelParameters
+
+    def __init__(
+        self,
+        years: list[Year],
+        managers: dict[str, ProjectManager],
+        projects: list[Project] | ProjectCatalogue,
+        max_states: int = MAX_EXACT_STATES,
+        parameters: ModelParameters = DEFAULT_PARAMETERS,
+    ):
+        if not isinstance(projects, ProjectCatalogue):
+            projects = ProjectCatalogue.from_projects(projects)
+
+        # The constants of the model, which the strategies of the managers must have been made with.
+        if projects.project_length != parameters.project_length:
+            raise ValueError(
+                f"The templates have {projects.project_length} sub-projects, but the project length is "
+                f"{parameters.project_length}, see ProjectCatalogue.with_project_length"
+            )
+        for name, manager in managers.items():
+            if manager.strategy.parameters != parameters:
+                raise ValueError(
+                    f"The strategy of manager '{name}' was made with other parameters than the simulation"
+                )
+
+        self.years = years
+        self.managers = managers
+        self.projects = projects
+        self.max_states = max_states
+        self.parameters = parameters
+
+    def run_simulation(self) -> ExactSimulationResult:
+        """
+        :return: The distribution of the value and cash of each manager in each year.
+        :raises ValueError: If a year has more than max_states distinct states.
+        """
+        return ExactSimulationResult(
+            {
+                name: get_manager_distribution(
+                    manager.strategy,
+                    self.years,
+                    self.projects,
+                    self.max_states,
+                    self.parameters,
+                )
+                for name, manager in self.managers.items()
+            }
+        )
+
+
+def get_manager_distribution(
+    strategy: ProjectStrategy,
+    funds_per_year: list[Year],
+    catalogue: ProjectCatalogue,
+    max_states: int = MAX_EXACT_STATES,
+    parameters: ModelParameters = DEFAULT_PARAMETERS,
+) -> ManagerDistribution:
+    """
+    The exact version of ProjectManager.run, which follows every outcome of the year weighted by its probability.
+    """
+    strategy.reset()
+    states: dict[ExactState, np.ndarray] = {
+        (tuple(year.allocated_funds for year in funds_per_year), (), 0): np.ones(1)
+    }
+    value_distribution = []
+    cash_distribution = []
+
+    for i in range(len(funds_per_year)):
+        current_year = i + 1
+
+        # Step 1: The manager accepts projects until the first rejected draw.
+        states = accept_projects(
+            strategy, catalogue, current_year, states, max_states, parameters
+        )
+
+        # Steps 2 to 5: Every risk cost of the year, with its deficit, finished projects, value and cash.
+        year_states: dict[ExactState, np.ndarray] = {}
+
+        for state, cash_probabilities in states.items():
+            for risk_probability, next_state, current_year_cash in finish_year(
+                strategy, catalogue, current_year, state, parameters
+            ):
+                add_cash_probabilities(
+                    year_states,
+                    next_state,
+                    cash_probabilities * risk_probability,
+                    current_year_cash,
+                )
+
+        check_states(year_states, max_states, current_year)
+        states = year_states
+
+        values: dict[int, float] = defaultdict(float)
+        cash: dict[int, np.ndarray] = {}
+        for (_, portfolio, completed), cash_probabilities in states.items():
+            values[get_value(portfolio, completed, current_year, parameters)] += float(
+                cash_probabilities.sum()
+            )
+            add_cash_probabilities(cash, 0, cash_probabilities)
+
+        value_distribution.append(dict(values))
+        cash_distribution.append(
+            {
+                int(total_cash): float(probability)
+                for total_cash, probability in enumerate(cash[0])
+                if probability > 0
+            }
+        )
+
+    return ManagerDistribution(value_distribution, cash_distribution)
+
+
+def accept_projects(
+    strategy: ProjectStrategy,
+    catalogue: ProjectCatalogue,
+    current_year: int,
+    states: dict[ExactState, np.ndarray],
+    max_states: int,
+    parameters: ModelParameters = DEFAULT_PARAMETERS,
+) -> dict[ExactState, np.ndarray]:
+    """
+    Every draw is a template with probability 1 / len(catalogue). An accepted template leads to a state with one
+    more project, which draws again, and a rejected template ends the acceptance of the year.
+    :return: The distribution of the states after the acceptance.
+    """
+    draw_probability = 1 / len(catalogue)
+    accepted_states: dict[ExactState, np.ndarray] = {}
+
+    # Every layer has accepted one more project in the year than the previous.
+    layer = states
+    while len(layer) > 0:
+        next_layer: dict[ExactState, np.ndarray] = {}
+
+        for state, cash_probabilities in layer.items():
+            funds, portfolio, completed = state
+            available_funds = [Year(allocated_funds) for allocated_funds in funds]
+            projects = [
+                catalogue.create_project(template_id, created_at)
+                for template_id, created_at in portfolio
+            ]
+            draw_probabilities = cash_probabilities * draw_probability
+
+            for template_id in catalogue.template_ids:
+                new_project = catalogue.create_project(template_id, current_year)
+                should_accept = strategy.should_accept_project(
+                    available_funds[current_year - 1 :],
+                    projects,
+                    current_year,
+                    new_project,
+                )
+
+                if not should_accept:
+                    add_cash_probabilities(accepted_states, state, draw_probabilities)
+                    continue
+
+                new_funds = list(funds)
+                project_end = current_year - 1 + parameters.project_length
+                for j in range(current_year - 1, min(project_end, len(funds))):
+                    new_funds[j] -= parameters.sub_project_cost
+
+                next_state = (
+                    tuple(new_funds),
+                    portfolio + ((template_id, current_year),),
+                    completed,
+                )
+                add_cash_probabilities(next_layer, next_state, draw_probabilities)
+
+        check_states(next_layer, max_states, current_year)
+        layer = next_layer
+
+    return accepted_states
+
+
+def finish_year(
+    strategy: ProjectStrategy,
+    catalogue: ProjectCatalogue,
+    current_year: int,
+    state: ExactState,
+    parameters: ModelParameters = DEFAULT_PARAMETERS,
+) -> list[tuple[float, ExactState, int]]:
+    """
+    Steps 2 to 5 of ProjectManager.run for every total risk cost of the year.
+    :return: The probability of each total risk cost, with the state at the end of the year and the cash of the year.
+    """
+    funds, portfolio, completed = state
+    projects = [
+        catalogue.create_project(template_id, created_at)
+        for template_id, created_at in portfolio
+    ]
+    risk_count = sum(
+        1
+        for project in projects
+        if project.get_current_sub_project(current_year).has_risk
+    )
+    # The state without closures, which every risk cost without a deficit leads to.
+    next_state = get_next_state(projects, funds, completed, current_year, parameters)
+    outcomes = []
+
+    for risk_probability, risk_cost in get_risk_distribution(
+        risk_count, parameters.risk_pmf
+    ):
+        possible_deficit = funds[current_year - 1] - risk_cost
+
+        if possible_deficit >= 0:
+            outcomes.append((risk_probability, next_state, possible_deficit))
+            continue
+
+        manager = ProjectManager(list(projects), [], [], strategy)
+        available_funds = [Year(allocated_funds) for allocated_funds in funds]
+        deficit_return = manager.reacquire_deficit_value(
+            possible_deficit, current_year, available_funds, parameters
+        )
+
+        outcomes.append(
+            (
+                risk_probability,
+                get_next_state(
+                    manager.current_projects,
+                    tuple(year.allocated_funds for year in available_funds),
+                    completed,
+                    current_year,
+                    parameters,
+                ),
+                max(deficit_return, 0),
+            )
+        )
+
+    return outcomes
+
+
+def get_next_state(
+    projects: list[Project],
+    funds: tuple[int, ...],
+    completed: int,
+    current_year: int,
+    parameters: ModelParameters = DEFAULT_PARAMETERS,
+) -> ExactState:
+    """
+    Removes the finished projects at the end of the year.
+    :return: The state at the start of the next year.
+    """
+    remaining_projects = tuple(
+        (project.template_id, project.created_at)
+        for project in projects
+        if (current_year - project.created_at) < parameters.project_length - 1
+    )
+
+    return (
+        # The funds of the past years no longer matter, so they are dropped to merge more states.
+        (0,) * current_year + funds[current_year:],
+        remaining_projects,
+        completed + len(projects) - len(remaining_projects),
+    )
+
+
+def add_cash_probabilities(
+    states: dict, state, cash_probabilities: np.ndarray, cash: int = 0
+):
+    """
+    Adds the probabilities of the accumulated cash to the state, shifted by the given cash.
+    """
+    size = len(cash_probabilities) + cash
+    target = states.get(state)
+
+    if target is None:
+        target = np.zeros(size)
+        states[state] = target
+    elif len(target) < size:
+        target = np.pad(target, (0, size - len(target)))
+        states[state] = target
+
+    target[cash:size] += cash_probabilities
+
+
+def get_value(
+    portfolio: tuple[tuple[int, int], ...],
+    completed: int,
+    current_year: int,
+    parameters: ModelParameters = DEFAULT_PARAMETERS,
+) -> int:
+    """
+    The same as ProjectManager.calculate_current_value.
+    """
+    finished_work_years = sum(
+        current_year - (created_at - 1) for _, created_at in portfolio
+    )
+
+    return (
+        finished_work_years + completed * parameters.project_length
+    ) * parameters.sub_project_value
+
+
+def check_states(
+    states: dict[ExactState, np.ndarray], max_states: int, current_year: int
+):
+    if len(states) > max_states:
+        raise ValueError(
+            f"The exact distribution has more than {max_states} states in year {current_year}, "
+            f"use the Monte Carlo simulation instead"
+        )
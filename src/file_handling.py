@@ -1,10 +1,13 @@
+from dataclasses import asdict
 from pathlib import Path
 
 import pandas as pd
 from pandas import Series
 
-from src.data import SimulationResult
+from src.catalogue import ProjectCatalogue
+from src.data import RunMetadata, SimulationResult, get_paired_differences
 from src.project import Project, SubProject
+from src.statistics import SimulationSummary
 
 from config import PROJECTS_SHEET_NAME
 
@@ -68,19 +71,26 @@ def load_projects_from_file(file_path: Path) -> list[Project]:
     return projects
 
 
-def save_simulation_results_to_excel(simulation_result: SimulationResult, path: Path):
+def load_catalogue_from_file(file_path: Path) -> ProjectCatalogue:
+    """
+    Loads the projects from the excel file into the array-backed catalogue used by the simulation.
+    """
+    return ProjectCatalogue.from_projects(load_projects_from_file(file_path))
+
+
+def save_simulation_results_to_excel(
+    simulation_result: SimulationResult,
+    path: Path,
+    metadata: RunMetadata | None = None,
+):
     with pd.ExcelWriter(path, engine="openpyxl") as writer:
         for manager_name, manager_result in simulation_result.managers.items():
             # Define the years for the x-axis
-            years = [f"year_{i}" for i in range(1, 10)]
-
-            # Extract value and cash data from each year into dictionaries
-            value_data = {year: getattr(manager_result, year).value for year in years}
-            cash_data = {year: getattr(manager_result, year).cash for year in years}
+            years = [f"year_{i}" for i in range(1, manager_result.years + 1)]
 
-            # Convert the dictionaries into DataFrames, with years as columns
-            value_df = pd.DataFrame(value_data)
-            cash_df = pd.DataFrame(cash_data)
+            # Convert the (iterations, years) arrays into DataFrames, with years as columns
+            value_df = pd.DataFrame(manager_result.value, columns=years)
+            cash_df = pd.DataFrame(manager_result.cash, columns=years)
 
             # Write the DataFrames to separate sheets in the Excel file.
             # Each run creates new sheets (overwriting previous ones if the file exists)
@@ -91,6 +101,56 @@ def save_simulation_results_to_excel(simulation_result: SimulationResult, path:
                 writer, sheet_name=f"{manager_name}-cash-result", index=False
             )
 
+        # The differences between each pair of managers, paired by iteration.
+        paired_differences = get_paired_differences(simulation_result)
+        if len(paired_differences) > 0:
+            pd.DataFrame([asdict(row) for row in paired_differences]).to_excel(
+                writer, sheet_name="paired-differences", index=False
+            )
+
+        if metadata is not None:
+            save_metadata_sheet(writer, metadata)
+
+
+def save_simulation_summary_to_excel(
+    simulation_summary: SimulationSummary,
+    path: Path,
+    metadata: RunMetadata | None = None,
+):
+    """
+    Writes the summary statistics of an aggregated simulation as a single table, with a row for each
+    manager, metric and year.
+    """
+    with pd.ExcelWriter(path, engine="openpyxl") as writer:
+        get_summary_frame(simulation_summary).to_excel(
+            writer, sheet_name="summary", index=False
+        )
+
+        if metadata is not None:
+            save_metadata_sheet(writer, metadata)
+
+
+def get_summary_frame(simulation_summary: SimulationSummary) -> pd.DataFrame:
+    """
+    :return: The summary statistics as a table, where each quantile has its own column, e.g. q05 and q50.
+    """
+    rows = []
+    for row in simulation_summary.get_rows():
+        data = asdict(row)
+        quantiles = data.pop("quantiles")
+        data.update({f"q{round(q * 100):02d}": value for q, value in quantiles.items()})
+        rows.append(data)
+
+    return pd.DataFrame(rows)
+
+
+def save_metadata_sheet(writer: pd.ExcelWriter, metadata: RunMetadata):
+    metadata_df = pd.DataFrame(
+        [(key, str(value)) for key, value in asdict(metadata).items()],
+        columns=["key", "value"],
+    )
+    metadata_df.to_excel(writer, sheet_name="metadata", index=False)
+
 
 def convert_row_to_sub_projects(df: Series) -> list[SubProject]:
     sub_projects = []
@@ -0,0 +1,307 @@
+import json
+from abc import ABC, abstractmethod
+from dataclasses import asdict
+from importlib.util import find_spec
+from pathlib import Path
+from typing import override
+
+import numpy as np
+import pandas as pd
+
+from src.data import ManagerResult, RunMetadata, SimulationResult, RESULT_TYPE
+from src.statistics import SimulationSummary
+import src.file_handling as fh
+
+# The prefix of the metadata lines at the top of a CSV file.
+CSV_METADATA_PREFIX = "# "
+
+# The column that is only in a summary, which tells a summary file from a file with every iteration.
+SUMMARY_COLUMN = "metric"
+
+
+class ResultWriter(ABC):
+    """
+    A backend that saves the results of a simulation to a file.
+    """
+
+    @abstractmethod
+    def save_results(
+        self, simulation_result: SimulationResult, path: Path, metadata: RunMetadata
+    ):
+        raise NotImplementedError("Subclasses must implement this method")
+
+    @abstractmethod
+    def save_summary(
+        self, simulation_summary: SimulationSummary, path: Path, metadata: RunMetadata
+    ):
+        raise NotImplementedError("Subclasses must implement this method")
+
+
+class ExcelResultWriter(ResultWriter):
+    """
+    Writes a sheet with the value and a sheet with the cash of each manager, limited to about 1M iterations.
+    """
+
+    @override
+    def save_results(
+        self, simulation_result: SimulationResult, path: Path, metadata: RunMetadata
+    ):
+        require_openpyxl()
+        fh.save_simulation_results_to_excel(simulation_result, path, metadata)
+
+    @override
+    def save_summary(
+        self, simulation_summary: SimulationSummary, path: Path, metadata: RunMetadata
+    ):
+        require_openpyxl()
+        fh.save_simulation_summary_to_excel(simulation_summary, path, metadata)
+
+
+class NpzResultWriter(ResultWriter):
+    """
+    Writes a compressed NumPy archive, with a '{manager}-value' and '{manager}-cash' array of shape
+    (iterations, years) for each manager and the metadata as a JSON string.
+    """
+
+    @override
+    def save_results(
+        self, simulation_result: SimulationResult, path: Path, metadata: RunMetadata
+    ):
+        arrays = {}
+        for name, manager_result in simulation_result.managers.items():
+            arrays[f"{name}-value"] = manager_result.value
+            arrays[f"{name}-cash"] = manager_result.cash
+
+        # Written through a file object, as NumPy would otherwise append .npz to other extensions.
+        with open(path, "wb") as file:
+            np.savez_compressed(file, metadata=metadata_to_json(metadata), **arrays)
+
+    @override
+    def save_summary(
+        self, simulation_summary: SimulationSummary, path: Path, metadata: RunMetadata
+    ):
+        summary_df = fh.get_summary_frame(simulation_summary)
+        arrays = {}
+        for column in summary_df:
+            # The text columns are stored as strings, as object arrays would require pickling.
+            if summary_df[column].dtype == object:
+                arrays[column] = summary_df[column].to_numpy(dtype=str)
+            else:
+                arrays[column] = summary_df[column].to_numpy()
+
+        with open(path, "wb") as file:
+            np.savez_compressed(file, metadata=metadata_to_json(metadata), **arrays)
+
+
+class NpyResultWriter(ResultWriter):
+    """
+    Writes a single array of shape (managers, 2, iterations, years), where the second axis is value and cash,
+    which can be memory-mapped with np.load(path, mmap_mode="r"). The metadata is written to a JSON file
+    next to it, with the same name.
+    """
+
+    @override
+    def save_results(
+        self, simulation_result: SimulationResult, path: Path, metadata: RunMetadata
+    ):
+        managers = list(simulation_result.managers.values())
+        iterations = managers[0].count if len(managers) > 0 else 0
+        years = managers[0].years if len(managers) > 0 else 0
+
+        results = np.lib.format.open_memmap(
+            path,
+            mode="w+",
+            dtype=RESULT_TYPE,
+            shape=(len(managers), 2, iterations, years),
+        )
+        for index, manager_result in enumerate(managers):
+            results[index, 0] = manager_result.value
+            results[index, 1] = manager_result.cash
+        results.flush()
+
+        path.with_suffix(".json").write_text(metadata_to_json(metadata))
+
+    @override
+    def save_summary(
+        self, simulation_summary: SimulationSummary, path: Path, metadata: RunMetadata
+    ):
+        raise ValueError(
+            "The .npy format only holds iteration results, use .npz or .csv for a summary"
+        )
+
+
+class CsvResultWriter(ResultWriter):
+    """
+    Writes a row for each manager and iteration, with a column for the value and cash of each year.
+    The metadata is written as comment lines at the top of the file.
+    """
+
+    @override
+    def save_results(
+        self, simulation_result: SimulationResult, path: Path, metadata: RunMetadata
+    ):
+        frames = []
+        for name, manager_result in simulation_result.managers.items():
+            years = range(1, manager_result.years + 1)
+            frame = pd.DataFrame(
+                np.hstack([manager_result.value, manager_result.cash]),
+                columns=[f"value_year_{year}" for year in years]
+                + [f"cash_year_{year}" for year in years],
+            )
+            frame.insert(0, "iteration", np.arange(manager_result.count))
+            frame.insert(0, "manager", name)
+            frames.append(frame)
+
+        self.save_frame(pd.concat(frames, ignore_index=True), path, metadata)
+
+    @override
+    def save_summary(
+        self, simulation_summary: SimulationSummary, path: Path, metadata: RunMetadata
+    ):
+        self.save_frame(fh.get_summary_frame(simulation_summary), path, metadata)
+
+    @staticmethod
+    def save_frame(frame: pd.DataFrame, path: Path, metadata: RunMetadata):
+        with open(path, "w", newline="") as file:
+            file.write(CSV_METADATA_PREFIX + metadata_to_json(metadata) + "\n")
+            frame.to_csv(file, index=False)
+
+
+# The output backends, chosen by the file extension of the output path.
+RESULT_WRITERS: dict[str, ResultWriter] = {
+    ".xlsx": ExcelResultWriter(),
+    ".npz": NpzResultWriter(),
+    ".npy": NpyResultWriter(),
+    ".csv": CsvResultWriter(),
+}
+
+
+def get_result_writer(path: Path, output_format: str | None = None) -> ResultWriter:
+    """
+    :param output_format: The extension of the format, e.g. ".npz", which overrides the extension of the path.
+    """
+    extension = (output_format or path.suffix).lower()
+    if not extension.startswith("."):
+        extension = "." + extension
+
+    if extension not in RESULT_WRITERS:
+        raise ValueError(
+            f"Unsupported output format '{extension}', supported formats are: {', '.join(RESULT_WRITERS)}"
+        )
+
+    return RESULT_WRITERS[extension]
+
+
+def save_simulation(
+    simulation_result: SimulationResult | SimulationSummary,
+    path: Path,
+    metadata: RunMetadata,
+    output_format: str | None = None,
+):
+    """
+    Saves the results or summary of a simulation in the format given by the extension of the path.
+    """
+    writer = get_result_writer(path, output_format)
+
+    if isinstance(simulation_result, SimulationSummary):
+        writer.save_summary(simulation_result, path, metadata)
+    else:
+        writer.save_results(simulation_result, path, metadata)
+
+
+def load_simulation_results(path: Path) -> tuple[SimulationResult, RunMetadata]:
+    """
+    Loads the iteration results and metadata saved in the .npz, .npy or .csv format.
+    A summary of an aggregate run is loaded with load_simulation_summary instead.
+    """
+    extension = path.suffix.lower()
+
+    if extension == ".npz":
+        with np.load(path) as archive:
+            if SUMMARY_COLUMN in archive:
+                raise_summary_error(path)
+            metadata = metadata_from_json(str(archive["metadata"]))
+            managers = {
+                name: ManagerResult.from_arrays(
+                    archive[f"{name}-value"], archive[f"{name}-cash"]
+                )
+                for name in metadata.managers
+            }
+    elif extension == ".npy":
+        metadata = metadata_from_json(path.with_suffix(".json").read_text())
+        results = np.load(path, mmap_mode="r")
+        managers = {
+            name: ManagerResult.from_arrays(results[index, 0], results[index, 1])
+            for index, name in enumerate(metadata.managers)
+        }
+    elif extension == ".csv":
+        with open(path, newline="") as file:
+            metadata = metadata_from_json(
+                file.readline().removeprefix(CSV_METADATA_PREFIX)
+            )
+            frame = pd.read_csv(file)
+
+        if SUMMARY_COLUMN in frame:
+            raise_summary_error(path)
+        managers = {}
+        for name in metadata.managers:
+            manager_frame = frame[frame["manager"] == name]
+            managers[name] = ManagerResult.from_arrays(
+                manager_frame.filter(regex="^value_year_").to_numpy(),
+                manager_frame.filter(regex="^cash_year_").to_numpy(),
+            )
+    else:
+        raise ValueError(f"Results can not be loaded from '{extension}' files")
+
+    return SimulationResult(managers), metadata
+
+
+def load_simulation_summary(path: Path) -> tuple[pd.DataFrame, RunMetadata]:
+    """
+    Loads the summary and metadata of an aggregate run saved in the .npz or .csv format.
+    :return: The summary table, with a row for each manager, metric and year, see get_summary_frame.
+    """
+    extension = path.suffix.lower()
+
+    if extension == ".npz":
+        with np.load(path) as archive:
+            metadata = metadata_from_json(str(archive["metadata"]))
+            frame = pd.DataFrame(
+                {key: archive[key] for key in archive.files if key != "metadata"}
+            )
+    elif extension == ".csv":
+        with open(path, newline="") as file:
+            metadata = metadata_from_json(
+                file.readline().removeprefix(CSV_METADATA_PREFIX)
+            )
+            frame = pd.read_csv(file)
+    else:
+        raise ValueError(f"Summaries can not be loaded from '{extension}' files")
+
+    if SUMMARY_COLUMN not in frame:
+        raise ValueError(
+            f"The file {path} holds the results of every iteration, load it with load_simulation_results"
+        )
+
+    return frame, metadata
+
+
+def raise_summary_error(path: Path):
+    raise ValueError(
+        f"The file {path} holds the summary of an aggregate run, load it with load_simulation_summary"
+    )
+
+
+def metadata_to_json(metadata: RunMetadata) -> str:
+    return json.dumps(asdict(metadata))
+
+
+def metadata_from_json(text: str) -> RunMetadata:
+    return RunMetadata(**json.loads(text))
+
+
+def require_openpyxl():
+    if find_spec("openpyxl") is None:
+        raise ImportError(
+            "Saving to Excel requires the openpyxl package, install it or use the .npz or .csv format"
+        )
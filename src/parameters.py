@@ -0,0 +1,51 @@
+from dataclasses import dataclass, field
+from functools import cached_property
+
+from src.risk import NORMAL_RISK_VALUES, RiskPmf, get_uniform_risk_pmf
+from src.utils.constants import SUB_PROJECT_COST, SUB_PROJECT_VALUE, PROJECT_LENGTH
+
+
+@dataclass(frozen=True)
+class ModelParameters:
+    """
+    The constants of the model, which can be changed per run, e.g. by a parameter sweep.
+    The defaults are the constants in src/utils/constants.py and the normal risk values.
+    """
+
+    sub_project_value: int = SUB_PROJECT_VALUE
+    sub_project_cost: int = SUB_PROJECT_COST
+    project_length: int = PROJECT_LENGTH
+    # The risk cost of a sub-project with risk is drawn uniformly from these values.
+    risk_values: tuple[int, ...] = field(default=tuple(NORMAL_RISK_VALUES))
+
+    def __post_init__(self):
+        if self.sub_project_value < 0:
+            raise ValueError(
+                f"The value of a sub-project can not be negative, given: {self.sub_project_value}"
+            )
+        if self.sub_project_cost < 1:
+            raise ValueError(
+                f"The cost of a sub-project must be at least 1, given: {self.sub_project_cost}"
+            )
+        if self.project_length < 1:
+            raise ValueError(
+                f"The project length must be at least 1, given: {self.project_length}"
+            )
+        if len(self.risk_values) == 0 or min(self.risk_values) < 0:
+            raise ValueError(
+                f"The risk values must be non-negative, and there must be at least one, given: "
+                f"{self.risk_values}"
+            )
+
+        # Lists are accepted, but stored as a tuple so the parameters stay hashable.
+        object.__setattr__(self, "risk_values", tuple(self.risk_values))
+
+    @cached_property
+    def risk_pmf(self) -> RiskPmf:
+        """
+        The PMF of the risk cost of a single sub-project with risk.
+        """
+        return get_uniform_risk_pmf(self.risk_values)
+
+
+DEFAULT_PARAMETERS = ModelParameters()
@@ -0,0 +1,335 @@
+import hashlib
+import os
+import pickle
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import override
+
+from src.catalogue import ProjectCatalogue
+from src.parameters import ModelParameters
+from src.probability import get_risk_distribution
+from src.project import Project
+from src.project_manager import ProjectManager
+from src.strategy import DecisionKey, OptimalStrategy, get_decision_key
+from src.utils.portfolio_index import PortfolioIndex
+from src.year import Year
+
+# The version of the compiled policies, which is changed when the decisions or the table format change.
+POLICY_VERSION = 2
+
+# The default limit of states explored when compiling a policy.
+MAX_POLICY_STATES = 100_000
+
+#   A state of the optimal manager is (current year, funds of every year, (template id, created_at) of every
+#   current project), at the point where it is offered a new project. The projects are kept in the order they
+#   were accepted, since the closures of a deficit depend on it.
+PolicyState = tuple[int, tuple[int, ...], tuple[tuple[int, int], ...]]
+
+
+@dataclass
+class PolicyTable:
+    """
+    The decisions of an OptimalStrategy for every reachable state of a catalogue and funding profile.
+    """
+
+    policy_hash: str
+    strategy_settings: str  # the settings of the strategy the policy was compiled with, see get_strategy_settings
+    decisions: dict[DecisionKey, bool]
+    states: int  # the number of explored states
+    complete: bool  # False if the exploration stopped at the state limit, the missing decisions are evaluated
+
+
+def get_strategy_settings(strategy: OptimalStrategy) -> str:
+    """
+    :return: The settings of the strategy its decisions depend on, which a CompiledOptimalStrategy must share
+    with the strategy its policy was compiled with.
+    """
+    return repr(
+        (
+            [(str(probability), outcome) for probability, outcome in strategy.risk_pmf],
+            strategy.epsilon,
+            strategy.max_conflict_depth,
+            strategy.parameters,
+        )
+    )
+
+
+def get_policy_hash(
+    catalogue: ProjectCatalogue, funds_per_year: list[Year], strategy: OptimalStrategy
+) -> str:
+    """
+    :return: A hash of everything the decisions depend on, which invalidates a stored policy if any of it changes.
+    """
+    policy_hash = hashlib.sha256()
+
+    for part in (
+        POLICY_VERSION,
+        catalogue.get_hash(),
+        [year.allocated_funds for year in funds_per_year],
+        get_strategy_settings(strategy),
+    ):
+        policy_hash.update(repr(part).encode())
+
+    return policy_hash.hexdigest()
+
+
+def compile_policy(
+    catalogue: ProjectCatalogue,
+    funds_per_year: list[Year],
+    strategy: OptimalStrategy,
+    max_states: int = MAX_POLICY_STATES,
+) -> PolicyTable:
+    """
+    Explores the states the optimal manager can reach breadth-first, and evaluates the strategy once for every
+    state and candidate template. A state is left by accepting a template, or, once a template is rejected, by
+    finishing the year with every possible total risk cost. The projects follow the parameters of the strategy.
+    :param max_states: The limit of explored states, the table is incomplete if more states are reachable.
+    """
+    if strategy.time_budget is not None:
+        raise ValueError(
+            "A policy can not be compiled for a strategy with a time budget"
+        )
+    parameters = strategy.parameters
+    if catalogue.project_length != parameters.project_length:
+        raise ValueError(
+            f"The templates have {catalogue.project_length} sub-projects, but the project length is "
+            f"{parameters.project_length}, see ProjectCatalogue.with_project_length"
+        )
+
+    years = len(funds_per_year)
+    decisions: dict[DecisionKey, bool] = {}
+    start: PolicyState = (1, tuple(year.allocated_funds for year in funds_per_year), ())
+    seen = {start}
+    queue = deque([start])
+
+    while queue and len(seen) <= max_states:
+        current_year, funds, portfolio = queue.popleft()
+        projects = [
+            catalogue.create_project(template_id, created_at)
+            for template_id, created_at in portfolio
+        ]
+        available_funds = [Year(allocated_funds) for allocated_funds in funds]
+        portfolio_index = PortfolioIndex.from_projects(projects, years, parameters)
+        next_states: list[PolicyState] = []
+        rejected = False
+
+        for template_id in catalogue.template_ids:
+            new_project = catalogue.create_project(template_id, current_year)
+            key = get_decision_key(
+                available_funds[current_year - 1 :], projects, current_year, new_project
+            )
+
+            decision = decisions.get(key)
+            if decision is None:
+                decision = strategy.should_accept_project(
+                    available_funds[current_year - 1 :],
+                    projects,
+                    current_year,
+                    new_project,
+                    portfolio_index,
+                )
+                decisions[key] = decision
+
+            if decision:
+                next_states.append(
+                    get_accepted_state(
+                        current_year, funds, portfolio, template_id, parameters
+                    )
+                )
+            else:
+                rejected = True
+
+        if rejected:
+            next_states.extend(
+                get_next_year_states(catalogue, strategy, current_year, funds, projects)
+            )
+
+        for state in next_states:
+            if state not in seen:
+                seen.add(state)
+                queue.append(state)
+
+    return PolicyTable(
+        get_policy_hash(catalogue, funds_per_year, strategy),
+        get_strategy_settings(strategy),
+        decisions,
+        len(seen),
+        len(queue) == 0,
+    )
+
+
+def get_accepted_state(
+    current_year: int,
+    funds: tuple[int, ...],
+    portfolio: tuple[tuple[int, int], ...],
+    template_id: int,
+    parameters: ModelParameters,
+) -> PolicyState:
+    project_start = current_year - 1  # zero indexed
+    project_end = min(project_start + parameters.project_length, len(funds))
+
+    new_funds = list(funds)
+    for j in range(project_start, project_end):
+        new_funds[j] -= parameters.sub_project_cost
+
+    return (
+        current_year,
+        tuple(new_funds),
+        portfolio + ((template_id, current_year),),
+    )
+
+
+def get_next_year_states(
+    catalogue: ProjectCatalogue,
+    strategy: OptimalStrategy,
+    current_year: int,
+    funds: tuple[int, ...],
+    projects: list[Project],
+) -> list[PolicyState]:
+    """
+    Finishes the year like ProjectManager.run for every total risk cost the projects can have.
+    Totals without a deficit lead to the same state, since the cash is not part of a state.
+    :return: The states at the start of the next year, empty if it was the last year.
+    """
+    if current_year >= len(funds):
+        return []
+
+    risk_count = sum(
+        1
+        for project in projects
+        if project.get_current_sub_project(current_year).has_risk
+    )
+    project_length = strategy.parameters.project_length
+    states = []
+
+    for _, risk_cost in get_risk_distribution(risk_count, strategy.risk_pmf):
+        manager = ProjectManager(list(projects), [], [], strategy)
+        available_funds = [Year(allocated_funds) for allocated_funds in funds]
+        possible_deficit = available_funds[current_year - 1].allocated_funds - risk_cost
+
+        if possible_deficit < 0:
+            manager.reacquire_deficit_value(
+                possible_deficit, current_year, available_funds, strategy.parameters
+            )
+
+        # Finished projects are dropped, they no longer affect the decisions.
+        states.append(
+            (
+                current_year + 1,
+                tuple(year.allocated_funds for year in available_funds),
+                tuple(
+                    (project.template_id, project.created_at)
+                    for project in manager.current_projects
+                    if (current_year - project.created_at) < project_length - 1
+                ),
+            )
+        )
+
+    return states
+
+
+def save_policy(policy: PolicyTable, path: Path):
+    """
+    Writes the policy to a temporary file, which replaces the stored policy at once,
+    so an interrupted write leaves no truncated policy behind.
+    """
+    temporary_path = path.with_name(path.name + ".tmp")
+    with open(temporary_path, "wb") as file:
+        pickle.dump(policy, file, protocol=pickle.HIGHEST_PROTOCOL)
+        file.flush()
+        os.fsync(file.fileno())
+
+    os.replace(temporary_path, path)
+
+
+def load_policy(path: Path, policy_hash: str) -> PolicyTable | None:
+    """
+    :return: The stored policy, or None if there is none, it can not be read or it was compiled for other inputs.
+    """
+    if not path.exists():
+        return None
+
+    try:
+        with open(path, "rb") as file:
+            policy = pickle.load(file)
+    except (pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        # An unreadable file, e.g. written by another version, is compiled again like an outdated policy.
+        return None
+
+    if not isinstance(policy, PolicyTable) or policy.policy_hash != policy_hash:
+        return None
+
+    return policy
+
+
+def load_or_compile_policy(
+    path: Path,
+    catalogue: ProjectCatalogue,
+    funds_per_year: list[Year],
+    strategy: OptimalStrategy,
+    max_states: int = MAX_POLICY_STATES,
+) -> PolicyTable:
+    """
+    Loads the policy stored at the path, or compiles and stores it if it is missing or outdated.
+    """
+    policy = load_policy(path, get_policy_hash(catalogue, funds_per_year, strategy))
+
+    if policy is None:
+        policy = compile_policy(catalogue, funds_per_year, strategy, max_states)
+        save_policy(policy, path)
+
+    return policy
+
+
+class CompiledOptimalStrategy(OptimalStrategy):
+    """
+    An OptimalStrategy, which looks its decisions up in a compiled PolicyTable.
+    Decisions missing from the table, e.g. for an incomplete table, are evaluated by the OptimalStrategy.
+    The risk PMF, epsilon, conflict depth and parameters must be the ones the policy was compiled with.
+    """
+
+    policy: PolicyTable
+    hits: int
+    misses: int
+
+    def __init__(self, policy: PolicyTable, **kwargs):
+        super().__init__(**kwargs)
+
+        if get_strategy_settings(self) != policy.strategy_settings:
+            raise ValueError(
+                f"The policy was compiled with the settings {policy.strategy_settings}, "
+                f"but the strategy has the settings {get_strategy_settings(self)}"
+            )
+
+        self.policy = policy
+        self.hits = 0
+        self.misses = 0
+
+    @override
+    def should_accept_project(
+        self,
+        available_funds: list[Year],
+        current_projects: list[Project],
+        current_year: int,
+        new_project: Project,
+        portfolio_index: PortfolioIndex | None = None,
+    ) -> bool:
+        decision = self.policy.decisions.get(
+            get_decision_key(
+                available_funds, current_projects, current_year, new_project
+            )
+        )
+
+        if decision is not None:
+            self.hits += 1
+            return decision
+
+        self.misses += 1
+        return super().should_accept_project(
+            available_funds,
+            current_projects,
+            current_year,
+            new_project,
+            portfolio_index,
+        )
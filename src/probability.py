@@ -1,81 +1,98 @@
+import time
 from dataclasses import dataclass
+from fractions import Fraction
+from functools import cache
 from typing import List, Tuple
 
+from src.parameters import DEFAULT_PARAMETERS, ModelParameters
 from src.project import Project
-from src.utils.project_utils import calculate_delta_investment, find_optimal_closures
-
-#   RISK_{x} defines the probability of getting a certain outcome with x-amount of risk elements
-#   where the data is stored as a tuple with the data: (probability, outcome)
-
-
-RISK_1: List[Tuple[float, int]] = [(0.33, 0), (0.33, 3), (0.33, 6)]
-
-RISK_2: List[Tuple[float, int]] = [
-    (0.1089, 0),
-    (0.2178, 3),
-    (0.333, 6),
-    (0.2178, 9),
-    (0.1089, 12),
-]
-
-RISK_3: List[Tuple[float, int]] = [
-    (0.037, 0),
-    (0.111, 3),
-    (0.222, 6),
-    (0.260, 9),
-    (0.222, 12),
-    (0.111, 15),
-    (0.037, 18),
-]
-
-RISK_4: List[Tuple[float, int]] = [
-    (0.012, 0),
-    (0.049, 3),
-    (0.124, 6),
-    (0.197, 9),
-    (0.235, 12),
-    (0.197, 15),
-    (0.124, 18),
-    (0.049, 21),
-    (0.012, 24),
-]
-
-RISK_5: List[Tuple[float, int]] = [
-    (0.00411522633744856, 0),
-    (0.020576131687242802, 3),
-    (0.0617283950617284, 6),
-    (0.1234567901234568, 9),
-    (0.1851851851851852, 12),
-    (0.20987654320987656, 15),
-    (0.1851851851851852, 18),
-    (0.1234567901234568, 21),
-    (0.0617283950617284, 24),
-    (0.020576131687242802, 27),
-    (0.00411522633744856, 30),
-]
-
-
-def get_risk_distribution(risk_elements: int) -> List[Tuple[float, int]]:
-    match risk_elements:
-        case 1:
-            return RISK_1
-        case 2:
-            return RISK_2
-        case 3:
-            return RISK_3
-        case 4:
-            return RISK_4
-        case 5:
-            return RISK_5
-
-    # This currently limits the yearly funds that can be given, as more funds could result in 6 risk_elements,
-    # which can be handled if another case for 6 risk_elements is added and so on.
-    # In the current simulation 6 is not possible.
-    raise ValueError(
-        f"Risk elements can only be between 1 to 5, given risk elements: {risk_elements}"
+from src.risk import NORMAL_RISK_PMF, RiskPmf
+from src.utils.cache import LRUCache
+from src.utils.project_utils import (
+    calculate_delta_investment,
+    find_optimal_closures,
+    project_is_active,
+)
+
+
+def get_risk_distribution(
+    risk_elements: int, risk_pmf: RiskPmf = NORMAL_RISK_PMF
+) -> List[Tuple[float, int]]:
+    """
+    The probability of every total outcome of the given number of independent risk elements.
+    :param risk_elements: The number of risk elements.
+    :param risk_pmf: The PMF of a single risk element, see get_risk_pmf.
+    :return: The (probability, outcome) of every total outcome, sorted on the outcome.
+    """
+    if risk_elements < 0:
+        raise ValueError(
+            f"Risk elements can not be negative, given risk elements: {risk_elements}"
+        )
+
+    return get_float_risk_distribution(risk_pmf, risk_elements)
+
+
+@cache
+def get_float_risk_distribution(
+    risk_pmf: RiskPmf, risk_elements: int
+) -> List[Tuple[float, int]]:
+    return [
+        (float(probability), outcome)
+        for probability, outcome in convolve_risk_pmf(risk_pmf, risk_elements)
+    ]
+
+
+@cache
+def convolve_risk_pmf(risk_pmf: RiskPmf, risk_elements: int) -> RiskPmf:
+    """
+    The exact n-fold convolution of the PMF, which is built from the cached (n - 1)-fold convolution.
+    """
+    if risk_elements == 0:
+        return ((Fraction(1), 0),)
+
+    distribution: dict[int, Fraction] = {}
+
+    for probability, outcome in convolve_risk_pmf(risk_pmf, risk_elements - 1):
+        for element_probability, element_outcome in risk_pmf:
+            total = outcome + element_outcome
+            distribution[total] = (
+                distribution.get(total, Fraction(0)) + probability * element_probability
+            )
+
+    return tuple(
+        (probability, outcome) for outcome, probability in sorted(distribution.items())
     )
 
 
+#   The key of a cached loss is (conflict year, deficit, project set signature), where the signature
+#   is the sorted (created_at, salvageable cost) of every project.
+LossKey = Tuple[int, int, Tuple[Tuple[int, int], ...]]
+
+
+def get_loss_key(
+    projects: List[Project],
+    conflict_year: int,
+    deficit: int,
+    parameters: ModelParameters = DEFAULT_PARAMETERS,
+) -> LossKey:
+    """
+    The loss only depends on when each project was created and what it can salvage in the conflict year,
+    so portfolios with the same signature have the same loss regardless of the order of the projects.
+    """
+    signature = []
+
+    for project in projects:
+        salvageable_cost = 0
+        if project_is_active(project, conflict_year, parameters):
+            salvageable_cost = project.get_current_sub_project(
+                conflict_year
+            ).salvageable_cost
+
+        signature.append((project.created_at, salvageable_cost))
+
+    return conflict_year, deficit, tuple(sorted(signature))
+
+
 @dataclass
 class ProjectConflict:
     deficit: int
@@ -87,17 +104,44 @@ class ProjectConflict:
         self.adjusted_probability = adjusted_probability
         self.conflict_year = conflict_year
 
-    def calculate_expected_loss(self, projects: List[Project]) -> float:
-        value = calculate_delta_investment(projects, 1, self.conflict_year)
-        temp_projects = list(projects)
-        closures = find_optimal_closures(self.deficit, projects, self.conflict_year)
+    def calculate_expected_loss(
+        self,
+        projects: List[Project],
+        loss_cache: LRUCache[LossKey, int] | None = None,
+        parameters: ModelParameters = DEFAULT_PARAMETERS,
+    ) -> float:
+        """
+        :param projects: The projects of the portfolio, from which the closures are made.
+        :param loss_cache: An optional cache of the losses, which is shared between conflicts.
+        :param parameters: The parameters of the model, the cached losses must be made with the same parameters.
+        :return: The loss of closing projects to cover the deficit, weighted by the probability of the conflict.
+        """
+        if loss_cache is None:
+            return (
+                float(self.calculate_loss(projects, parameters))
+                * self.adjusted_probability
+            )
+
+        key = get_loss_key(projects, self.conflict_year, self.deficit, parameters)
+        loss = loss_cache.get(key)
+
+        if loss is None:
+            loss = self.calculate_loss(projects, parameters)
+            loss_cache.put(key, loss)
 
-        for closure in closures:
-            temp_projects.remove(closure)
+        return float(loss) * self.adjusted_probability
 
-        loss = value - calculate_delta_investment(temp_projects, 1, self.conflict_year)
+    def calculate_loss(
+        self,
+        projects: List[Project],
+        parameters: ModelParameters = DEFAULT_PARAMETERS,
+    ) -> int:
+        closures = find_optimal_closures(
+            self.deficit, projects, self.conflict_year, parameters
+        )
 
-        return float(loss) * self.adjusted_probability
+        # The investment is additive over the projects, so the loss is the investment in the closed projects.
+        return calculate_delta_investment(closures, 1, self.conflict_year, parameters)
 
 
 @dataclass
@@ -105,10 +149,40 @@ class TreeTraversalResult:
     existing_return: float
     expected_return: float
     expected_loss: float
+    pruned_probability: float  # the probability of the pruned branches
+    error_bound: float  # the largest amount the expected loss can be off by, due to the pruned branches
 
     def __init__(
-        self, existing_return: int, expected_return: float, expected_loss: float
+        self,
+        existing_return: int,
+        expected_return: float,
+        expected_loss: float,
+        pruned_probability: float = 0.0,
+        error_bound: float = 0.0,
     ):
         self.existing_return = existing_return
         self.expected_return = expected_return
         self.expected_loss = expected_loss
+        self.pruned_probability = pruned_probability
+        self.error_bound = error_bound
+
+
+@dataclass
+class TraversalLimits:
+    """
+    The limits of a traversal of the probability tree, the defaults evaluate the whole tree.
+    """
+
+    epsilon: float = 0.0  # branches with a lower probability are pruned
+    max_depth: int | None = (
+        None  # the largest number of conflict years that are traversed
+    )
+    deadline: float | None = (
+        None  # the time.perf_counter() after which the remaining branches are pruned
+    )
+
+    def is_expired(self) -> bool:
+        return self.deadline is not None and time.perf_counter() > self.deadline
+
+    def is_too_deep(self, depth: int) -> bool:
+        return self.max_depth is not None and depth >= self.max_depth
@@ -1,19 +1,15 @@
 from dataclasses import dataclass
 
-from src.utils.constants import SUB_PROJECT_VALUE
+from src.parameters import DEFAULT_PARAMETERS, ModelParameters
 
 
-@dataclass
+# Sub-projects are immutable, so the sub-projects of a template can be shared by every project created from it.
+@dataclass(frozen=True, slots=True)
 class SubProject:
     has_risk: bool
     sunk_cost: int
     salvageable_cost: int
 
-    def __init__(self, has_risk: bool, sunk_cost: int, salvageable_cost: int):
-        self.has_risk = has_risk
-        self.sunk_cost = sunk_cost
-        self.salvageable_cost = salvageable_cost
-
 
 @dataclass
 class Project:
@@ -22,10 +18,12 @@ class Project:
         SubProject
     ]  # Should always have 6, but python does not have arrays
 
-    def get_current_value(self, current_year: int) -> int:
+    def get_current_value(
+        self, current_year: int, parameters: ModelParameters = DEFAULT_PARAMETERS
+    ) -> int:
         assert current_year >= self.created_at
 
-        return (current_year - (self.created_at - 1)) * SUB_PROJECT_VALUE
+        return (current_year - (self.created_at - 1)) * parameters.sub_project_value
 
     def get_current_sub_project(self, current_year: int) -> SubProject:
         return self.sub_projects[current_year - self.created_at]
@@ -1,14 +1,15 @@
-import random
-from copy import deepcopy
 from dataclasses import dataclass
 
+from src.catalogue import ProjectCatalogue
 from src.data import Portfolio
+from src.parameters import DEFAULT_PARAMETERS, ModelParameters
 from src.project import Project
+from src.random_stream import DrawStream
 from src.strategy import ProjectStrategy
 from src.strategy import get_risk_cost
-from src.utils.constants import SUB_PROJECT_VALUE, SUB_PROJECT_COST, PROJECT_LENGTH
+from src.utils.portfolio_index import PortfolioIndex
 from src.utils.project_utils import find_optimal_closures
-from src.year import Year
+from src.year import Year, copy_funds
 
 
 @dataclass
@@ -17,13 +18,19 @@ class ProjectManager:
     completed_projects: list[Project]
     discarded_projects: list[Project]
     strategy: ProjectStrategy
+    # The per-year counts of current_projects, which is kept up to date while the manager runs.
+    portfolio_index: PortfolioIndex | None = None
 
     def reset_manager(self):
         self.current_projects.clear()
         self.completed_projects.clear()
         self.discarded_projects.clear()
+        self.portfolio_index = None
+        self.strategy.reset()
 
-    def calculate_current_value(self, current_year) -> int:
+    def calculate_current_value(
+        self, current_year, parameters: ModelParameters = DEFAULT_PARAMETERS
+    ) -> int:
         valuation = 0
 
         for project in self.current_projects:
@@ -32,27 +39,36 @@ class ProjectManager:
                 finished_work_years > 0
             )  # This function should only be run after each year is finished, but before the next is started
 
-            valuation += finished_work_years * SUB_PROJECT_VALUE
+            valuation += finished_work_years * parameters.sub_project_value
 
-        valuation += len(self.completed_projects) * (SUB_PROJECT_VALUE * PROJECT_LENGTH)
+        valuation += len(self.completed_projects) * (
+            parameters.sub_project_value * parameters.project_length
+        )
         return valuation
 
     def reacquire_deficit_value(
-        self, deficit: int, current_year: int, available_funds: list[Year]
+        self,
+        deficit: int,
+        current_year: int,
+        available_funds: list[Year],
+        parameters: ModelParameters = DEFAULT_PARAMETERS,
     ) -> int:
         """
         :param available_funds: the fund list, which is used to reacquire funds for future years.
         :param deficit: The deficit to afford the current projects.
         :param current_year: The current year for the project manager.
+        :param parameters: The parameters of the model, which give the length and cost of the projects.
         :return: Returns the excess cash, which should be added to the cash of the portfolio.
         """
 
         optimal_closures = find_optimal_closures(
-            deficit, self.current_projects, current_year
+            deficit, self.current_projects, current_year, parameters
         )
 
         if len(optimal_closures) == 0:
-            close_projects(self, self.current_projects, current_year, available_funds)
+            close_projects(
+                self, self.current_projects, current_year, available_funds, parameters
+            )
             assert len(self.current_projects) == 0
             return 0
 
@@ -71,6 +87,7 @@ class ProjectManager:
             optimal_closures,
             current_year,
             available_funds,
+            parameters,
         )
 
         return remaining_funds
@@ -78,27 +95,38 @@ class ProjectManager:
     def run(
         self,
         funds_per_year: list[Year],
-        new_projects: list[Project],
+        new_projects: ProjectCatalogue,
+        stream: DrawStream,
+        parameters: ModelParameters = DEFAULT_PARAMETERS,
     ) -> Portfolio:
         """
         Runs the simulation on a single manager for 1 iteration, also said as one round.
+        :param new_projects: The catalogue of project templates, which new projects are drawn from.
+        :param stream: The random stream all project and risk draws of the iteration are taken from.
+        :param parameters: The parameters of the model, which must match the parameters of the strategy.
         """
 
-        available_funds: list[Year] = deepcopy(funds_per_year)
+        available_funds: list[Year] = copy_funds(funds_per_year)
         years = len(available_funds)
+        if self.strategy.uses_portfolio_index:
+            self.portfolio_index = PortfolioIndex.from_projects(
+                self.current_projects, years, parameters
+            )
 
         portfolio = Portfolio([0] * years, [0] * years)
         for i in range(years):
             current_year = i + 1
 
             # Step 1: Given the available funds, run strategy and accept projects until returns false
-            run_strategy(self, new_projects, i + 1, available_funds)
+            run_strategy(self, new_projects, i + 1, available_funds, stream, parameters)
             # Step 2: Run the risk calculations for the current year
             risk_cost = 0
             for project in self.current_projects:
                 current_sub_project = project.get_current_sub_project(current_year)
                 if current_sub_project.has_risk:
-                    risk_cost += get_risk_cost()
+                    risk_cost += get_risk_cost(
+                        stream, current_year, parameters.risk_values
+                    )
 
             # Step 3: Calculate if there is a deficit and reacquire value if there is.
             possible_deficit = available_funds[i].allocated_funds - risk_cost
@@ -106,7 +134,7 @@ class ProjectManager:
 
             if possible_deficit < 0:
                 deficit_return = self.reacquire_deficit_value(
-                    possible_deficit, current_year, available_funds
+                    possible_deficit, current_year, available_funds, parameters
                 )
 
                 if deficit_return > 0:
@@ -117,50 +145,89 @@ class ProjectManager:
             # Step 4: Remove any finished projects in current_projects
             projects_to_finish: list[Project] = []
             for project in self.current_projects:
-                if (current_year - project.created_at) >= 5:
+                if (current_year - project.created_at) >= parameters.project_length - 1:
                     projects_to_finish.append(project)
 
             for project in projects_to_finish:
                 self.completed_projects.append(
                     self.current_projects.pop(self.current_projects.index(project))
                 )
+                if self.portfolio_index is not None:
+                    self.portfolio_index.remove(project)
 
             # Step 5: accumulate cash in portfolio, and calculate value for current year in portfolio.
             for year_count in range(i, years):
                 portfolio.cash[year_count] += current_year_cash
 
-            portfolio.value[i] = self.calculate_current_value(current_year)
+            portfolio.value[i] = self.calculate_current_value(current_year, parameters)
 
         return portfolio
 
 
 def run_strategy(
     project_manager: ProjectManager,
-    new_projects: list[Project],
+    new_projects: ProjectCatalogue,
     current_year: int,
     available_funds: list[Year],
+    stream: DrawStream,
+    parameters: ModelParameters = DEFAULT_PARAMETERS,
 ):
+    accepted_count = project_manager.strategy.max_acceptable(
+        available_funds[current_year - 1 :]
+    )
+
+    if accepted_count is not None:
+        # The strategy knows how many projects it accepts, only the templates are drawn. The rejected
+        # project is still drawn, so the stream is the same as when asking the strategy for every project.
+        for _ in range(accepted_count):
+            template_id = stream.draw_project(new_projects.template_ids, current_year)
+            accept_project(
+                project_manager,
+                new_projects.create_project(template_id, current_year),
+                current_year,
+                available_funds,
+                parameters,
+            )
+
+        stream.draw_project(new_projects.template_ids, current_year)
+        return
+
     while True:
-        new_project = deepcopy(random.choice(new_projects))
-        new_project.created_at = current_year
+        template_id = stream.draw_project(new_projects.template_ids, current_year)
+        new_project = new_projects.create_project(template_id, current_year)
 
         should_accept = project_manager.strategy.should_accept_project(
             available_funds[current_year - 1 :],
             project_manager.current_projects,
             current_year,
             new_project,
+            project_manager.portfolio_index,
         )
         if not should_accept:
             break
 
-        project_manager.current_projects.append(new_project)
-        project_start = current_year - 1  # zero indexed
-        project_end = project_start + PROJECT_LENGTH
-        if project_end > len(available_funds):
-            project_end = len(available_funds)
+        accept_project(
+            project_manager, new_project, current_year, available_funds, parameters
+        )
+
+
+def accept_project(
+    project_manager: ProjectManager,
+    new_project: Project,
+    current_year: int,
+    available_funds: list[Year],
+    parameters: ModelParameters = DEFAULT_PARAMETERS,
+):
+    project_manager.current_projects.append(new_project)
+    if project_manager.portfolio_index is not None:
+        project_manager.portfolio_index.add(new_project)
+    project_start = current_year - 1  # zero indexed
+    project_end = project_start + parameters.project_length
+    if project_end > len(available_funds):
+        project_end = len(available_funds)
 
-        for j in range(project_start, project_end):
-            available_funds[j].allocated_funds -= SUB_PROJECT_COST
+    for j in range(project_start, project_end):
+        available_funds[j].allocated_funds -= parameters.sub_project_cost
 
 
 def close_projects(
@@ -168,18 +235,22 @@ def close_projects(
     projects_to_close: list[Project],
     current_year: int,
     available_funds: list[Year],
+    parameters: ModelParameters = DEFAULT_PARAMETERS,
 ):
+    sub_project_cost = parameters.sub_project_cost
     updated_current_projects = []
     for project in project_manager.current_projects:
         if project in projects_to_close:
             # This project is being discarded. Add its funds back.
             project_manager.discarded_projects.append(project)
+            if project_manager.portfolio_index is not None:
+                project_manager.portfolio_index.remove(project)
             sub_project_index = current_year - project.created_at
-            if sub_project_index <= 5:
-                for i in range(sub_project_index, PROJECT_LENGTH):
+            if sub_project_index < parameters.project_length:
+                for i in range(sub_project_index, parameters.project_length):
                     index = (project.created_at - 1) + i
                     if index < len(available_funds):
-                        available_funds[index].allocated_funds += SUB_PROJECT_COST
+                        available_funds[index].allocated_funds += sub_project_cost
         else:
             # This project is being kept.
             updated_current_projects.append(project)
@@ -0,0 +1,159 @@
+from abc import ABC, abstractmethod
+from typing import Sequence, TypeVar, override
+
+import numpy as np
+
+T = TypeVar("T")
+
+# The amount of uniform numbers drawn from the generator at a time.
+BUFFER_SIZE = 64
+
+
+def create_seed() -> int:
+    """
+    Creates a new random root seed, which can be recorded to reproduce a simulation.
+    """
+    return int(np.random.SeedSequence().entropy)
+
+
+class DrawStream(ABC):
+    """
+    The source of the project and risk draws of a manager in a single iteration.
+    """
+
+    @abstractmethod
+    def draw_project(self, projects: Sequence[T], current_year: int) -> T:
+        """
+        Draws a new project template for the given year.
+        """
+        raise NotImplementedError("Subclasses must implement this method")
+
+    @abstractmethod
+    def draw_risk_cost(self, risk_values: Sequence[int], current_year: int) -> int:
+        """
+        Draws the risk cost of a sub-project with risk in the given year.
+        """
+        raise NotImplementedError("Subclasses must implement this method")
+
+
+class RandomStream(DrawStream):
+    """
+    An independent, counter-based stream of random draws for a single manager in a single iteration.
+    The stream only depends on the seed, the iteration and the stream number, so any iteration can be
+    recomputed on its own, regardless of which process or in which order the iterations are run.
+    """
+
+    generator: np.random.Generator
+
+    def __init__(self, seed: int, iteration: int, stream: int):
+        self.generator = np.random.Generator(
+            np.random.Philox(
+                np.random.SeedSequence(seed, spawn_key=(iteration, stream))
+            )
+        )
+        self.buffer: list[float] = []
+
+    def random(self) -> float:
+        """
+        :return: A uniform number in the interval [0, 1).
+        """
+        if len(self.buffer) == 0:
+            # Reversed so the numbers are popped in the order they were generated.
+            self.buffer = self.generator.random(BUFFER_SIZE).tolist()[::-1]
+
+        return self.buffer.pop()
+
+    def choice(self, options: Sequence[T]) -> T:
+        """
+        Picks a uniformly random element from a non-empty sequence, like random.choice.
+        """
+        return options[int(self.random() * len(options))]
+
+    @override
+    def draw_project(self, projects: Sequence[T], current_year: int) -> T:
+        return self.choice(projects)
+
+    @override
+    def draw_risk_cost(self, risk_values: Sequence[int], current_year: int) -> int:
+        return self.choice(risk_values)
+
+
+# The stream number used for the scenario tapes, which is separate from the stream numbers of the managers.
+SCENARIO_STREAM = 2**32 - 1
+
+# The kinds of draws on a scenario tape.
+PROJECT_DRAWS = 0
+RISK_DRAWS = 1
+
+
+class ScenarioTape:
+    """
+    The pre-generated scenario of a single iteration, which every manager consumes in the same order.
+    For each year the tape holds a sequence of project draws and a sequence of risk draws, each from
+    its own counter-based generator, so the tape only depends on the seed and the iteration. The
+    sequences are extended on demand, when a manager draws more than has been generated.
+    """
+
+    def __init__(self, seed: int, iteration: int):
+        self.seed = seed
+        self.iteration = iteration
+        self.generators: dict[tuple[int, int], np.random.Generator] = {}
+        self.draws: dict[tuple[int, int], list[float]] = {}
+
+    def get_draw(self, kind: int, year: int, index: int) -> float:
+        """
+        :return: The uniform number at the index of the sequence of the given kind and year.
+        """
+        key = (kind, year)
+        draws = self.draws.get(key)
+
+        if draws is None:
+            self.generators[key] = np.random.Generator(
+                np.random.Philox(
+                    np.random.SeedSequence(
+                        self.seed,
+                        spawn_key=(self.iteration, SCENARIO_STREAM, year, kind),
+                    )
+                )
+            )
+            draws = self.draws[key] = []
+
+        while index >= len(draws):
+            draws.extend(self.generators[key].random(BUFFER_SIZE).tolist())
+
+        return draws[index]
+
+    def reader(self) -> "ScenarioStream":
+        """
+        :return: A new stream reading the tape from the start, one for each manager.
+        """
+        return ScenarioStream(self)
+
+
+class ScenarioStream(DrawStream):
+    """
+    A draw stream reading from a shared scenario tape. The n'th project draw and the n'th risk draw
+    of a year are the same for every manager reading the tape.
+    """
+
+    def __init__(self, tape: ScenarioTape):
+        self.tape = tape
+        self.positions: dict[tuple[int, int], int] = {}
+
+    def next_draw(self, kind: int, year: int) -> float:
+        position = self.positions.get((kind, year), 0)
+        self.positions[(kind, year)] = position + 1
+
+        return self.tape.get_draw(kind, year, position)
+
+    @override
+    def draw_project(self, projects: Sequence[T], current_year: int) -> T:
+        return projects[
+            int(self.next_draw(PROJECT_DRAWS, current_year) * len(projects))
+        ]
+
+    @override
+    def draw_risk_cost(self, risk_values: Sequence[int], current_year: int) -> int:
+        return risk_values[
+            int(self.next_draw(RISK_DRAWS, current_year) * len(risk_values))
+        ]
@@ -0,0 +1,108 @@
+import hashlib
+import os
+from pathlib import Path
+
+import numpy as np
+
+from src.data import ManagerResult, SimulationResult
+from src.parameters import ModelParameters
+
+# The version of the simulation engine, which is changed whenever the iterations of a seed change,
+# so results cached by an older engine are not reused.
+ENGINE_VERSION = 1
+
+
+def get_result_key(
+    seed: int,
+    funding_profile: list[int],
+    catalogue_hash: str,
+    strategies: dict[str, str],
+    common_random_numbers: bool,
+    parameters: ModelParameters,
+) -> str:
+    """
+    :param strategies: The settings of the strategy of each manager, see ProjectStrategy.get_settings.
+    :return: A hash of everything the iterations depend on, which names the cached results.
+    """
+    result_key = hashlib.sha256()
+
+    for part in (
+        ENGINE_VERSION,
+        seed,
+        funding_profile,
+        catalogue_hash,
+        list(strategies.items()),
+        common_random_numbers,
+        parameters,
+    ):
+        result_key.update(repr(part).encode())
+
+    return result_key.hexdigest()
+
+
+def get_result_path(directory: Path, result_key: str) -> Path:
+    return Path(directory, result_key + ".npz")
+
+
+def get_cached_iterations(directory: Path, result_key: str) -> int:
+    """
+    :return: The amount of iterations cached under the key, 0 if there are none.
+    """
+    path = get_result_path(directory, result_key)
+    if not path.exists():
+        return 0
+
+    with np.load(path) as cached_results:
+        return int(cached_results["iterations"])
+
+
+def load_cached_results(
+    directory: Path, result_key: str, managers: list[str], iterations: int
+) -> SimulationResult | None:
+    """
+    :return: The first iterations cached under the key, at most the given amount, or None if there are none.
+    """
+    path = get_result_path(directory, result_key)
+    if not path.exists():
+        return None
+
+    with np.load(path) as cached_results:
+        return SimulationResult(
+            {
+                name: ManagerResult.from_arrays(
+                    cached_results[f"{name}-value"][:iterations],
+                    cached_results[f"{name}-cash"][:iterations],
+                )
+                for name in managers
+            }
+        )
+
+
+def store_results(
+    directory: Path, result_key: str, simulation_result: SimulationResult
+):
+    """
+    Stores the results under the key, unless at least as many iterations are cached already.
+    The results replace the cached results at once, so an interrupted write leaves them intact.
+    """
+    managers = list(simulation_result.managers.values())
+    iterations = managers[0].count if len(managers) > 0 else 0
+    if iterations <= get_cached_iterations(directory, result_key):
+        return
+
+    arrays = {}
+    for name, manager_result in simulation_result.managers.items():
+        arrays[f"{name}-value"] = manager_result.value
+        arrays[f"{name}-cash"] = manager_result.cash
+
+    directory.mkdir(parents=True, exist_ok=True)
+    path = get_result_path(directory, result_key)
+    temporary_path = path.with_name(path.name + ".tmp")
+
+    # Written through a file object, as NumPy would otherwise append .npz to the temporary path.
+    with open(temporary_path, "wb") as file:
+        np.savez(file, iterations=iterations, **arrays)
+        file.flush()
+        os.fsync(file.fileno())
+
+    os.replace(temporary_path, path)
@@ -1,2 +1,47 @@
+from fractions import Fraction
+from typing import Sequence, Tuple
+
 NORMAL_RISK_VALUES = [0, 3, 6]
 VOLATILE_RISK_VALUES = [0, 4, 8]
+
+#   A risk PMF defines the probability of every outcome of a single risk element,
+#   where the data is stored as a tuple of (probability, outcome) sorted on the outcome.
+RiskPmf = Tuple[Tuple[Fraction, int], ...]
+
+
+def get_risk_pmf(outcomes: Sequence[Tuple[float | Fraction, int]]) -> RiskPmf:
+    """
+    Normalises the (probability, outcome) pairs of a single risk element, so the probabilities sum to exactly 1.
+    Equal outcomes are merged and outcomes without probability are dropped.
+    """
+    total = sum((Fraction(probability) for probability, _ in outcomes), Fraction(0))
+
+    if total <= 0 or any(probability < 0 for probability, _ in outcomes):
+        raise ValueError(f"The risk outcomes do not form a distribution: {outcomes}")
+
+    pmf: dict[int, Fraction] = {}
+    for probability, outcome in outcomes:
+        if probability > 0:
+            pmf[outcome] = pmf.get(outcome, Fraction(0)) + Fraction(probability) / total
+
+    return tuple((probability, outcome) for outcome, probability in sorted(pmf.items()))
+
+
+def get_uniform_risk_pmf(risk_values: Sequence[int]) -> RiskPmf:
+    """
+    The PMF of a risk element, which is drawn uniformly from the risk values like get_risk_cost.
+    """
+    return get_risk_pmf([(Fraction(1), value) for value in risk_values])
+
+
+NORMAL_RISK_PMF = get_uniform_risk_pmf(NORMAL_RISK_VALUES)
+VOLATILE_RISK_PMF = get_uniform_risk_pmf(VOLATILE_RISK_VALUES)
+
+
+def get_maximum_risk_cost(
+    risk_elements: int, risk_pmf: RiskPmf = NORMAL_RISK_PMF
+) -> int:
+    """
+    The largest cost the given number of risk elements can have, funds below it can result in a deficit.
+    """
+    return risk_elements * max(outcome for _, outcome in risk_pmf)
@@ -0,0 +1,238 @@
+import hashlib
+import json
+import os
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+
+import numpy as np
+
+from src.data import ManagerResult, RunMetadata, SimulationResult, RESULT_TYPE
+from src.output import metadata_from_json, metadata_to_json
+from src.simulation import Simulation
+
+# The version of the shard files, which is changed when their format changes.
+SHARD_VERSION = 1
+
+# The name of the file of a shard, shards of the same run only differ in their index.
+SHARD_FILE_NAME = "shard-{index}-of-{count}.npz"
+
+
+@dataclass
+class Shard:
+    """
+    The iterations shard_index, shard_index + shard_count, ... of a seeded run, which is merged with
+    the other shards of the run by merge_shards.
+    """
+
+    shard_hash: str  # the hash of the run, equal for every shard of the same run
+    shard_index: int
+    shard_count: int
+    result_key: str  # the key of the run in a result cache, see get_result_key
+    metadata: RunMetadata  # the metadata of the whole run
+    result: SimulationResult
+
+
+def parse_shard(text: str) -> tuple[int, int]:
+    """
+    :param text: The shard as 'k/N', the k'th of N shards, counting from 0.
+    :return: The index and count of the shard.
+    """
+    index, separator, count = text.partition("/")
+    if separator != "/" or not index.isdigit() or not count.isdigit():
+        raise ValueError(f"A shard must be given as k/N, given: '{text}'")
+
+    shard_index, shard_count = int(index), int(count)
+    if not 0 <= shard_index < shard_count:
+        raise ValueError(
+            f"The shard index must be from 0 up to the shard count, given: '{text}'"
+        )
+
+    return shard_index, shard_count
+
+
+def get_shard_hash(result_key: str, iterations: int, shard_count: int) -> str:
+    """
+    :return: A hash of everything the iterations of the shards depend on, and how they are divided.
+    """
+    shard_hash = hashlib.sha256()
+
+    for part in (SHARD_VERSION, result_key, iterations, shard_count):
+        shard_hash.update(repr(part).encode())
+
+    return shard_hash.hexdigest()
+
+
+def get_shard_iterations(shard_index: int, shard_count: int, iterations: int) -> range:
+    return range(shard_index, iterations, shard_count)
+
+
+def run_shard(simulation: Simulation, shard_index: int, shard_count: int) -> Shard:
+    """
+    Runs the iterations i of the simulation where i % shard_count == shard_index, in the current process.
+    Every iteration is seeded on its own, so they are the same as in a single run of all iterations.
+    """
+    if simulation.random_seed:
+        raise ValueError("Only a seeded simulation can be run in shards")
+    if simulation.aggregate or simulation.precision is not None:
+        raise ValueError(
+            "Only a fixed amount of retained iterations can be run in shards"
+        )
+
+    iterations = get_shard_iterations(
+        shard_index, shard_count, simulation.iteration_limit
+    )
+    shard_result = simulation.create_simulation_result(len(iterations))
+    for iteration in iterations:
+        shard_result.add_iteration_result(simulation.run_iteration(iteration))
+
+    result_key = simulation.get_result_key()
+
+    return Shard(
+        get_shard_hash(result_key, simulation.iteration_limit, shard_count),
+        shard_index,
+        shard_count,
+        result_key,
+        simulation.get_metadata(),
+        shard_result,
+    )
+
+
+def save_shard(shard: Shard, directory: Path) -> Path:
+    """
+    Saves the shard to its own file in the directory, with its description as a JSON string, so the shards
+    of a run can be written to a shared directory by different machines. The file is replaced at once.
+    :return: The path of the file.
+    """
+    description = {
+        "shard_hash": shard.shard_hash,
+        "shard_index": shard.shard_index,
+        "shard_count": shard.shard_count,
+        "result_key": shard.result_key,
+        "metadata": metadata_to_json(shard.metadata),
+    }
+
+    arrays = {}
+    for name, manager_result in shard.result.managers.items():
+        arrays[f"{name}-value"] = manager_result.value
+        arrays[f"{name}-cash"] = manager_result.cash
+
+    directory.mkdir(parents=True, exist_ok=True)
+    path = Path(
+        directory,
+        SHARD_FILE_NAME.format(index=shard.shard_index, count=shard.shard_count),
+    )
+    temporary_path = path.with_name(path.name + ".tmp")
+
+    # Written through a file object, as NumPy would otherwise append .npz to the temporary path.
+    with open(temporary_path, "wb") as file:
+        np.savez_compressed(file, shard=json.dumps(description), **arrays)
+        file.flush()
+        os.fsync(file.fileno())
+
+    os.replace(temporary_path, path)
+
+    return path
+
+
+def load_shard(path: Path) -> Shard:
+    with np.load(path) as archive:
+        if "shard" not in archive:
+            raise ValueError(f"The file {path} is not a shard")
+
+        description = json.loads(str(archive["shard"]))
+        metadata = metadata_from_json(description["metadata"])
+        shard_result = SimulationResult(
+            {
+                name: ManagerResult.from_arrays(
+                    archive[f"{name}-value"], archive[f"{name}-cash"]
+                )
+                for name in metadata.managers
+            }
+        )
+
+    return Shard(
+        description["shard_hash"],
+        description["shard_index"],
+        description["shard_count"],
+        description["result_key"],
+        metadata,
+        shard_result,
+    )
+
+
+def load_shards(paths: list[Path]) -> list[Shard]:
+    """
+    :param paths: The shard files, or directories whose shard files are all loaded.
+    """
+    shard_paths = []
+    for path in paths:
+        if path.is_dir():
+            shard_paths.extend(
+                sorted(path.glob(SHARD_FILE_NAME.format(index="*", count="*")))
+            )
+        else:
+            shard_paths.append(path)
+
+    return [load_shard(path) for path in shard_paths]
+
+
+def merge_shards(shards: list[Shard]) -> tuple[SimulationResult, RunMetadata]:
+    """
+    Puts the iterations of all shards of a run back in their order.
+    Raises a ValueError if the shards are from different runs, or if a shard is missing, duplicated or incomplete.
+    :return: The results and metadata, as a single run of all iterations would give them.
+    """
+    if len(shards) == 0:
+        raise ValueError("There are no shards to merge")
+
+    first_shard = shards[0]
+    for shard in shards:
+        if shard.shard_hash != first_shard.shard_hash:
+            raise ValueError(
+                f"Shard {shard.shard_index}/{shard.shard_count} is from another run than "
+                f"shard {first_shard.shard_index}/{first_shard.shard_count}, their inputs differ"
+            )
+
+    shard_count = first_shard.shard_count
+    indices = Counter(shard.shard_index for shard in shards)
+    duplicates = sorted(index for index, count in indices.items() if count > 1)
+    if duplicates:
+        raise ValueError(f"The shards {duplicates} of {shard_count} are duplicated")
+    missing = sorted(set(range(shard_count)) - set(indices))
+    if missing:
+        raise ValueError(f"The shards {missing} of {shard_count} are missing")
+
+    metadata = first_shard.metadata
+    years = len(metadata.funding_profile)
+    managers = {
+        name: (
+            np.zeros((metadata.iterations, years), dtype=RESULT_TYPE),
+            np.zeros((metadata.iterations, years), dtype=RESULT_TYPE),
+        )
+        for name in metadata.managers
+    }
+
+    for shard in shards:
+        iterations = get_shard_iterations(
+            shard.shard_index, shard_count, metadata.iterations
+        )
+        for name, (value, cash) in managers.items():
+            manager_result = shard.result.managers[name]
+            if manager_result.count != len(iterations):
+                raise ValueError(
+                    f"Shard {shard.shard_index}/{shard_count} holds {manager_result.count} iterations "
+                    f"of manager '{name}', instead of {len(iterations)}"
+                )
+
+            value[iterations.start :: shard_count] = manager_result.value
+            cash[iterations.start :: shard_count] = manager_result.cash
+
+    merged_result = SimulationResult(
+        {
+            name: ManagerResult.from_arrays(value, cash)
+            for name, (value, cash) in managers.items()
+        }
+    )
+
+    return merged_result, metadata
@@ -0,0 +1,116 @@
+from dataclasses import dataclass
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from src.catalogue import ProjectCatalogue
+
+# The segments attached by this process, which must stay open as long as the arrays viewing them are used.
+attached_memory: list[SharedMemory] = []
+
+
+@dataclass(frozen=True)
+class SharedArray:
+    """
+    The description of an array in a shared memory segment, which is sent to a worker instead of the array itself.
+    """
+
+    name: str
+    shape: tuple[int, ...]
+    dtype: str
+
+    def attach(self) -> np.ndarray:
+        """
+        :return: A view of the array, writes to it are seen by every process that attached it.
+        """
+        # Not tracked, as the segment is unlinked by the process that created it.
+        memory = SharedMemory(self.name, track=False)
+        attached_memory.append(memory)
+
+        return np.ndarray(self.shape, self.dtype, buffer=memory.buf)
+
+
+class SharedArrays:
+    """
+    Creates arrays in shared memory, and closes and removes their segments when the context is left.
+    The arrays returned by create must not be used after that.
+    """
+
+    segments: list[SharedMemory]
+
+    def __init__(self):
+        self.segments = []
+
+    def __enter__(self) -> "SharedArrays":
+        return self
+
+    def __exit__(self, *exception):
+        self.close()
+
+    def create(
+        self, shape: tuple[int, ...], dtype: np.dtype | type
+    ) -> tuple[SharedArray, np.ndarray]:
+        """
+        :return: The description and a view of a new array of zeros.
+        """
+        dtype = np.dtype(dtype)
+        # A segment can not be empty, the view of an empty array simply uses none of it.
+        size = max(1, int(np.prod(shape)) * dtype.itemsize)
+        memory = SharedMemory(create=True, size=size)
+        self.segments.append(memory)
+
+        array = np.ndarray(shape, dtype, buffer=memory.buf)
+        array.fill(0)
+
+        return SharedArray(memory.name, tuple(shape), dtype.str), array
+
+    def share(self, array: np.ndarray) -> SharedArray:
+        """
+        :return: The description of a shared copy of the array.
+        """
+        shared_array, shared_view = self.create(array.shape, array.dtype)
+        shared_view[...] = array
+
+        return shared_array
+
+    def close(self):
+        for memory in self.segments:
+            memory.unlink()
+            try:
+                memory.close()
+            except BufferError:
+                # A view of the segment is still in use, the memory is released once it is freed.
+                pass
+
+        self.segments = []
+
+
+@dataclass(frozen=True)
+class SharedCatalogue:
+    """
+    The arrays of a ProjectCatalogue in shared memory, so the workers of a process pool use one copy of them.
+    """
+
+    sunk_cost: SharedArray
+    salvageable_cost: SharedArray
+    risk_mask: SharedArray
+
+    @classmethod
+    def share(
+        cls, catalogue: ProjectCatalogue, shared_arrays: SharedArrays
+    ) -> "SharedCatalogue":
+        return cls(
+            shared_arrays.share(catalogue.sunk_cost),
+            shared_arrays.share(catalogue.salvageable_cost),
+            shared_arrays.share(catalogue.risk_mask),
+        )
+
+    def attach(self) -> ProjectCatalogue:
+        """
+        :return: A catalogue on views of the shared arrays.
+        """
+        return ProjectCatalogue(
+            self.sunk_cost.attach(),
+            self.salvageable_cost.attach(),
+            self.risk_mask.attach(),
+        )
@@ -1,72 +1,562 @@
-from src.data import SimulationResult, Portfolio, ManagerResult
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import asdict
+from itertools import repeat
+from pathlib import Path
+
+import numpy as np
+
+from src.catalogue import ProjectCatalogue
+from src.checkpoint import (
+    CHECKPOINT_BATCH_SIZE,
+    CHECKPOINT_INTERVAL,
+    Checkpoint,
+    get_checkpoint_hash,
+    load_checkpoint,
+    save_checkpoint,
+)
+from src.data import (
+    SimulationResult,
+    Portfolio,
+    ManagerResult,
+    RunMetadata,
+    RESULT_TYPE,
+)
+from src.parameters import DEFAULT_PARAMETERS, ModelParameters
 from src.project import Project
 from src.project_manager import ProjectManager
+from src.random_stream import RandomStream, ScenarioTape, create_seed
+from src.result_cache import get_result_key, load_cached_results, store_results
+from src.shared_memory import SharedArray, SharedArrays, SharedCatalogue
+from src.statistics import ManagerSummary, PrecisionTarget, SimulationSummary
 from src.year import Year
 
 
 class Simulation:
-    projects: list[Project]
+    projects: ProjectCatalogue
     years: list[Year]
     iteration_limit: int
     managers: dict[str, ProjectManager]
+    workers: int
+    seed: int
+    random_seed: bool
+    common_random_numbers: bool
+    aggregate: bool
+    precision: PrecisionTarget | None
+    achieved_half_width: float | None
+    checkpoint_path: Path | None
+    checkpoint_interval: float
+    resume: bool
+    result_cache: Path | None
+    parameters: ModelParameters
+    # The (managers, 2, iterations, years) array in shared memory the workers write their iterations to,
+    # where the second axis is value and cash. Only set while a process pool is running, unless aggregating.
+    shared_results: np.ndarray | None
 
     def __init__(
         self,
         years: list[Year],
         iterations: int,
         managers: dict[str, ProjectManager],
-        projects: list[Project],
+        projects: list[Project] | ProjectCatalogue,
+        workers: int = 1,
+        seed: int | None = None,
+        common_random_numbers: bool = False,
+        aggregate: bool = False,
+        precision: PrecisionTarget | None = None,
+        checkpoint_path: Path | None = None,
+        checkpoint_interval: float = CHECKPOINT_INTERVAL,
+        resume: bool = False,
+        result_cache: Path | None = None,
+        parameters: ModelParameters = DEFAULT_PARAMETERS,
     ):
 
+        if workers < 1:
+            raise ValueError(f"Workers must be at least 1, given workers: {workers}")
+
         self.years = years
         self.iteration_limit = iterations
         self.managers = managers
+        if not isinstance(projects, ProjectCatalogue):
+            projects = ProjectCatalogue.from_projects(projects)
         self.projects = projects
 
+        # The constants of the model, which the strategies of the managers must have been made with.
+        if projects.project_length != parameters.project_length:
+            raise ValueError(
+                f"The templates have {projects.project_length} sub-projects, but the project length is "
+                f"{parameters.project_length}, see ProjectCatalogue.with_project_length"
+            )
+        for name, manager in managers.items():
+            if manager.strategy.parameters != parameters:
+                raise ValueError(
+                    f"The strategy of manager '{name}' was made with other parameters than the simulation"
+                )
+        self.parameters = parameters
+
+        self.workers = workers
+        # Without a given seed a random one is created, which can be used to reproduce the run.
+        self.seed = create_seed() if seed is None else seed
+        self.random_seed = seed is None
+        self.common_random_numbers = common_random_numbers
+        # If True, the iterations are folded into running statistics instead of being retained.
+        self.aggregate = aggregate
+        # If given, the iterations are run until the target is met, and 'iterations' is ignored.
+        self.precision = precision
+        self.achieved_half_width = None
+
+        if precision is not None and precision.paired_managers is not None:
+            if aggregate:
+                raise ValueError(
+                    "A paired precision target requires the iterations to be retained"
+                )
+            for name in precision.paired_managers:
+                if name not in managers:
+                    raise ValueError(f"The paired manager '{name}' does not exist")
+
+        if resume and checkpoint_path is None:
+            raise ValueError("A simulation can only be resumed from a checkpoint path")
+
+        # If given, the progress is written to this file about every 'checkpoint_interval' seconds.
+        self.checkpoint_path = checkpoint_path
+        self.checkpoint_interval = checkpoint_interval
+        # If True, the simulation continues from the checkpoint at 'checkpoint_path', if there is one.
+        # A random seed is then replaced by the seed of the checkpoint.
+        self.resume = resume
+
+        if result_cache is not None:
+            if seed is None:
+                raise ValueError("Results can only be cached for a seeded simulation")
+            if aggregate or precision is not None:
+                raise ValueError(
+                    "Results can only be cached for a fixed amount of retained iterations"
+                )
+
+        # If given, the iterations are cached in this directory, and only the iterations missing from it are run.
+        self.result_cache = result_cache
+        self.shared_results = None
+
+    def __getstate__(self) -> dict:
+        # The catalogue and results are left out, as the workers attach them from shared memory.
+        state = self.__dict__.copy()
+        state["projects"] = None
+        state["shared_results"] = None
+        return state
+
+    def get_metadata(self) -> RunMetadata:
+        """
+        :return: The description of the run, which is saved with the results.
+        """
+        return RunMetadata(
+            self.seed,
+            self.iteration_limit,
+            [year.allocated_funds for year in self.years],
+            self.projects.get_hash(),
+            list(self.managers.keys()),
+            self.common_random_numbers,
+            None if self.precision is None else self.precision.half_width,
+            self.achieved_half_width,
+            asdict(self.parameters),
+        )
+
     def reset_managers(self):
         for manager in self.managers.values():
             manager.reset_manager()
 
-    def run_simulation(self) -> SimulationResult:
+    def run_simulation(self) -> SimulationResult | SimulationSummary:
         """
         Run the configured simulation.
+        If more than one worker is configured, the iterations are sharded across a process pool,
+        where each worker runs on its own copy of the managers and projects.
         :return: The functions will return a dictionary holding each manager and their respective simulation results.
         Each simulation result consists of all iteration of the simulation, which is a list of integers.
+        In aggregate mode a SimulationSummary with the running statistics of each manager is returned instead.
+        With a precision target, a checkpoint path or a result cache the iterations are run in batches by
+        run_batched_simulation.
         """
-        simulation_results: SimulationResult = SimulationResult({})
+        if (
+            self.precision is not None
+            or self.checkpoint_path is not None
+            or self.result_cache is not None
+        ):
+            return self.run_batched_simulation()
 
-        # Setup managers for result
+        if self.workers > 1 and self.iteration_limit > 1:
+            return self.run_parallel_simulation()
 
-        for manager_name in self.managers.keys():
-            simulation_results.managers[manager_name] = ManagerResult(
-                Portfolio([], []),
-                Portfolio([], []),
-                Portfolio([], []),
-                Portfolio([], []),
-                Portfolio([], []),
-                Portfolio([], []),
-                Portfolio([], []),
-                Portfolio([], []),
-                Portfolio([], []),
+        return self.run_iterations(0, self.iteration_limit)
+
+    def run_batched_simulation(self) -> SimulationResult | SimulationSummary:
+        """
+        Runs batches of iterations until all iterations are completed, or the precision target is met.
+        The iterations are the same as in a single run with the same seed, also when the simulation is resumed
+        from a checkpoint or starts from the cached iterations. With a precision target, the amount used and the precision achieved are kept in
+        'iteration_limit' and 'achieved_half_width'.
+        """
+        simulation_results, iterations = self.start_batches()
+        last_checkpoint = time.perf_counter()
+        shared_arrays = SharedArrays()
+        executor = None
+        if self.workers > 1:
+            executor = self.create_executor(
+                shared_arrays, self.workers, self.get_max_batch_size()
+            )
+
+        try:
+            while not self.is_complete(simulation_results, iterations):
+                stop = self.get_batch_stop(iterations)
+
+                if executor is None:
+                    simulation_results.extend(self.run_iterations(iterations, stop))
+                else:
+                    simulation_results.extend(
+                        self.run_parallel_iterations(executor, iterations, stop)
+                    )
+
+                iterations = stop
+                if (
+                    self.checkpoint_path is not None
+                    and time.perf_counter() - last_checkpoint
+                    >= self.checkpoint_interval
+                ):
+                    self.save_checkpoint(simulation_results, iterations)
+                    last_checkpoint = time.perf_counter()
+        finally:
+            if executor is not None:
+                executor.shutdown()
+            self.shared_results = None
+            shared_arrays.close()
+
+        if self.checkpoint_path is not None:
+            self.save_checkpoint(simulation_results, iterations)
+
+        if self.result_cache is not None:
+            assert isinstance(simulation_results, SimulationResult)
+            store_results(self.result_cache, self.get_result_key(), simulation_results)
+
+        if self.precision is not None:
+            self.iteration_limit = iterations
+
+        return simulation_results
+
+    def start_batches(self) -> tuple[SimulationResult | SimulationSummary, int]:
+        """
+        :return: The results of the checkpoint when resuming, otherwise the cached or empty results,
+        and the completed iterations.
+        """
+        iterations = self.iteration_limit
+        if self.precision is not None:
+            iterations = self.precision.min_iterations
+
+        checkpoint = None
+        if self.resume:
+            assert self.checkpoint_path is not None
+            checkpoint = load_checkpoint(self.checkpoint_path)
+
+        if checkpoint is None:
+            return self.start_cached_batches(iterations)
+
+        if self.random_seed:
+            self.seed = checkpoint.seed
+            self.random_seed = False
+
+        if checkpoint.checkpoint_hash != self.get_checkpoint_hash():
+            raise ValueError(
+                f"The checkpoint {self.checkpoint_path} was made by a simulation with other inputs, "
+                f"and can not be resumed"
+            )
+
+        if self.precision is None and checkpoint.iterations > self.iteration_limit:
+            raise ValueError(
+                f"The checkpoint holds {checkpoint.iterations} iterations, "
+                f"more than the {self.iteration_limit} iterations of the simulation"
+            )
+
+        simulation_results = self.create_simulation_result(iterations)
+        simulation_results.extend(checkpoint.result)
+        return simulation_results, checkpoint.iterations
+
+    def start_cached_batches(
+        self, iterations: int
+    ) -> tuple[SimulationResult | SimulationSummary, int]:
+        simulation_results = self.create_simulation_result(iterations)
+        if self.result_cache is None:
+            return simulation_results, 0
+
+        cached_results = load_cached_results(
+            self.result_cache,
+            self.get_result_key(),
+            list(self.managers.keys()),
+            self.iteration_limit,
+        )
+        if cached_results is None:
+            return simulation_results, 0
+
+        simulation_results.extend(cached_results)
+        return simulation_results, next(iter(cached_results.managers.values())).count
+
+    def is_complete(
+        self, simulation_results: SimulationResult | SimulationSummary, iterations: int
+    ) -> bool:
+        """
+        With a precision target the half-width is calculated once the minimum iterations are reached,
+        and kept in 'achieved_half_width'.
+        """
+        if self.precision is None:
+            return iterations >= self.iteration_limit
+
+        if iterations < self.precision.min_iterations:
+            return False
+
+        self.achieved_half_width = self.precision.get_half_width(simulation_results)
+        return (
+            iterations >= self.precision.max_iterations
+            or self.achieved_half_width <= self.precision.half_width
+        )
+
+    def get_batch_stop(self, iterations: int) -> int:
+        """
+        :return: The iteration the batch after the completed iterations stops at (not including).
+        """
+        if self.precision is None:
+            return min(
+                self.iteration_limit, iterations + self.workers * CHECKPOINT_BATCH_SIZE
+            )
+
+        return min(
+            self.precision.max_iterations,
+            max(self.precision.min_iterations, iterations + self.precision.batch_size),
+        )
+
+    def get_max_batch_size(self) -> int:
+        """
+        :return: The most iterations a single batch of get_batch_stop can have.
+        """
+        if self.precision is None:
+            return min(self.iteration_limit, self.workers * CHECKPOINT_BATCH_SIZE)
+
+        return max(self.precision.min_iterations, self.precision.batch_size)
+
+    def get_strategy_settings(self) -> dict[str, str]:
+        return {
+            name: manager.strategy.get_settings()
+            for name, manager in self.managers.items()
+        }
+
+    def get_result_key(self) -> str:
+        return get_result_key(
+            self.seed,
+            [year.allocated_funds for year in self.years],
+            self.projects.get_hash(),
+            self.get_strategy_settings(),
+            self.common_random_numbers,
+            self.parameters,
+        )
+
+    def get_checkpoint_hash(self) -> str:
+        return get_checkpoint_hash(
+            self.seed,
+            [year.allocated_funds for year in self.years],
+            self.projects.get_hash(),
+            self.get_strategy_settings(),
+            self.common_random_numbers,
+            self.aggregate,
+            self.parameters,
+        )
+
+    def save_checkpoint(
+        self, simulation_results: SimulationResult | SimulationSummary, iterations: int
+    ):
+        assert self.checkpoint_path is not None
+        save_checkpoint(
+            Checkpoint(
+                self.get_checkpoint_hash(), self.seed, iterations, simulation_results
+            ),
+            self.checkpoint_path,
+        )
+
+    def run_iterations(
+        self, start: int, stop: int, target: np.ndarray | None = None
+    ) -> SimulationResult | SimulationSummary | None:
+        """
+        Runs the iterations from start up to (not including) stop serially in the current process.
+        :param target: A (managers, 2, stop - start, years) view to write the value and cash of each iteration to,
+        in its own row, instead of returning the results. Can not be given when aggregating.
+        """
+        if target is not None:
+            assert not self.aggregate
+            for row, iteration in enumerate(range(start, stop)):
+                iteration_result = self.run_iteration(iteration)
+                for index, portfolio in enumerate(iteration_result.values()):
+                    target[index, 0, row] = portfolio.value
+                    target[index, 1, row] = portfolio.cash
+
+            return None
+
+        simulation_results = self.create_simulation_result(stop - start)
+
+        for iteration in range(start, stop):
+            simulation_results.add_iteration_result(self.run_iteration(iteration))
+
+        return simulation_results
+
+    def run_parallel_simulation(self) -> SimulationResult | SimulationSummary:
+        """
+        Shards the iterations across a process pool and merges the results of each worker, in shard order.
+        """
+        workers = min(self.workers, self.iteration_limit)
+
+        with SharedArrays() as shared_arrays:
+            try:
+                with self.create_executor(
+                    shared_arrays, workers, self.iteration_limit
+                ) as executor:
+                    return self.run_parallel_iterations(
+                        executor, 0, self.iteration_limit
+                    )
+            finally:
+                self.shared_results = None
+
+    def create_executor(
+        self, shared_arrays: SharedArrays, workers: int, batch_size: int
+    ) -> ProcessPoolExecutor:
+        """
+        Creates a process pool, where every worker attaches the catalogue from shared memory and receives its own
+        copy of the managers once, instead of with every shard. Unless aggregating, the workers write their
+        iterations to 'shared_results', with room for the iterations of a batch.
+        """
+        shared_catalogue = SharedCatalogue.share(self.projects, shared_arrays)
+        shared_results = None
+        if not self.aggregate:
+            shared_results, self.shared_results = shared_arrays.create(
+                (len(self.managers), 2, batch_size, len(self.years)), RESULT_TYPE
             )
 
-        for iteration in range(self.iteration_limit):
-            simulation_results.add_iteration_result(self.run_iteration())
+        return ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=initialize_simulation_worker,
+            initargs=(self, shared_catalogue, shared_results),
+        )
+
+    def run_parallel_iterations(
+        self, executor: Executor, start: int, stop: int
+    ) -> SimulationResult | SimulationSummary:
+        """
+        Shards the iterations from start up to (not including) stop across the workers of the executor,
+        which must have been made by create_executor. Without aggregating, the workers write the iterations
+        to the shared results, from the first row on, so only the summaries of an aggregate run are merged.
+        """
+        iterations = stop - start
+        workers = max(1, min(self.workers, iterations))
+        shard_starts = [
+            start + shard * iterations // workers for shard in range(workers)
+        ]
+        shard_stops = shard_starts[1:] + [stop]
+
+        shard_results = executor.map(
+            run_simulation_shard, shard_starts, shard_stops, repeat(start)
+        )
+
+        if self.shared_results is None:
+            simulation_results = self.create_simulation_result(iterations)
+            for shard_result in shard_results:
+                simulation_results.extend(shard_result)
+
+            return simulation_results
+
+        # Waits for the shards, and raises the exception of a failed one.
+        list(shard_results)
+
+        return SimulationResult(
+            {
+                name: ManagerResult.from_arrays(
+                    self.shared_results[index, 0, :iterations],
+                    self.shared_results[index, 1, :iterations],
+                )
+                for index, name in enumerate(self.managers)
+            }
+        )
+
+    def create_simulation_result(
+        self, iterations: int
+    ) -> SimulationResult | SimulationSummary:
+        """
+        Creates an empty result for each manager, with room for the given amount of iterations.
+        """
+        if self.aggregate:
+            return SimulationSummary(
+                {name: ManagerSummary(len(self.years)) for name in self.managers}
+            )
+
+        simulation_results: SimulationResult = SimulationResult({})
+
+        for manager_name in self.managers.keys():
+            simulation_results.managers[manager_name] = ManagerResult.allocate(
+                iterations, len(self.years)
+            )
 
         return simulation_results
 
-    def run_iteration(self) -> dict[str, Portfolio]:
+    def run_iteration(self, iteration: int) -> dict[str, Portfolio]:
         """
         Runs an iteration of simulation.
+        Each manager draws from its own random stream derived from the seed and the iteration,
+        so any iteration can be recomputed on its own. With common random numbers all managers
+        instead read the same scenario tape of project and risk draws.
+        :param iteration: The index of the iteration.
         :return: This functions returns a list of values each manager generated after every year.
         """
         self.reset_managers()
 
         manager_results: dict[str, Portfolio] = {}
+        tape = ScenarioTape(self.seed, iteration)
+
+        for stream, (manager_name, manager) in enumerate(self.managers.items()):
+            if self.common_random_numbers:
+                random_stream = tape.reader()
+            else:
+                random_stream = RandomStream(self.seed, iteration, stream)
 
-        for manager_name, manager in self.managers.items():
-            manager_results[manager_name] = manager.run(self.years, self.projects)
+            manager_results[manager_name] = manager.run(
+                self.years, self.projects, random_stream, self.parameters
+            )
 
         assert len(self.managers) == len(manager_results)
 
         return manager_results
+
+
+# The simulation of the worker process, set once by the initializer of the process pool.
+worker_simulation: Simulation | None = None
+
+
+def initialize_simulation_worker(
+    simulation: Simulation,
+    shared_catalogue: SharedCatalogue,
+    shared_results: SharedArray | None,
+):
+    global worker_simulation
+
+    simulation.projects = shared_catalogue.attach()
+    if shared_results is not None:
+        simulation.shared_results = shared_results.attach()
+    worker_simulation = simulation
+
+
+def run_simulation_shard(
+    start: int, stop: int, first_row: int
+) -> SimulationResult | SimulationSummary | None:
+    """
+    Runs the iterations from start up to (not including) stop, and writes them to the shared results,
+    where the row of an iteration is its index minus 'first_row'. An aggregate run returns the summary instead.
+    """
+    simulation = worker_simulation
+    assert simulation is not None
+
+    if simulation.shared_results is None:
+        return simulation.run_iterations(start, stop)
+
+    rows = slice(start - first_row, stop - first_row)
+    simulation.run_iterations(start, stop, simulation.shared_results[:, :, rows])
+
+    return None
@@ -0,0 +1,285 @@
+import math
+from collections import Counter
+from dataclasses import dataclass
+from statistics import NormalDist
+
+import numpy as np
+
+from src.data import Portfolio, SimulationResult
+
+# The quantiles reported in the summary of a simulation.
+SUMMARY_QUANTILES = (0.05, 0.25, 0.5, 0.75, 0.95)
+
+
+class RunningStatistics:
+    """
+    Running count, mean, variance, minimum and maximum of a vector of values per iteration, e.g. the value of every year.
+    The mean and variance are updated with Welford's algorithm, and two accumulators can be merged with
+    Chan's parallel algorithm, so shards can be accumulated separately.
+    """
+
+    def __init__(self, size: int):
+        self.count = 0
+        self.mean = np.zeros(size)
+        self.m2 = np.zeros(size)
+        self.minimum = np.full(size, np.inf)
+        self.maximum = np.full(size, -np.inf)
+
+    def add(self, values: list[int] | np.ndarray):
+        values = np.asarray(values, dtype=float)
+
+        self.count += 1
+        delta = values - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (values - self.mean)
+        np.minimum(self.minimum, values, out=self.minimum)
+        np.maximum(self.maximum, values, out=self.maximum)
+
+    def merge(self, other: "RunningStatistics"):
+        if other.count == 0:
+            return
+
+        count = self.count + other.count
+        delta = other.mean - self.mean
+
+        self.mean = self.mean + delta * (other.count / count)
+        self.m2 = self.m2 + other.m2 + delta**2 * (self.count * other.count / count)
+        self.count = count
+        np.minimum(self.minimum, other.minimum, out=self.minimum)
+        np.maximum(self.maximum, other.maximum, out=self.maximum)
+
+    @property
+    def variance(self) -> np.ndarray:
+        """
+        :return: The sample variance, which is 0 with less than 2 iterations.
+        """
+        if self.count < 2:
+            return np.zeros_like(self.m2)
+
+        return self.m2 / (self.count - 1)
+
+    @property
+    def standard_deviation(self) -> np.ndarray:
+        return np.sqrt(self.variance)
+
+
+class QuantileSketch:
+    """
+    A mergeable sketch of the distribution of a vector of integer values per iteration.
+    The results of the simulation are integers in a bounded range, so the sketch keeps the exact count of every
+    distinct value, which gives exact quantiles with memory bounded by the range instead of the iterations.
+    """
+
+    def __init__(self, size: int):
+        self.counts: list[Counter[int]] = [Counter() for _ in range(size)]
+
+    def add(self, values: list[int] | np.ndarray):
+        for counts, value in zip(self.counts, values):
+            counts[int(value)] += 1
+
+    def merge(self, other: "QuantileSketch"):
+        for counts, other_counts in zip(self.counts, other.counts):
+            counts.update(other_counts)
+
+    def quantile(self, q: float) -> np.ndarray:
+        """
+        :param q: The quantile between 0 and 1.
+        :return: The lowest value of each entry, where at least the fraction q of the values are less or equal.
+        """
+        quantiles = np.full(len(self.counts), np.nan)
+
+        for index, counts in enumerate(self.counts):
+            total = counts.total()
+            if total == 0:
+                continue
+
+            cumulative = 0
+            for value in sorted(counts):
+                cumulative += counts[value]
+                if cumulative >= q * total:
+                    quantiles[index] = value
+                    break
+
+        return quantiles
+
+
+class ManagerSummary:
+    """
+    The running statistics of the value and cash of every year for a single manager.
+    """
+
+    def __init__(self, years: int):
+        self.value = RunningStatistics(years)
+        self.cash = RunningStatistics(years)
+        self.value_quantiles = QuantileSketch(years)
+        self.cash_quantiles = QuantileSketch(years)
+
+    @property
+    def count(self) -> int:
+        return self.value.count
+
+    def add(self, portfolio: Portfolio):
+        self.value.add(portfolio.value)
+        self.cash.add(portfolio.cash)
+        self.value_quantiles.add(portfolio.value)
+        self.cash_quantiles.add(portfolio.cash)
+
+    def merge(self, other: "ManagerSummary"):
+        self.value.merge(other.value)
+        self.cash.merge(other.cash)
+        self.value_quantiles.merge(other.value_quantiles)
+        self.cash_quantiles.merge(other.cash_quantiles)
+
+
+@dataclass
+class SummaryRow:
+    manager: str
+    metric: str  # either "value" or "cash"
+    year: int
+    iterations: int
+    mean: float
+    standard_deviation: float
+    minimum: float
+    maximum: float
+    quantiles: dict[float, float]
+
+
+@dataclass
+class SimulationSummary:
+    """
+    The aggregated results of a simulation, which are folded in one iteration at a time and do not retain the
+    individual iterations. It can be used in place of a SimulationResult.
+    """
+
+    managers: dict[str, ManagerSummary]
+
+    def add_iteration_result(self, iteration_result: dict[str, Portfolio]):
+        for name, portfolio in iteration_result.items():
+            self.managers[name].add(portfolio)
+
+    def extend(self, other: "SimulationSummary"):
+        """
+        Merges the accumulators of another summary, e.g. from a parallel worker, into this summary.
+        """
+        for name, manager in other.managers.items():
+            self.managers[name].merge(manager)
+
+    def get_rows(self) -> list[SummaryRow]:
+        """
+        :return: A row for each manager, metric and year with the summary statistics.
+        """
+        rows = []
+
+        for name, manager in self.managers.items():
+            for metric, statistics, sketch in (
+                ("value", manager.value, manager.value_quantiles),
+                ("cash", manager.cash, manager.cash_quantiles),
+            ):
+                quantiles = {q: sketch.quantile(q) for q in SUMMARY_QUANTILES}
+                standard_deviation = statistics.standard_deviation
+
+                for year in range(1, len(statistics.mean) + 1):
+                    rows.append(
+                        SummaryRow(
+                            name,
+                            metric,
+                            year,
+                            statistics.count,
+                            float(statistics.mean[year - 1]),
+                            float(standard_deviation[year - 1]),
+                            float(statistics.minimum[year - 1]),
+                            float(statistics.maximum[year - 1]),
+                            {q: float(quantiles[q][year - 1]) for q in quantiles},
+                        )
+                    )
+
+        return rows
+
+
+@dataclass
+class PrecisionTarget:
+    """
+    The stopping rule of an adaptive simulation. Iterations are added in batches until the confidence interval of
+    the mean of the metric in the year is at most 'half_width' wide on each side, for every manager, or for the
+    difference between the paired managers if they are given.
+    """
+
+    half_width: float
+    metric: str = "value"  # either "value" or "cash"
+    year: int | None = None  # None is the last year
+    paired_managers: tuple[str, str] | None = None
+    confidence: float = 0.95
+    min_iterations: int = 100
+    max_iterations: int = 100_000
+    batch_size: int = 100
+
+    def __post_init__(self):
+        if self.half_width <= 0:
+            raise ValueError(
+                f"The half-width must be positive, given: {self.half_width}"
+            )
+        if not 2 <= self.min_iterations <= self.max_iterations:
+            raise ValueError(
+                f"The iterations must satisfy 2 <= min_iterations <= max_iterations, given: "
+                f"{self.min_iterations} and {self.max_iterations}"
+            )
+        if self.batch_size < 1:
+            raise ValueError(
+                f"The batch size must be at least 1, given: {self.batch_size}"
+            )
+
+    def get_half_width(self, result: SimulationResult | SimulationSummary) -> float:
+        """
+        :return: The largest half-width of the confidence intervals the target is about, inf before 2 iterations.
+        """
+        z = NormalDist().inv_cdf(0.5 + self.confidence / 2)
+        standard_errors = []
+
+        if self.paired_managers is not None:
+            if not isinstance(result, SimulationResult):
+                raise ValueError(
+                    "A paired precision target requires the iterations to be retained"
+                )
+
+            first, second = (
+                getattr(result.managers[name], self.metric)
+                for name in self.paired_managers
+            )
+            standard_errors.append(
+                get_standard_error(
+                    first[:, self.get_year_index(first)].astype(np.int64)
+                    - second[:, self.get_year_index(second)]
+                )
+            )
+        elif isinstance(result, SimulationResult):
+            for manager in result.managers.values():
+                values = getattr(manager, self.metric)
+                standard_errors.append(
+                    get_standard_error(values[:, self.get_year_index(values)])
+                )
+        else:
+            for manager in result.managers.values():
+                statistics: RunningStatistics = getattr(manager, self.metric)
+                if statistics.count < 2:
+                    return math.inf
+
+                standard_errors.append(
+                    float(
+                        statistics.standard_deviation[
+                            self.get_year_index(statistics.mean)
+                        ]
+                    )
+                    / math.sqrt(statistics.count)
+                )
+
+        return z * max(standard_errors)
+
+    def get_year_index(self, values: np.ndarray) -> int:
+        return values.shape[-1] - 1 if self.year is None else self.year - 1
+
+
+def get_standard_error(values: np.ndarray) -> float:
+    if len(values) < 2:
+        return math.inf
+
+    return float(np.std(values, ddof=1)) / math.sqrt(len(values))
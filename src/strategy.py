@@ -1,32 +1,50 @@
-import random
 from abc import abstractmethod, ABC
-from copy import deepcopy
-from typing import override, List, Tuple
-
-from src.probability import get_risk_distribution, ProjectConflict, TreeTraversalResult
-from src.project import Project
-from src.risk import NORMAL_RISK_VALUES
-from src.utils.project_utils import (
-    find_project_risk_conflicts,
-    calculate_delta_investment,
+import time
+from typing import override, List, Sequence, Tuple
+
+from src.probability import (
+    get_risk_distribution,
+    LossKey,
+    ProjectConflict,
+    TraversalLimits,
+    TreeTraversalResult,
 )
+from src.catalogue import TemplateKey, get_template_key
+from src.parameters import DEFAULT_PARAMETERS, ModelParameters
+from src.project import Project
+from src.random_stream import DrawStream
+from src.risk import NORMAL_RISK_VALUES, NORMAL_RISK_PMF, RiskPmf
+from src.utils.cache import LRUCache
+from src.utils.portfolio_index import PortfolioIndex
 
-from src.utils.constants import SUB_PROJECT_COST, PROJECT_LENGTH
+from src.utils.project_utils import calculate_delta_investment
 
-from src.year import Year
+from src.year import Year, copy_funds
 
 
-def get_risk_cost() -> int:
+def get_risk_cost(
+    stream: DrawStream,
+    current_year: int,
+    risk_values: Sequence[int] = NORMAL_RISK_VALUES,
+) -> int:
     """
     This algorithm gives a random risk value, which can either be from the 'NORMAL_RISK_VALUES' or
     'VOLATILE_RISK_VALUES'
+    :param stream: The random stream of the manager, which the risk value is drawn from.
+    :param current_year: The year the risk is drawn for.
+    :param risk_values: The values the risk is drawn from, see ModelParameters.risk_values.
     :return: The Integer risk cost.
     """
 
-    return random.choice(NORMAL_RISK_VALUES)
+    return stream.draw_risk_cost(risk_values, current_year)
 
 
 class ProjectStrategy(ABC):
+    # If True, the project manager keeps a PortfolioIndex of its projects up to date for the strategy.
+    uses_portfolio_index: bool = False
+    # The parameters of the model the strategy decides for, which must match the parameters of the simulation.
+    parameters: ModelParameters = DEFAULT_PARAMETERS
+
     @abstractmethod
     def should_accept_project(
         self,
@@ -34,6 +52,7 @@ class ProjectStrategy(ABC):
         current_projects: list[Project],
         current_year: int,
         new_project: Project,
+        portfolio_index: PortfolioIndex | None = None,
     ) -> bool:
         """
         This is the algorithm for deciding if a project should be accepted by a project manager, if true, then it will accept the project.
@@ -41,30 +60,46 @@ class ProjectStrategy(ABC):
         :param available_funds: These are funds from the current year and forward until the end, this should already have accounted for currently owned projects.
         :param current_projects: The current projects, used for risk calculation.
         :param new_project: The new project that can be accepted or rejected.
+        :param portfolio_index: The index of the current projects if the project manager keeps one, which
+        strategies can read instead of iterating the current projects.
         :return: The boolean indicating if the project should be accepted (True) or rejected (False).
         """
         raise NotImplementedError("Subclasses must implement this method")
 
+    def max_acceptable(self, available_funds: list[Year]) -> int | None:
+        """
+        An optional fast path for strategies, whose decision does not depend on the drawn project.
+        :param available_funds: These are funds from the current year and forward until the end.
+        :return: The number of projects the strategy accepts in a row given the funds, or None if every
+        project has to be passed to should_accept_project.
+        """
+        return None
 
-class GreedyStrategy(ProjectStrategy):
-    @override
-    def should_accept_project(
-        self,
-        available_funds: list[Year],
-        current_projects: list[Project],
-        current_year: int,
-        new_project: Project,
-    ) -> bool:
-        for count, funds in enumerate(available_funds):
-            if count >= len(new_project.sub_projects):
-                break
-            elif funds.allocated_funds < SUB_PROJECT_COST:
-                return False
+    def reset(self):
+        """
+        Resets any state the strategy keeps within an iteration, this is called before each iteration.
+        """
+        pass
 
-        return True
+    def get_settings(self) -> str:
+        """
+        :return: The name of the strategy with every setting that changes its decisions, which identifies the
+        results of the strategy in checkpoints and cached results.
+        """
+        return type(self).__name__
 
 
-class MinusOneStrategy(ProjectStrategy):
+class ThresholdStrategy(ProjectStrategy):
+    """
+    A strategy that accepts a project if the funds of every year of the project cover its cost,
+    while keeping a static buffer of 'reserved_projects' times the cost of a sub-project.
+    """
+
+    reserved_projects: int
+
+    def __init__(self, parameters: ModelParameters = DEFAULT_PARAMETERS):
+        self.parameters = parameters
+
     @override
     def should_accept_project(
         self,
@@ -72,17 +107,145 @@ class MinusOneStrategy(ProjectStrategy):
         current_projects: list[Project],
         current_year: int,
         new_project: Project,
+        portfolio_index: PortfolioIndex | None = None,
     ) -> bool:
+        required_funds = self.parameters.sub_project_cost * (1 + self.reserved_projects)
+
         for count, funds in enumerate(available_funds):
             if count >= len(new_project.sub_projects):
                 break
-            elif funds.allocated_funds < SUB_PROJECT_COST * 2:
+            elif funds.allocated_funds < required_funds:
                 return False
 
         return True
 
+    @override
+    def max_acceptable(self, available_funds: list[Year]) -> int:
+        # Every accepted project lowers the funds of each of its years by the cost of a sub-project.
+        minimum_funds = min(
+            funds.allocated_funds
+            for funds in available_funds[: self.parameters.project_length]
+        )
+        return max(
+            0,
+            minimum_funds // self.parameters.sub_project_cost - self.reserved_projects,
+        )
+
+
+class GreedyStrategy(ThresholdStrategy):
+    reserved_projects = 0
+
+
+class MinusOneStrategy(ThresholdStrategy):
+    reserved_projects = 1
+
+
+# The default amount of losses the OptimalStrategy keeps cached within an iteration.
+LOSS_CACHE_SIZE = 10_000
+
+# The default amount of decisions the OptimalStrategy keeps cached across iterations.
+DECISION_CACHE_SIZE = 100_000
+
+#   The key of a cached decision is (funds from the current year, current year, candidate template, portfolio),
+#   where the portfolio is the sorted (template key, created_at) of every current project.
+DecisionKey = Tuple[
+    Tuple[int, ...], int, TemplateKey, Tuple[Tuple[TemplateKey, int], ...]
+]
+
+
+def get_decision_key(
+    available_funds: list[Year],
+    current_projects: list[Project],
+    current_year: int,
+    new_project: Project,
+) -> DecisionKey:
+    """
+    The decision of the OptimalStrategy only depends on the funds, the year, the candidate template, and the
+    templates and start years of the current projects regardless of their order.
+    """
+    return (
+        tuple(funds.allocated_funds for funds in available_funds),
+        current_year,
+        get_template_key(new_project),
+        tuple(
+            sorted(
+                (get_template_key(project), project.created_at)
+                for project in current_projects
+            )
+        ),
+    )
+
 
 class OptimalStrategy(ProjectStrategy):
+    """
+    A strategy that accepts a project if the expected return of the portfolio with it, after the expected loss
+    of the risk conflicts it causes, is at least the return without it.
+    The probability tree of the conflicts can be capped with 'epsilon', 'max_conflict_depth' and 'time_budget',
+    which makes the decision an estimate within the reported error bound.
+    """
+
+    uses_portfolio_index = True
+    loss_cache: LRUCache[LossKey, int]
+    risk_pmf: RiskPmf  # the PMF of a single risk element, which must match the risk costs of the simulation
+    epsilon: float
+    max_conflict_depth: int | None
+    time_budget: float | None  # seconds per decision
+    max_error_bound: float  # the largest error bound of any decision so far
+    # The decisions and their error bounds, which are kept across iterations. None if the decisions are not cached.
+    decision_cache: LRUCache[DecisionKey, tuple[bool, float]] | None
+
+    def __init__(
+        self,
+        loss_cache_size: int = LOSS_CACHE_SIZE,
+        risk_pmf: RiskPmf | None = None,
+        epsilon: float = 0.0,
+        max_conflict_depth: int | None = None,
+        time_budget: float | None = None,
+        decision_cache_size: int | None = DECISION_CACHE_SIZE,
+        parameters: ModelParameters = DEFAULT_PARAMETERS,
+    ):
+        """
+        :param risk_pmf: The PMF of a single risk element, None uses the PMF of the risk values of the parameters.
+        """
+        if max_conflict_depth is not None and max_conflict_depth < 1:
+            raise ValueError(
+                f"The maximum conflict depth must be at least 1, given: {max_conflict_depth}"
+            )
+
+        self.loss_cache = LRUCache(loss_cache_size)
+        self.parameters = parameters
+        self.risk_pmf = parameters.risk_pmf if risk_pmf is None else risk_pmf
+        self.epsilon = epsilon
+        self.max_conflict_depth = max_conflict_depth
+        self.time_budget = time_budget
+        self.max_error_bound = 0.0
+        # Decisions under a time budget depend on the timing, so they are not reused.
+        self.decision_cache = None
+        if decision_cache_size is not None and time_budget is None:
+            self.decision_cache = LRUCache(decision_cache_size)
+
+    def get_traversal_limits(self) -> TraversalLimits:
+        deadline = None
+        if self.time_budget is not None:
+            deadline = time.perf_counter() + self.time_budget
+
+        return TraversalLimits(self.epsilon, self.max_conflict_depth, deadline)
+
+    @override
+    def reset(self):
+        self.loss_cache.clear()
+
+    @override
+    def get_settings(self) -> str:
+        risk_pmf = [
+            (str(probability), outcome) for probability, outcome in self.risk_pmf
+        ]
+
+        return (
+            f"{type(self).__name__}(risk_pmf={risk_pmf}, epsilon={self.epsilon}, "
+            f"max_conflict_depth={self.max_conflict_depth}, time_budget={self.time_budget})"
+        )
+
     @override
     def should_accept_project(
         self,
@@ -90,83 +253,98 @@ class OptimalStrategy(ProjectStrategy):
         current_projects: list[Project],
         current_year: int,
         new_project: Project,
+        portfolio_index: PortfolioIndex | None = None,
     ) -> bool:
         # First check that there are funds for the new project
 
+        project_length = self.parameters.project_length
+        sub_project_cost = self.parameters.sub_project_cost
+
         for count, funds in enumerate(available_funds):
-            if count >= PROJECT_LENGTH:
+            if count >= project_length:
                 break
-            elif funds.allocated_funds < SUB_PROJECT_COST:
+            elif funds.allocated_funds < sub_project_cost:
                 return False
 
         # Add the new project to the projects_copy to run the simulation on.
 
-        fund_copy = deepcopy(available_funds)
+        fund_copy = copy_funds(available_funds)
         projects_copy = list(current_projects)
 
         projects_copy.append(new_project)
-        project_end = PROJECT_LENGTH
+        project_end = project_length
         if project_end > len(fund_copy):
             project_end = len(fund_copy)
 
         for j in range(0, project_end):
-            fund_copy[j].allocated_funds -= SUB_PROJECT_COST
+            fund_copy[j].allocated_funds -= sub_project_cost
+
+        if portfolio_index is None:
+            portfolio_index = PortfolioIndex.from_projects(
+                current_projects,
+                current_year + len(available_funds) - 1,
+                self.parameters,
+            )
+        # The index of the portfolio with the new project, the index of the manager is not changed.
+        candidate_index = portfolio_index.with_project(new_project)
 
         # Calculate the conflicting years.
-        conflict_years = find_project_risk_conflicts(
-            projects_copy, fund_copy, current_year
+        conflict_years = candidate_index.find_risk_conflicts(
+            fund_copy, current_year, self.risk_pmf
         )
 
+        if len(conflict_years) == 0:
+            return True
+
+        # Portfolios with conflicts recur across iterations, so their decisions are cached.
+        key = None
+        if self.decision_cache is not None:
+            key = get_decision_key(
+                available_funds, current_projects, current_year, new_project
+            )
+            cached_decision = self.decision_cache.get(key)
+            if cached_decision is not None:
+                decision, error_bound = cached_decision
+                self.max_error_bound = max(self.max_error_bound, error_bound)
+                return decision
+
         # For each conflict year calculate the existing value, and maximum value after accepting new project
 
-        # (year, existing investment, maximum new value)
-        conflict_value_comparison: List[Tuple[int, int, int]] = []
-
-        for conflict in conflict_years:
-            # (year, existing value, maximum new value)
-            conflict_value_comparison.append(
-                (
-                    conflict[0],
-                    calculate_delta_investment(current_projects, 1, conflict[0]),
-                    calculate_delta_investment(projects_copy, 1, conflict[0]),
-                )
+        # (year, existing investment, maximum new value), where every year is answered in one batch.
+        years = [conflict[0] for conflict in conflict_years]
+        starting_years = [1] * len(years)
+
+        conflict_value_comparison: List[Tuple[int, int, int]] = list(
+            zip(
+                years,
+                portfolio_index.calculate_delta_investments(starting_years, years),
+                candidate_index.calculate_delta_investments(starting_years, years),
             )
+        )
         # We have now detected the years with possible conflicts.
 
-        if len(conflict_years) == 0:
-            return True
-
-        (existing_return, expected_return) = calculate_expected_investment(
+        result = traverse_probability_tree(
             conflict_years,
+            None,
             current_year,
-            projects_copy,
             fund_copy,
+            projects_copy,
             conflict_value_comparison,
+            self.loss_cache,
+            self.risk_pmf,
+            self.get_traversal_limits(),
+            parameters=self.parameters,
         )
+        self.max_error_bound = max(self.max_error_bound, result.error_bound)
 
-        if expected_return < existing_return:
-            return False
-        else:
-            return True
+        existing_return = float(result.existing_return)
+        expected_return = result.expected_return - result.expected_loss
 
+        decision = expected_return >= existing_return
+        if key is not None:
+            self.decision_cache.put(key, (decision, result.error_bound))
 
-def calculate_expected_investment(
-    conflict_years: List[Tuple[int, int]],
-    current_year: int,
-    projects: List[Project],
-    funds: List[Year],
-    value_comparison: List[Tuple[int, int, int]],
-) -> Tuple[float, float]:
-    """
-    This function unwraps the TreeTraversalResult.
-    """
-    result = traverse_probability_tree(
-        conflict_years, None, current_year, funds, projects, value_comparison
-    )
-
-    return float(result.existing_return), (
-        result.expected_return - result.expected_loss
-    )
+        return decision
 
 
 def traverse_probability_tree(
@@ -176,17 +354,35 @@ def traverse_probability_tree(
     funds: List[Year],
     projects: List[Project],
     value_comparison: List[Tuple[int, int, int]],
+    loss_cache: LRUCache[LossKey, int] | None = None,
+    risk_pmf: RiskPmf = NORMAL_RISK_PMF,
+    limits: TraversalLimits | None = None,
+    depth: int = 1,
+    parameters: ModelParameters = DEFAULT_PARAMETERS,
 ) -> TreeTraversalResult:
+    """
+    Walks the conflict years in order, and accumulates the expected loss of every risk outcome causing a deficit.
+    :param loss_cache: An optional cache of the losses, which is reused for branches with the same deficit and projects.
+    :param risk_pmf: The PMF of a single risk element, which the distribution of the risk cost is built from.
+    :param limits: The optional limits of the traversal, the probability of the branches they prune is
+    reported in the result together with a bound on the expected loss it could have added.
+    :param depth: The number of the current conflict year in the traversal, starting at 1.
+    :param parameters: The parameters of the model, which the closures and losses are made with.
+    """
 
     assert len(next_conflicts) > 0
 
+    if limits is None:
+        limits = TraversalLimits()
+
     current_conflict = next_conflicts[0]
     fund_index = current_conflict[0] - current_year
     conflicts: List[ProjectConflict] = []
 
-    risk_probability = get_risk_distribution(current_conflict[1])
+    risk_probability = get_risk_distribution(current_conflict[1], risk_pmf)
 
     new_chance_to_proceed: float = 0.0
+    pruned_probability = 0.0
 
     for risk in risk_probability:
         risk_percentage: float
@@ -195,6 +391,10 @@ def traverse_probability_tree(
         else:
             risk_percentage = chance_to_proceed * risk[0]
 
+        if risk_percentage < limits.epsilon:
+            pruned_probability += risk_percentage
+            continue
+
         deficit = funds[fund_index].allocated_funds - risk[1]
 
         if deficit < 0:
@@ -209,24 +409,53 @@ def traverse_probability_tree(
     assert new_chance_to_proceed is not None
 
     for conflict in conflicts:
-        expected_loss += conflict.calculate_expected_loss(projects)
+        if limits.is_expired():
+            pruned_probability += conflict.adjusted_probability
+            continue
+
+        expected_loss += conflict.calculate_expected_loss(
+            projects, loss_cache, parameters
+        )
 
     current_existing_return = 0
     current_maximum_return = 0.0
+    pruned_subtree_probability = 0.0
+    error_bound = 0.0
 
     if len(next_conflicts) > 1:
-        traversel_result = traverse_probability_tree(
-            next_conflicts[1:],
-            new_chance_to_proceed,
-            current_year,
-            funds,
-            projects,
-            value_comparison,
-        )
+        if (
+            new_chance_to_proceed < limits.epsilon
+            or limits.is_too_deep(depth)
+            or limits.is_expired()
+        ):
+            # The later conflict years are only reached with the remaining chance to proceed.
+            pruned_probability += new_chance_to_proceed
+        else:
+            traversel_result = traverse_probability_tree(
+                next_conflicts[1:],
+                new_chance_to_proceed,
+                current_year,
+                funds,
+                projects,
+                value_comparison,
+                loss_cache,
+                risk_pmf,
+                limits,
+                depth + 1,
+                parameters,
+            )
+
+            expected_loss += traversel_result.expected_loss
+            pruned_subtree_probability = traversel_result.pruned_probability
+            error_bound = traversel_result.error_bound
+            current_existing_return = traversel_result.existing_return
+            current_maximum_return = traversel_result.expected_return
 
-        expected_loss += traversel_result.expected_loss
-        current_existing_return = traversel_result.existing_return
-        current_maximum_return = traversel_result.expected_return
+    if pruned_probability > 0:
+        # A pruned branch can at most lose the investment in every project up to the last conflict year.
+        error_bound += pruned_probability * calculate_delta_investment(
+            projects, 1, next_conflicts[-1][0], parameters
+        )
 
     for c_year, existing, maximum in value_comparison:
         if c_year == current_conflict[0]:
@@ -236,5 +465,9 @@ def traverse_probability_tree(
     assert current_existing_return != 0
 
     return TreeTraversalResult(
-        int(current_existing_return), current_maximum_return, expected_loss
+        int(current_existing_return),
+        current_maximum_return,
+        expected_loss,
+        pruned_probability + pruned_subtree_probability,
+        error_bound,
     )
@@ -0,0 +1,386 @@
+import itertools
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field, fields
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+
+from src.catalogue import ProjectCatalogue
+from src.data import ManagerResult, RunMetadata, SimulationResult, RESULT_TYPE
+from src.parameters import ModelParameters
+from src.project_manager import ProjectManager
+from src.random_stream import RandomStream, ScenarioTape, create_seed
+from src.shared_memory import SharedArray, SharedArrays, SharedCatalogue
+from src.strategy import ProjectStrategy
+from src.year import STANDARD_YEARS, Year
+
+# The default amount of iterations of a manager at a grid point, which a single task of a sweep runs.
+SWEEP_SHARD_SIZE = 500
+
+#   Creates the strategy of a manager for the parameters of a grid point, e.g. GreedyStrategy or
+#   functools.partial(OptimalStrategy, epsilon=0.01). It is called with the parameters as keyword argument,
+#   and must be picklable to be sent to the workers.
+StrategyFactory = Callable[..., ProjectStrategy]
+
+#   A task of a sweep: the index of the grid point, the name of the manager,
+#   and the first and last (not including) iteration.
+SweepTask = tuple[int, str, int, int]
+
+
+@dataclass(frozen=True)
+class SweepPoint:
+    """
+    A single point of a parameter sweep, which is simulated like a Simulation with these inputs.
+    """
+
+    funding_name: str
+    funding_profile: tuple[int, ...]  # the allocated funds of each year
+    parameters: ModelParameters
+
+    @property
+    def years(self) -> list[Year]:
+        return [Year(funds) for funds in self.funding_profile]
+
+
+@dataclass
+class SweepGrid:
+    """
+    The values to sweep over, every combination of a funding profile and the values of the parameters is a point.
+    """
+
+    funding_profiles: dict[str, tuple[int, ...]] = field(
+        default_factory=lambda: {
+            "standard": tuple(year.allocated_funds for year in STANDARD_YEARS)
+        }
+    )
+    sub_project_value: list[int] = field(
+        default_factory=lambda: [ModelParameters.sub_project_value]
+    )
+    sub_project_cost: list[int] = field(
+        default_factory=lambda: [ModelParameters.sub_project_cost]
+    )
+    project_length: list[int] = field(
+        default_factory=lambda: [ModelParameters.project_length]
+    )
+    risk_values: list[tuple[int, ...]] = field(
+        default_factory=lambda: [ModelParameters.risk_values]
+    )
+
+    @classmethod
+    def from_dict(cls, grid: dict) -> "SweepGrid":
+        """
+        Creates the grid from a dictionary, e.g. a JSON file, where a missing key keeps the default values:
+        {"funding_profiles": {"flat": [50, 50, ...]}, "sub_project_cost": [4, 5], "risk_values": [[0, 2, 4]]}
+        """
+        names = {grid_field.name for grid_field in fields(cls)}
+        unknown = set(grid) - names
+        if unknown:
+            raise ValueError(
+                f"Unknown keys in the sweep grid: {sorted(unknown)}, expected: {sorted(names)}"
+            )
+
+        grid = dict(grid)
+        if "funding_profiles" in grid:
+            grid["funding_profiles"] = {
+                name: tuple(profile)
+                for name, profile in grid["funding_profiles"].items()
+            }
+        if "risk_values" in grid:
+            grid["risk_values"] = [tuple(values) for values in grid["risk_values"]]
+
+        return cls(**grid)
+
+    def get_points(self) -> list[SweepPoint]:
+        """
+        :return: Every combination of the values, with the parameters varying fastest.
+        """
+        return [
+            SweepPoint(
+                funding_name,
+                funding_profile,
+                ModelParameters(value, cost, length, risk_values),
+            )
+            for (funding_name, funding_profile), value, cost, length, risk_values in (
+                itertools.product(
+                    self.funding_profiles.items(),
+                    self.sub_project_value,
+                    self.sub_project_cost,
+                    self.project_length,
+                    self.risk_values,
+                )
+            )
+        ]
+
+
+@dataclass
+class SweepResult:
+    """
+    The results of a sweep, the metadata and results of each point are in the order of the points.
+    """
+
+    points: list[SweepPoint]
+    metadata: list[RunMetadata]
+    results: list[SimulationResult]
+
+
+class ParameterSweep:
+    """
+    Simulates every point of a grid, by running (point x manager x shard of iterations) tasks on one process pool.
+    Each point gives the same results as a Simulation with its funds, parameters and the same seed,
+    on the catalogue truncated to the project length of the point.
+    """
+
+    points: list[SweepPoint]
+    iterations: int
+    strategies: dict[str, StrategyFactory]
+    projects: ProjectCatalogue
+    workers: int
+    seed: int
+    common_random_numbers: bool
+    shard_size: int
+
+    def __init__(
+        self,
+        points: list[SweepPoint],
+        iterations: int,
+        strategies: dict[str, StrategyFactory],
+        projects: ProjectCatalogue,
+        workers: int = 1,
+        seed: int | None = None,
+        common_random_numbers: bool = False,
+        shard_size: int = SWEEP_SHARD_SIZE,
+    ):
+        if workers < 1:
+            raise ValueError(f"Workers must be at least 1, given workers: {workers}")
+        if shard_size < 1:
+            raise ValueError(
+                f"The shard size must be at least 1, given shard size: {shard_size}"
+            )
+
+        self.points = points
+        self.iterations = iterations
+        self.strategies = strategies
+        self.projects = projects
+        self.workers = workers
+        # Without a given seed a random one is created, which is stored with the results.
+        self.seed = create_seed() if seed is None else seed
+        self.common_random_numbers = common_random_numbers
+        self.shard_size = shard_size
+
+        # The catalogue of each project length, which every process only truncates once.
+        self.catalogues: dict[int, ProjectCatalogue] = {}
+
+    def __getstate__(self) -> dict:
+        # The catalogue is left out, as the workers attach it from shared memory,
+        # and the truncated catalogues are cheap to create in the worker.
+        state = self.__dict__.copy()
+        state["projects"] = None
+        state["catalogues"] = {}
+        return state
+
+    def get_tasks(self) -> list[SweepTask]:
+        return [
+            (
+                point_index,
+                manager_name,
+                start,
+                min(self.iterations, start + self.shard_size),
+            )
+            for point_index in range(len(self.points))
+            for manager_name in self.strategies
+            for start in range(0, self.iterations, self.shard_size)
+        ]
+
+    def get_catalogue(self, project_length: int) -> ProjectCatalogue:
+        catalogue = self.catalogues.get(project_length)
+        if catalogue is None:
+            catalogue = self.projects.with_project_length(project_length)
+            self.catalogues[project_length] = catalogue
+
+        return catalogue
+
+    def run_sweep(self) -> SweepResult:
+        """
+        Runs every task, serially with a single worker, and writes the iterations to one array of shape
+        (points, managers, 2, iterations, years), where the third axis is value and cash.
+        """
+        tasks = self.get_tasks()
+        shape = (
+            len(self.points),
+            len(self.strategies),
+            2,
+            self.iterations,
+            max((len(point.funding_profile) for point in self.points), default=0),
+        )
+
+        if self.workers == 1 or len(tasks) == 1:
+            results = np.zeros(shape, RESULT_TYPE)
+            for task in tasks:
+                self.run_task(task, results)
+
+            return self.create_sweep_result(results)
+
+        # The workers attach the catalogue and the results from shared memory, and receive the strategies once.
+        with SharedArrays() as shared_arrays:
+            shared_results, results = shared_arrays.create(shape, RESULT_TYPE)
+            with ProcessPoolExecutor(
+                max_workers=min(self.workers, len(tasks)),
+                initializer=initialize_sweep_worker,
+                initargs=(
+                    self,
+                    SharedCatalogue.share(self.projects, shared_arrays),
+                    shared_results,
+                ),
+            ) as executor:
+                # Waits for the tasks, and raises the exception of a failed one.
+                list(executor.map(run_sweep_task, tasks))
+
+            return self.create_sweep_result(results)
+
+    def create_sweep_result(self, results: np.ndarray) -> SweepResult:
+        """
+        :return: The results of each point, copied from the array of run_sweep.
+        """
+        simulation_results = [
+            SimulationResult(
+                {
+                    name: ManagerResult.from_arrays(
+                        results[point_index, manager_index, 0, :, : len(point.years)],
+                        results[point_index, manager_index, 1, :, : len(point.years)],
+                    )
+                    for manager_index, name in enumerate(self.strategies)
+                }
+            )
+            for point_index, point in enumerate(self.points)
+        ]
+
+        return SweepResult(
+            self.points,
+            [self.get_metadata(point) for point in self.points],
+            simulation_results,
+        )
+
+    def run_task(self, task: SweepTask, results: np.ndarray):
+        """
+        Runs the iterations of the task, with the random streams a Simulation would give the manager,
+        and writes each iteration straight to its row of the array of run_sweep.
+        """
+        point_index, manager_name, start, stop = task
+        point = self.points[point_index]
+        years = point.years
+        catalogue = self.get_catalogue(point.parameters.project_length)
+        stream_index = list(self.strategies).index(manager_name)
+        manager = ProjectManager(
+            [], [], [], self.strategies[manager_name](parameters=point.parameters)
+        )
+        manager_results = results[point_index, stream_index, :, :, : len(years)]
+
+        for iteration in range(start, stop):
+            manager.reset_manager()
+
+            if self.common_random_numbers:
+                random_stream = ScenarioTape(self.seed, iteration).reader()
+            else:
+                random_stream = RandomStream(self.seed, iteration, stream_index)
+
+            portfolio = manager.run(years, catalogue, random_stream, point.parameters)
+            manager_results[0, iteration] = portfolio.value
+            manager_results[1, iteration] = portfolio.cash
+
+    def get_metadata(self, point: SweepPoint) -> RunMetadata:
+        return RunMetadata(
+            self.seed,
+            self.iterations,
+            list(point.funding_profile),
+            self.get_catalogue(point.parameters.project_length).get_hash(),
+            list(self.strategies),
+            self.common_random_numbers,
+            model_parameters=asdict(point.parameters),
+        )
+
+
+# The sweep of the worker process and the shared array its tasks write to,
+# set once by the initializer of the process pool.
+worker_sweep: ParameterSweep | None = None
+worker_results: np.ndarray | None = None
+
+
+def initialize_sweep_worker(
+    sweep: ParameterSweep,
+    shared_catalogue: SharedCatalogue,
+    shared_results: SharedArray,
+):
+    global worker_sweep, worker_results
+
+    sweep.projects = shared_catalogue.attach()
+    worker_sweep = sweep
+    worker_results = shared_results.attach()
+
+
+def run_sweep_task(task: SweepTask):
+    assert worker_sweep is not None and worker_results is not None
+    worker_sweep.run_task(task, worker_results)
+
+
+def save_sweep_results(sweep_result: SweepResult, path: Path):
+    """
+    Saves the sweep to a single compressed NumPy archive, with a '{point}-{manager}-value' and
+    '{point}-{manager}-cash' array for each point and manager, and an index of the points as a JSON string.
+    The archive replaces an existing file at once, so an interrupted write leaves it intact.
+    """
+    index = [
+        {"funding_name": point.funding_name, "metadata": asdict(metadata)}
+        for point, metadata in zip(sweep_result.points, sweep_result.metadata)
+    ]
+
+    arrays = {}
+    for point_index, simulation_result in enumerate(sweep_result.results):
+        for name, manager_result in simulation_result.managers.items():
+            arrays[f"{point_index}-{name}-value"] = manager_result.value
+            arrays[f"{point_index}-{name}-cash"] = manager_result.cash
+
+    path.parent.mkdir(parents=True, exist_ok=True)
+    temporary_path = path.with_name(path.name + ".tmp")
+
+    # Written through a file object, as NumPy would otherwise append .npz to the temporary path.
+    with open(temporary_path, "wb") as file:
+        np.savez_compressed(file, index=json.dumps(index), **arrays)
+        file.flush()
+        os.fsync(file.fileno())
+
+    os.replace(temporary_path, path)
+
+
+def load_sweep_results(path: Path) -> SweepResult:
+    with np.load(path) as archive:
+        index = json.loads(str(archive["index"]))
+        points = []
+        metadata = []
+        results = []
+
+        for point_index, entry in enumerate(index):
+            point_metadata = RunMetadata(**entry["metadata"])
+            points.append(
+                SweepPoint(
+                    entry["funding_name"],
+                    tuple(point_metadata.funding_profile),
+                    ModelParameters(**point_metadata.model_parameters),
+                )
+            )
+            metadata.append(point_metadata)
+            results.append(
+                SimulationResult(
+                    {
+                        name: ManagerResult.from_arrays(
+                            archive[f"{point_index}-{name}-value"],
+                            archive[f"{point_index}-{name}-cash"],
+                        )
+                        for name in point_metadata.managers
+                    }
+                )
+            )
+
+    return SweepResult(points, metadata, results)
@@ -0,0 +1,61 @@
+from collections import OrderedDict
+from typing import Generic, Hashable, TypeVar
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class LRUCache(Generic[K, V]):
+    """
+    A size bounded cache, which evicts the least recently used entry when it is full.
+    The hits and misses are counted across clears, so they can be reported for a whole run.
+    """
+
+    def __init__(self, max_size: int):
+        if max_size < 1:
+            raise ValueError(
+                f"The cache size must be at least 1, given size: {max_size}"
+            )
+
+        self.max_size = max_size
+        self.entries: OrderedDict[K, V] = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def get(self, key: K) -> V | None:
+        """
+        :return: The cached value, or None if the key is not cached.
+        """
+        value = self.entries.get(key)
+
+        if value is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return value
+
+    def put(self, key: K, value: V):
+        self.entries[key] = value
+        self.entries.move_to_end(key)
+
+        if len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        """
+        Removes all entries, but keeps the hit and miss counters.
+        """
+        self.entries.clear()
+
+    @property
+    def hit_rate(self) -> float:
+        lookups = self.hits + self.misses
+        if lookups == 0:
+            return 0.0
+
+        return self.hits / lookups
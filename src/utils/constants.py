@@ -1,4 +1,3 @@
 SUB_PROJECT_VALUE = 15
-NO_VIABLE_SOLUTION = -1
 SUB_PROJECT_COST = 10
 PROJECT_LENGTH = 6
@@ -0,0 +1,143 @@
+from itertools import accumulate
+from typing import List, Sequence, Tuple
+
+from src.catalogue import LiveProject
+from src.parameters import DEFAULT_PARAMETERS, ModelParameters
+from src.project import Project
+from src.risk import NORMAL_RISK_PMF, RiskPmf, get_maximum_risk_cost
+from src.year import Year
+
+
+class PortfolioIndex:
+    """
+    Per-year counts of the active projects and the sub-projects with risk in a portfolio, for year 1 up to the horizon.
+    The counts are updated in O(PROJECT_LENGTH) when a project is added or removed, so the conflicts and
+    investments of the portfolio can be read in O(years) instead of iterating every project for every year.
+    """
+
+    active_counts: list[int]  # index 0 is year 1
+    risk_counts: list[int]
+    parameters: ModelParameters
+
+    def __init__(self, years: int, parameters: ModelParameters = DEFAULT_PARAMETERS):
+        # Plain lists, as NumPy's per call overhead dominates for arrays of a handful of years.
+        self.active_counts = [0] * years
+        self.risk_counts = [0] * years
+        self.parameters = parameters
+
+    @classmethod
+    def from_projects(
+        cls,
+        projects: List[Project],
+        years: int,
+        parameters: ModelParameters = DEFAULT_PARAMETERS,
+    ) -> "PortfolioIndex":
+        index = cls(years, parameters)
+
+        for project in projects:
+            index.add(project)
+
+        return index
+
+    @property
+    def years(self) -> int:
+        return len(self.active_counts)
+
+    def add(self, project: Project | LiveProject):
+        self.update(project, 1)
+
+    def remove(self, project: Project | LiveProject):
+        """
+        Removes a project, which is no longer in the portfolio, from all years it was counted in.
+        """
+        self.update(project, -1)
+
+    def update(self, project: Project | LiveProject, sign: int):
+        first_year = project.created_at - 1  # zero indexed
+        start = max(first_year, 0)
+        end = min(first_year + len(project.sub_projects), self.years)
+        risk_counts = get_risk_counts(project)
+
+        for year_index in range(start, end):
+            self.active_counts[year_index] += sign
+            self.risk_counts[year_index] += sign * risk_counts[year_index - first_year]
+
+    def with_project(self, project: Project | LiveProject) -> "PortfolioIndex":
+        """
+        :return: A copy of the index, which also counts the given project. This index is not changed.
+        """
+        index = PortfolioIndex.__new__(PortfolioIndex)
+        index.active_counts = list(self.active_counts)
+        index.risk_counts = list(self.risk_counts)
+        index.parameters = self.parameters
+        index.add(project)
+
+        return index
+
+    def find_risk_conflicts(
+        self,
+        funds: List[Year],
+        current_year: int,
+        risk_pmf: RiskPmf = NORMAL_RISK_PMF,
+    ) -> List[Tuple[int, int]]:
+        """
+        The same as find_project_risk_conflicts, for the projects of the index.
+        :param funds: The funds from the current year and forward.
+        :param risk_pmf: The PMF of a single risk element, which the largest risk cost is derived from.
+        :return: The (year of conflict, number of risk elements for year) of each conflict.
+        """
+        conflicts = []
+        risk_counts = self.risk_counts
+
+        for offset, year_funds in enumerate(funds):
+            year = current_year + offset
+            risk_count = risk_counts[year - 1] if year <= self.years else 0
+
+            if year_funds.allocated_funds < get_maximum_risk_cost(risk_count, risk_pmf):
+                conflicts.append((year, risk_count))
+
+        return conflicts
+
+    def calculate_delta_investment(self, starting_year: int, current_year: int) -> int:
+        """
+        The same as calculate_delta_investment, for the projects of the index.
+        """
+        start = max(starting_year, 1) - 1
+        return (
+            sum(self.active_counts[start:current_year])
+            * self.parameters.sub_project_cost
+        )
+
+    def calculate_delta_investments(
+        self, starting_years: Sequence[int], current_years: Sequence[int]
+    ) -> list[int]:
+        """
+        The batched calculate_delta_investment, which answers each query in O(1) from the cumulative active counts.
+        """
+        # cumulative[y] is the number of active project years from year 1 up to and including year y.
+        cumulative = [0, *accumulate(self.active_counts)]
+        last_year = len(cumulative) - 1
+        sub_project_cost = self.parameters.sub_project_cost
+
+        return [
+            (
+                (
+                    cumulative[min(max(current_year, 0), last_year)]
+                    - cumulative[min(max(starting_year - 1, 0), last_year)]
+                )
+                * sub_project_cost
+                if current_year >= starting_year
+                else 0
+            )
+            for starting_year, current_year in zip(starting_years, current_years)
+        ]
+
+
+def get_risk_counts(project: Project | LiveProject) -> tuple[int, ...]:
+    """
+    :return: 1 for each sub-project of the project with risk, else 0.
+    """
+    if isinstance(project, LiveProject):
+        return project.catalogue.risk_counts[project.template_id]
+
+    return tuple(int(sub_project.has_risk) for sub_project in project.sub_projects)
@@ -1,85 +1,106 @@
-from itertools import chain, combinations
-from typing import List, Tuple
+from typing import List, Sequence, Tuple
 
+import numpy as np
+
+from src.parameters import DEFAULT_PARAMETERS, ModelParameters
 from src.project import Project
-from src.utils.constants import SUB_PROJECT_COST, NO_VIABLE_SOLUTION
+from src.risk import NORMAL_RISK_PMF, RiskPmf, get_maximum_risk_cost
 from src.year import Year
 
 
 def find_optimal_closures(
-    deficit: int, current_projects: List[Project], current_year: int
+    deficit: int,
+    current_projects: List[Project],
+    current_year: int,
+    parameters: ModelParameters = DEFAULT_PARAMETERS,
 ) -> List[Project]:
+    """
+    Finds the least valued combination of projects whose salvageable cost covers the deficit.
+
+    This is solved as a min-value covering knapsack over the salvageable costs, where the
+    salvage dimension is capped at the deficit. Ties are broken on the number of closures and
+    then on the order of the projects, which gives the same combination as enumerating the
+    powerset of the projects in order.
+
+    :param deficit: The (negative) deficit that has to be covered.
+    :param current_projects: The projects that can be closed.
+    :param current_year: The year in which the projects are closed.
+    :param parameters: The parameters of the model, which give the length of the projects.
+    :return: The projects to close, or an empty list if no combination covers the deficit.
+    """
     assert deficit < 0
 
-    projects_powerset: List[List[Project]] = powerset(current_projects)
+    required_salvage = -deficit
 
-    viable_solutions: List[Tuple[int, List[Project]]] = (
-        []
-    )  # All lists of projects in this set must have a salvageable cost greater or equal to the deficit
+    # best[s] holds (total value, closure count, project indices) for the least valued
+    # combination found so far, which reaches a salvageable cost of s (capped at the deficit).
+    best: List[Tuple[int, int, Tuple[int, ...]] | None] = [None] * (
+        required_salvage + 1
+    )
+    best[0] = (0, 0, ())
 
-    for i, projects in enumerate(projects_powerset):
+    for index, project in enumerate(current_projects):
         salvageable_cost = 0
+        if project_is_active(project, current_year, parameters):
+            salvageable_cost = project.get_current_sub_project(
+                current_year
+            ).salvageable_cost
 
-        for project in projects:
-            if project_is_active(project, current_year):
-                salvageable_cost += project.get_current_sub_project(
-                    current_year
-                ).salvageable_cost
+        if salvageable_cost <= 0:
+            # Closing the project cannot help covering the deficit, it only adds value.
+            continue
 
-        if deficit + salvageable_cost >= 0:
-            viable_solutions.append((i, projects))
+        # Only the relative values matter, so the value of a sub-project does not change the closures.
+        value = current_year - (project.created_at - 1)
 
-    least_valued_combination: Tuple[int, int] = (
-        NO_VIABLE_SOLUTION,
-        1000,
-    )  # [index in the powerset list, total value of projects ]
+        # Iterate downwards so each project is used at most once.
+        for salvage in range(required_salvage, -1, -1):
+            solution = best[salvage]
+            if solution is None:
+                continue
 
-    for solution in viable_solutions:
-        total_value = 0
+            new_salvage = min(required_salvage, salvage + salvageable_cost)
+            candidate = (solution[0] + value, solution[1] + 1, solution[2] + (index,))
+            current = best[new_salvage]
 
-        for project in solution[1]:
-            total_value += project.get_current_value(current_year)
+            if current is None or candidate < current:
+                best[new_salvage] = candidate
 
-        if total_value < least_valued_combination[1]:
-            least_valued_combination = (solution[0], total_value)
+    least_valued_combination = best[required_salvage]
 
-    if least_valued_combination[0] == -1:
+    if least_valued_combination is None:
         return []
 
-    return projects_powerset[least_valued_combination[0]]
-
-
-def powerset(projects: List[Project]) -> List[List[Project]]:
-    # powerset([1,2,3]) → () (1,) (2,) (3,) (1,2) (1,3) (2,3) (1,2,3)
-    s = list(projects)
-
-    collection: List[List[Project]] = []
-    for projects in chain.from_iterable(combinations(s, r) for r in range(len(s) + 1)):
-        collection.append(projects)
-
-    return collection
+    return [current_projects[index] for index in least_valued_combination[2]]
 
 
 def find_project_risk_conflicts(
-    projects: List[Project], funds: List[Year], current_year: int
+    projects: List[Project],
+    funds: List[Year],
+    current_year: int,
+    risk_pmf: RiskPmf = NORMAL_RISK_PMF,
+    parameters: ModelParameters = DEFAULT_PARAMETERS,
 ) -> List[
     Tuple[int, int]
 ]:  # Type is (year of conflict, number of risk elements for year)
+    """
+    Finds the years where the funds can not cover the largest possible risk cost of the projects.
+    :param funds: The funds from the current year and forward.
+    :param risk_pmf: The PMF of a single risk element, which the largest risk cost is derived from.
+    """
     conflicts = []
 
-    for year in range(1, 10):
+    for offset, year_funds in enumerate(funds):
+        year = current_year + offset
         risk_count = 0
 
-        if year < current_year:
-            continue
-
         for project in projects:
-            if not project_is_active(project, year):
+            if not project_is_active(project, year, parameters):
                 continue
             if project.get_current_sub_project(year).has_risk:
                 risk_count += 1
 
-        if funds[year - current_year].allocated_funds < risk_count * 6:
+        if year_funds.allocated_funds < get_maximum_risk_cost(risk_count, risk_pmf):
             conflicts.append((year, risk_count))
 
     return conflicts
@@ -89,19 +110,57 @@ def calculate_delta_investment(
     projects: List[Project],
     starting_year: int,
     current_year: int,
+    parameters: ModelParameters = DEFAULT_PARAMETERS,
 ) -> int:
-    new_value = 0
+    """
+    The investment in the projects from the starting year to the current year, both included.
+    Each project contributes the cost of a sub-project for every year its active window overlaps the range.
+    """
+    active_years = 0
 
-    for year in range(starting_year, current_year + 1):
-        for project in projects:
-            if not project_is_active(project, year):
-                continue
-            new_value += SUB_PROJECT_COST
+    for project in projects:
+        first_year = max(project.created_at, starting_year)
+        last_year = min(
+            project.created_at + parameters.project_length - 1, current_year
+        )
+
+        if last_year >= first_year:
+            active_years += last_year - first_year + 1
 
-    return new_value
+    return active_years * parameters.sub_project_cost
 
 
-def project_is_active(project: Project, current_year: int) -> bool:
+def calculate_delta_investments(
+    projects: List[Project],
+    starting_years: Sequence[int] | np.ndarray,
+    current_years: Sequence[int] | np.ndarray,
+    parameters: ModelParameters = DEFAULT_PARAMETERS,
+) -> np.ndarray:
+    """
+    The batched calculate_delta_investment, which answers many (starting year, current year) queries over
+    the same projects at once.
+    :return: The investment of each query.
+    """
+    created_at = np.array([project.created_at for project in projects], dtype=np.int64)
+    starting_years = np.asarray(starting_years, dtype=np.int64)
+    current_years = np.asarray(current_years, dtype=np.int64)
+
+    # (queries, projects) overlap of the active windows with each query range.
+    first_years = np.maximum(created_at[np.newaxis, :], starting_years[:, np.newaxis])
+    last_years = np.minimum(
+        created_at[np.newaxis, :] + parameters.project_length - 1,
+        current_years[:, np.newaxis],
+    )
+    active_years = np.clip(last_years - first_years + 1, 0, None)
+
+    return active_years.sum(axis=1) * parameters.sub_project_cost
+
+
+def project_is_active(
+    project: Project,
+    current_year: int,
+    parameters: ModelParameters = DEFAULT_PARAMETERS,
+) -> bool:
     current_sub_project = current_year - project.created_at
 
-    return 0 <= current_sub_project < 6
+    return 0 <= current_sub_project < parameters.project_length
@@ -5,6 +5,13 @@ from dataclasses import dataclass
 class Year:
     allocated_funds: int
 
+def copy_funds(funds: list[Year]) -> list[Year]:
+    """
+    Copies the funds of each year, which is much cheaper than a deepcopy of the list.
+    """
+    return [Year(year.allocated_funds) for year in funds]
+
+
 # The standard years used for the simulation.
 STANDARD_YEARS = [
     Year(23), # Year 1
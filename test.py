@@ -1,9 +1,27 @@
 import unittest
 
+from tests.batch_simulation_test import *
+from tests.cache_test import *
+from tests.catalogue_test import *
+from tests.checkpoint_test import *
+from tests.closure_test import *
+from tests.data_test import *
+from tests.exact_simulation_test import *
 from tests.file_test import *
 from tests.sell_optimal_test import *
 from tests.optimal_manager_test import *
+from tests.output_test import *
+from tests.policy_test import *
+from tests.portfolio_index_test import *
 from tests.project_test import ProjectTest
+from tests.result_cache_test import *
+from tests.risk_test import *
+from tests.shard_test import *
+from tests.shared_memory_test import *
+from tests.simulation_test import *
+from tests.strategy_test import *
+from tests.sweep_test import *
+from tests.statistics_test import *
 
 if __name__ == "__main__":
     unittest.main()
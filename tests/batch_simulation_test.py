@@ -0,0 +1,267 @@
+import copy
+import random
+import unittest
+from typing import Sequence, TypeVar, override
+
+import numpy as np
+
+from src.batch_simulation import (
+    BatchSimulation,
+    create_batch_generator,
+    get_canonical_templates,
+    reacquire_deficit_values,
+)
+from src.catalogue import ProjectCatalogue
+from src.parameters import ModelParameters
+from src.project_manager import ProjectManager
+from src.random_stream import DrawStream
+from src.simulation import Simulation
+from src.strategy import GreedyStrategy, MinusOneStrategy, OptimalStrategy
+from src.year import STANDARD_YEARS, Year
+from tests.closure_test import random_project
+from tests.simulation_test import create_managers, projects
+
+T = TypeVar("T")
+
+
+class BatchReplayStream(DrawStream):
+    """
+    Replays the draws of a batch of a single iteration for ProjectManager.run. The batch does not draw
+    the project a threshold strategy rejects, so that draw is undone once the next kind of draw is made.
+    """
+
+    def __init__(self, generator: np.random.Generator):
+        self.generator = generator
+        # The year and the generator state before the last project draw, until another kind of draw is made.
+        self.last_project_draw: tuple[int, dict] | None = None
+
+    def undo_rejected_draw(self):
+        if self.last_project_draw is not None:
+            self.generator.bit_generator.state = self.last_project_draw[1]
+            self.last_project_draw = None
+
+    @override
+    def draw_project(self, projects: Sequence[T], current_year: int) -> T:
+        if (
+            self.last_project_draw is not None
+            and self.last_project_draw[0] != current_year
+        ):
+            self.undo_rejected_draw()
+
+        self.last_project_draw = (current_year, self.generator.bit_generator.state)
+        return projects[int(self.generator.integers(len(projects), size=1)[0])]
+
+    @override
+    def draw_risk_cost(self, risk_values: Sequence[int], current_year: int) -> int:
+        self.undo_rejected_draw()
+        return risk_values[int(self.generator.integers(len(risk_values), size=1)[0])]
+
+
+class BatchSimulationTest(unittest.TestCase):
+    def test_shape(self):
+        simulation = BatchSimulation(
+            STANDARD_YEARS, 25, create_managers(), projects, 3, 10
+        )
+
+        result = simulation.run_simulation()
+
+        self.assertEqual(["greedy_manager", "minus_one_manager"], list(result.managers))
+        for manager_result in result.managers.values():
+            self.assertEqual((25, 9), manager_result.value.shape)
+            self.assertEqual((25, 9), manager_result.cash.shape)
+
+    def test_seeded(self):
+        first = BatchSimulation(STANDARD_YEARS, 30, create_managers(), projects, 11, 8)
+        second = BatchSimulation(STANDARD_YEARS, 30, create_managers(), projects, 11, 8)
+
+        self.assertEqual(first.run_simulation(), second.run_simulation())
+
+    def test_rejects_optimal_strategy(self):
+        managers = {"optimal_manager": ProjectManager([], [], [], OptimalStrategy())}
+
+        with self.assertRaises(ValueError):
+            BatchSimulation(STANDARD_YEARS, 10, managers, projects)
+
+    def test_closures_match_manager(self):
+        generator = random.Random(8)
+        templates = [random_project(generator, 0) for _ in range(5)]
+        # An equal template, whose projects are closed together with the projects of the first template.
+        catalogue = ProjectCatalogue.from_projects(templates + templates[:1])
+        rows = 400
+        width = 7
+
+        current_years = np.array([generator.randint(1, 9) for _ in range(rows)])
+        deficits = np.array([-generator.randint(1, 40) for _ in range(rows)])
+        funds = np.array(
+            [[generator.randint(0, 30) for _ in range(9)] for _ in range(rows)]
+        )
+        template_ids = np.zeros((rows, width), dtype=np.int64)
+        created_at = np.zeros((rows, width), dtype=np.int64)
+        active = np.zeros((rows, width), dtype=bool)
+        for row, current_year in enumerate(current_years):
+            count = generator.randint(0, width)
+            template_ids[row, :count] = [
+                generator.randrange(len(catalogue)) for _ in range(count)
+            ]
+            created_at[row, :count] = sorted(
+                generator.randint(max(1, current_year - 5), current_year)
+                for _ in range(count)
+            )
+            active[row, :count] = True
+
+        for current_year in range(1, 10):
+            year_rows = np.flatnonzero(current_years == current_year)
+            managers = [
+                ProjectManager(
+                    [
+                        catalogue.create_project(template_id, start)
+                        for template_id, start, is_active in zip(
+                            template_ids[row], created_at[row], active[row]
+                        )
+                        if is_active
+                    ],
+                    [],
+                    [],
+                    GreedyStrategy(),
+                )
+                for row in year_rows
+            ]
+            manager_funds = [
+                [Year(int(year)) for year in funds[row]] for row in year_rows
+            ]
+            expected_cash = [
+                manager.reacquire_deficit_value(
+                    int(deficits[row]), current_year, row_funds
+                )
+                for manager, row, row_funds in zip(managers, year_rows, manager_funds)
+            ]
+
+            cash = reacquire_deficit_values(
+                year_rows,
+                deficits[year_rows],
+                current_year,
+                catalogue,
+                get_canonical_templates(catalogue),
+                template_ids,
+                created_at,
+                active,
+                funds,
+            )
+
+            self.assertEqual(expected_cash, cash.tolist())
+            for manager, row, row_funds in zip(managers, year_rows, manager_funds):
+                self.assertEqual(
+                    [year.allocated_funds for year in row_funds], funds[row].tolist()
+                )
+                self.assertEqual(
+                    [
+                        (project.template_id, project.created_at)
+                        for project in manager.current_projects
+                    ],
+                    list(
+                        zip(
+                            template_ids[row][active[row]].tolist(),
+                            created_at[row][active[row]].tolist(),
+                        )
+                    ),
+                )
+
+    def test_replayed_trajectories(self):
+        iterations = 6
+        catalogue = ProjectCatalogue.from_projects(projects)
+        batch = BatchSimulation(
+            STANDARD_YEARS, iterations, create_managers(), catalogue, 13, 1
+        ).run_simulation()
+
+        for stream, (name, manager) in enumerate(create_managers().items()):
+            for iteration in range(iterations):
+                portfolio = copy.deepcopy(manager).run(
+                    STANDARD_YEARS,
+                    catalogue,
+                    BatchReplayStream(create_batch_generator(13, iteration, stream)),
+                )
+
+                self.assertEqual(
+                    portfolio.value, batch.managers[name].value[iteration].tolist()
+                )
+                self.assertEqual(
+                    portfolio.cash, batch.managers[name].cash[iteration].tolist()
+                )
+
+    def test_parameters(self):
+        parameters = ModelParameters(
+            sub_project_value=20,
+            sub_project_cost=8,
+            project_length=4,
+            risk_values=(0, 5),
+        )
+        catalogue = ProjectCatalogue.from_projects(projects).with_project_length(4)
+
+        def create_parameter_managers():
+            return {
+                "greedy_manager": ProjectManager(
+                    [], [], [], GreedyStrategy(parameters)
+                ),
+                "minus_one_manager": ProjectManager(
+                    [], [], [], MinusOneStrategy(parameters)
+                ),
+            }
+
+        self.assert_matches_reference(
+            Simulation(
+                STANDARD_YEARS,
+                1000,
+                create_parameter_managers(),
+                catalogue,
+                1,
+                5,
+                parameters=parameters,
+            ).run_simulation(),
+            BatchSimulation(
+                STANDARD_YEARS,
+                1000,
+                create_parameter_managers(),
+                catalogue,
+                5,
+                parameters=parameters,
+            ).run_simulation(),
+        )
+
+        with self.assertRaises(ValueError):
+            BatchSimulation(
+                STANDARD_YEARS, 10, create_managers(), catalogue, parameters=parameters
+            )
+        with self.assertRaises(ValueError):
+            BatchSimulation(STANDARD_YEARS, 10, create_parameter_managers(), projects)
+
+    def test_matches_reference_simulation(self):
+        iterations = 1000
+        reference = Simulation(
+            STANDARD_YEARS, iterations, create_managers(), projects, 1, 5
+        ).run_simulation()
+        batch = BatchSimulation(
+            STANDARD_YEARS, iterations, create_managers(), projects, 5
+        ).run_simulation()
+
+        self.assert_matches_reference(reference, batch)
+
+    def assert_matches_reference(self, reference, batch):
+        iterations = len(next(iter(reference.managers.values())).value)
+
+        for name, reference_result in reference.managers.items():
+            batch_result = batch.managers[name]
+
+            for metric in ("value", "cash"):
+                expected = getattr(reference_result, metric)
+                actual = getattr(batch_result, metric)
+                standard_error = np.sqrt(
+                    (expected.var(axis=0, ddof=1) + actual.var(axis=0, ddof=1))
+                    / iterations
+                )
+
+                # Both engines sample the same model, so the means only differ by sampling noise.
+                difference = np.abs(expected.mean(axis=0) - actual.mean(axis=0))
+                self.assertTrue(
+                    np.all(difference <= 5 * standard_error + 1e-9),
+                    f"{name} {metric}: {difference} > {5 * standard_error}",
+                )
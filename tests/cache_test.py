@@ -0,0 +1,48 @@
+import unittest
+
+from src.probability import ProjectConflict
+from src.utils.cache import LRUCache
+from tests.optimal_manager_test import p1, p2, p3, p4, p5
+
+
+class LRUCacheTest(unittest.TestCase):
+    def test_eviction(self):
+        cache: LRUCache[str, int] = LRUCache(2)
+
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+
+        self.assertEqual(1, cache.get("a"))
+        self.assertIsNone(cache.get("b"))
+        self.assertEqual(2, len(cache))
+        self.assertEqual(2, cache.hits)
+        self.assertEqual(1, cache.misses)
+
+    def test_clear_keeps_counters(self):
+        cache: LRUCache[str, int] = LRUCache(2)
+        cache.put("a", 1)
+        cache.get("a")
+
+        cache.clear()
+
+        self.assertEqual(0, len(cache))
+        self.assertIsNone(cache.get("a"))
+        self.assertEqual(0.5, cache.hit_rate)
+
+
+class LossCacheTest(unittest.TestCase):
+    def test_cached_loss(self):
+        cache = LRUCache(100)
+        conflict = ProjectConflict(-7, 0.25, 5)
+
+        uncached = conflict.calculate_expected_loss([p1, p2, p3, p4, p5])
+        first = conflict.calculate_expected_loss([p1, p2, p3, p4, p5], cache)
+        # The same project set in another order shares the cached loss.
+        second = conflict.calculate_expected_loss([p5, p4, p3, p2, p1], cache)
+
+        self.assertEqual(uncached, first)
+        self.assertEqual(uncached, second)
+        self.assertEqual(1, cache.hits)
+        self.assertEqual(1, cache.misses)
@@ -0,0 +1,89 @@
+import unittest
+from dataclasses import FrozenInstanceError
+from pathlib import Path
+
+from src.catalogue import ProjectCatalogue
+from src.file_handling import load_catalogue_from_file, load_projects_from_file
+from src.parameters import ModelParameters
+from src.project import SubProject
+
+path = Path("resources", "tests", "projects_test.xlsx")
+
+
+class CatalogueTest(unittest.TestCase):
+    def test_arrays(self):
+        catalogue = load_catalogue_from_file(path)
+
+        self.assertEqual(2, len(catalogue))
+        self.assertEqual([8, 7, 9, 5, 6, 8], catalogue.sunk_cost[0].tolist())
+        self.assertEqual([1, 4, 5, 2, 2, 3], catalogue.salvageable_cost[1].tolist())
+        self.assertEqual(0b100110, catalogue.risk_mask[0])
+        self.assertEqual(
+            [True, True, False, False, False, True],
+            catalogue.has_risk_array[1].tolist(),
+        )
+
+    def test_round_trip(self):
+        projects = load_projects_from_file(path)
+
+        self.assertEqual(
+            projects, ProjectCatalogue.from_projects(projects).to_projects()
+        )
+
+    def test_live_project(self):
+        catalogue = load_catalogue_from_file(path)
+        template = catalogue.to_projects()[1]
+        template.created_at = 3
+
+        project = catalogue.create_project(1, 3)
+
+        for year in range(3, 9):
+            self.assertEqual(
+                template.get_current_sub_project(year),
+                project.get_current_sub_project(year),
+            )
+            self.assertEqual(
+                template.get_current_value(year), project.get_current_value(year)
+            )
+        parameters = ModelParameters(sub_project_value=4)
+        self.assertEqual(16, project.get_current_value(6, parameters))
+        self.assertEqual(16, template.get_current_value(6, parameters))
+        self.assertEqual(catalogue.create_project(1, 3), project)
+        self.assertNotEqual(catalogue.create_project(1, 4), project)
+        self.assertNotEqual(catalogue.create_project(0, 3), project)
+
+    def test_shared_sub_projects(self):
+        catalogue = load_catalogue_from_file(path)
+        first = catalogue.create_project(0, 1)
+        second = catalogue.create_project(0, 2)
+
+        self.assertIs(
+            first.get_current_sub_project(1), second.get_current_sub_project(2)
+        )
+        with self.assertRaises(FrozenInstanceError):
+            first.get_current_sub_project(1).salvageable_cost = 0
+
+    def test_hash(self):
+        catalogue = load_catalogue_from_file(path)
+        projects = load_projects_from_file(path)
+        projects[0].sub_projects[0] = SubProject(False, 8, 3)
+
+        self.assertEqual(
+            catalogue.get_hash(), load_catalogue_from_file(path).get_hash()
+        )
+        self.assertNotEqual(
+            catalogue.get_hash(), ProjectCatalogue.from_projects(projects).get_hash()
+        )
+
+    def test_with_project_length(self):
+        catalogue = load_catalogue_from_file(path)
+        shorter = catalogue.with_project_length(3)
+
+        self.assertEqual(3, shorter.project_length)
+        self.assertEqual([8, 7, 9], shorter.sunk_cost[0].tolist())
+        self.assertEqual(0b110, shorter.risk_mask[0])
+        self.assertIs(catalogue, catalogue.with_project_length(6))
+        with self.assertRaises(ValueError):
+            catalogue.with_project_length(7)
+        with self.assertRaises(ValueError):
+            catalogue.with_project_length(0)
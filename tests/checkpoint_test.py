@@ -0,0 +1,115 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+import numpy as np
+
+from src.checkpoint import load_checkpoint
+from src.simulation import Simulation
+from tests.simulation_test import create_simulation
+
+
+class CheckpointTest(unittest.TestCase):
+    def run_interrupted(self, simulation: Simulation, batches: int):
+        """
+        Runs the simulation, which is interrupted after the given amount of batches.
+        """
+        run_iterations = simulation.run_iterations
+        calls = []
+
+        def interrupt(start: int, stop: int):
+            if len(calls) == batches:
+                raise KeyboardInterrupt()
+            calls.append((start, stop))
+            return run_iterations(start, stop)
+
+        with mock.patch.object(simulation, "run_iterations", interrupt):
+            with self.assertRaises(KeyboardInterrupt):
+                simulation.run_simulation()
+
+    def create_checkpoint_simulation(self, path: Path, **kwargs) -> Simulation:
+        return create_simulation(
+            250, checkpoint_path=path, checkpoint_interval=0.0, **kwargs
+        )
+
+    def test_resume(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory, "checkpoint.pkl")
+            self.run_interrupted(self.create_checkpoint_simulation(path), 2)
+
+            checkpoint = load_checkpoint(path)
+            self.assertEqual(200, checkpoint.iterations)
+            self.assertEqual(200, checkpoint.result.managers["greedy_manager"].count)
+            self.assertFalse(Path(directory, "checkpoint.pkl.tmp").exists())
+
+            resumed_result = self.create_checkpoint_simulation(
+                path, resume=True
+            ).run_simulation()
+
+        expected_result = create_simulation(250).run_simulation()
+        self.assertEqual(expected_result, resumed_result)
+
+    def test_resume_aggregate(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory, "checkpoint.pkl")
+            self.run_interrupted(
+                self.create_checkpoint_simulation(path, aggregate=True), 1
+            )
+            resumed_summary = self.create_checkpoint_simulation(
+                path, aggregate=True, resume=True
+            ).run_simulation()
+
+        expected_summary = create_simulation(250, aggregate=True).run_simulation()
+        for name, manager_summary in expected_summary.managers.items():
+            self.assertEqual(250, resumed_summary.managers[name].count)
+            np.testing.assert_allclose(
+                manager_summary.value.mean, resumed_summary.managers[name].value.mean
+            )
+            np.testing.assert_allclose(
+                manager_summary.cash.variance,
+                resumed_summary.managers[name].cash.variance,
+            )
+
+    def test_random_seed(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory, "checkpoint.pkl")
+            simulation = self.create_checkpoint_simulation(path, seed=None)
+            self.run_interrupted(simulation, 1)
+
+            resumed_simulation = self.create_checkpoint_simulation(
+                path, seed=None, resume=True
+            )
+            resumed_result = resumed_simulation.run_simulation()
+
+        self.assertEqual(simulation.seed, resumed_simulation.seed)
+        expected_result = create_simulation(250, seed=simulation.seed).run_simulation()
+        self.assertEqual(expected_result, resumed_result)
+
+    def test_other_inputs(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory, "checkpoint.pkl")
+            self.run_interrupted(self.create_checkpoint_simulation(path), 1)
+
+            with self.assertRaises(ValueError):
+                self.create_checkpoint_simulation(
+                    path, seed=4, resume=True
+                ).run_simulation()
+            with self.assertRaises(ValueError):
+                self.create_checkpoint_simulation(
+                    path, aggregate=True, resume=True
+                ).run_simulation()
+
+    def test_without_checkpoint(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory, "checkpoint.pkl")
+            simulation_result = self.create_checkpoint_simulation(
+                path, resume=True
+            ).run_simulation()
+
+            self.assertEqual(250, load_checkpoint(path).iterations)
+
+        self.assertEqual(250, simulation_result.managers["greedy_manager"].count)
+
+        with self.assertRaises(ValueError):
+            create_simulation(250, resume=True)
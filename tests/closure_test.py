@@ -0,0 +1,74 @@
+import random
+import unittest
+from itertools import chain, combinations
+
+from src.project import Project, SubProject
+from src.utils.project_utils import find_optimal_closures, project_is_active
+
+
+def brute_force_closures(deficit, projects, current_year):
+    # The least valued combination found by enumerating the powerset in order.
+    best = None
+    best_value = None
+    subsets = chain.from_iterable(
+        combinations(projects, r) for r in range(len(projects) + 1)
+    )
+    for subset in subsets:
+        salvageable_cost = sum(
+            project.get_current_sub_project(current_year).salvageable_cost
+            for project in subset
+            if project_is_active(project, current_year)
+        )
+        if deficit + salvageable_cost < 0:
+            continue
+        total_value = sum(project.get_current_value(current_year) for project in subset)
+        if best_value is None or total_value < best_value:
+            best, best_value = list(subset), total_value
+
+    return [] if best is None else best
+
+
+def random_project(generator: random.Random, created_at: int) -> Project:
+    return Project(
+        created_at,
+        [
+            SubProject(generator.random() < 0.5, 0, generator.randint(0, 10))
+            for _ in range(6)
+        ],
+    )
+
+
+class OptimalClosuresTest(unittest.TestCase):
+    def test_matches_powerset(self):
+        generator = random.Random(42)
+
+        for _ in range(300):
+            current_year = generator.randint(1, 9)
+            projects = [
+                random_project(generator, generator.randint(1, current_year))
+                for _ in range(generator.randint(0, 9))
+            ]
+            deficit = -generator.randint(1, 40)
+
+            self.assertEqual(
+                brute_force_closures(deficit, projects, current_year),
+                find_optimal_closures(deficit, projects, current_year),
+            )
+
+    def test_no_viable_solution(self):
+        project = Project(1, [SubProject(False, 8, 2)] * 6)
+
+        self.assertEqual([], find_optimal_closures(-5, [project, project], 2))
+
+    def test_large_portfolio(self):
+        generator = random.Random(7)
+        projects = [
+            random_project(generator, generator.randint(1, 6)) for _ in range(60)
+        ]
+
+        closures = find_optimal_closures(-45, projects, 6)
+
+        salvageable_cost = sum(
+            project.get_current_sub_project(6).salvageable_cost for project in closures
+        )
+        self.assertGreaterEqual(salvageable_cost, 45)
@@ -0,0 +1,65 @@
+import copy
+import pickle
+import unittest
+
+import numpy as np
+
+from src.data import ManagerResult, Portfolio, SimulationResult
+
+
+class ManagerResultTest(unittest.TestCase):
+    def test_add_and_grow(self):
+        result = ManagerResult.allocate(1, 12)
+
+        for iteration in range(5):
+            result.add(
+                Portfolio(list(range(iteration, iteration + 12)), [iteration] * 12)
+            )
+
+        self.assertEqual((5, 12), result.value.shape)
+        self.assertEqual(list(range(4, 16)), result.value[4].tolist())
+        self.assertEqual([0, 1, 2, 3, 4], result.cash[:, 11].tolist())
+
+    def test_year_view(self):
+        result = ManagerResult(Portfolio([1, 2], [3, 4]), Portfolio([5, 6], [7, 8]))
+
+        self.assertEqual([5, 6], result.year_2.value.tolist())
+        self.assertEqual([3, 4], result.year_1.cash.tolist())
+        with self.assertRaises(AttributeError):
+            result.year_3
+
+    def test_named_years(self):
+        first, second, third = (Portfolio([year], [year + 1]) for year in range(3))
+        expected = ManagerResult(first, second, third)
+
+        self.assertEqual(
+            expected, ManagerResult(year_1=first, year_2=second, year_3=third)
+        )
+        self.assertEqual(expected, ManagerResult(first, year_3=third, year_2=second))
+        with self.assertRaises(TypeError):
+            ManagerResult(year_1=first, year_3=third)
+        with self.assertRaises(TypeError):
+            ManagerResult(first, year_1=second)
+
+    def test_unknown_attribute(self):
+        result = ManagerResult(Portfolio([1, 2], [3, 4]))
+
+        for name in ("year_0", "year_x", "year_", "other"):
+            self.assertFalse(hasattr(result, name))
+            self.assertIsNone(getattr(result, name, None))
+        self.assertFalse(hasattr(ManagerResult.__new__(ManagerResult), "year_1"))
+        self.assertEqual(result, copy.deepcopy(result))
+        self.assertEqual(result, pickle.loads(pickle.dumps(result)))
+
+    def test_extend(self):
+        first = SimulationResult({"manager": ManagerResult.allocate(2, 3)})
+        second = SimulationResult({"manager": ManagerResult.allocate(2, 3)})
+        first.add_iteration_result({"manager": Portfolio([1, 2, 3], [0, 0, 1])})
+        second.add_iteration_result({"manager": Portfolio([4, 5, 6], [1, 1, 1])})
+        second.add_iteration_result({"manager": Portfolio([7, 8, 9], [2, 2, 2])})
+
+        first.extend(second)
+
+        np.testing.assert_array_equal(
+            [[1, 2, 3], [4, 5, 6], [7, 8, 9]], first.managers["manager"].value
+        )
@@ -0,0 +1,95 @@
+import math
+import unittest
+
+import numpy as np
+
+from src.catalogue import ProjectCatalogue
+from src.exact_simulation import ExactSimulation
+from src.parameters import ModelParameters
+from src.project_manager import ProjectManager
+from src.simulation import Simulation
+from src.strategy import GreedyStrategy, MinusOneStrategy
+from src.year import STANDARD_YEARS
+from tests.simulation_test import create_managers, projects
+
+years = STANDARD_YEARS[:5]
+
+
+class ExactSimulationTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.result = ExactSimulation(
+            years, create_managers(), projects
+        ).run_simulation()
+
+    def test_probabilities_sum_to_one(self):
+        for distribution in self.result.managers.values():
+            self.assertEqual(len(years), distribution.years)
+
+            for year in range(1, len(years) + 1):
+                for metric in ("value", "cash"):
+                    _, probabilities = distribution.get_distribution(metric, year)
+                    self.assertTrue(math.isclose(1.0, probabilities.sum()))
+
+    def test_first_year(self):
+        # The funds of the first year allow the greedy manager two projects, which are kept or closed.
+        distribution = self.result.managers["greedy_manager"]
+
+        self.assertLessEqual(set(distribution.value[0]), {0, 15, 30})
+        self.assertGreater(distribution.value[0][30], 0.5)
+
+    def assert_matches_monte_carlo(self, result, sampled, iterations):
+        for name, distribution in result.managers.items():
+            for metric in ("value", "cash"):
+                samples = getattr(sampled.managers[name], metric)
+                standard_error = distribution.get_standard_deviation(metric) / np.sqrt(
+                    iterations
+                )
+                difference = np.abs(
+                    samples.mean(axis=0) - distribution.get_mean(metric)
+                )
+
+                self.assertTrue(
+                    np.all(difference <= 5 * standard_error + 1e-9),
+                    f"{name} {metric}: {difference} > {5 * standard_error}",
+                )
+
+    def test_matches_monte_carlo(self):
+        iterations = 2000
+        sampled = Simulation(
+            years, iterations, create_managers(), projects, 1, 13
+        ).run_simulation()
+
+        self.assert_matches_monte_carlo(self.result, sampled, iterations)
+
+    def test_parameters(self):
+        parameters = ModelParameters(
+            sub_project_value=20,
+            sub_project_cost=8,
+            project_length=4,
+            risk_values=(0, 5),
+        )
+        catalogue = ProjectCatalogue.from_projects(projects).with_project_length(4)
+        managers = {
+            "greedy_manager": ProjectManager([], [], [], GreedyStrategy(parameters)),
+            "minus_one_manager": ProjectManager(
+                [], [], [], MinusOneStrategy(parameters)
+            ),
+        }
+        iterations = 2000
+
+        result = ExactSimulation(
+            years, managers, catalogue, parameters=parameters
+        ).run_simulation()
+        sampled = Simulation(
+            years, iterations, managers, catalogue, 1, 13, parameters=parameters
+        ).run_simulation()
+
+        self.assert_matches_monte_carlo(result, sampled, iterations)
+
+        with self.assertRaises(ValueError):
+            ExactSimulation(years, create_managers(), catalogue, parameters=parameters)
+
+    def test_intractable(self):
+        with self.assertRaises(ValueError):
+            ExactSimulation(years, create_managers(), projects, 10).run_simulation()
@@ -1,10 +1,16 @@
+import tempfile
 import unittest
 from pathlib import Path
 
 from src.data import ManagerResult, Portfolio
-from src.file_handling import load_projects_from_file, save_simulation_results_to_excel
+from src.file_handling import (
+    load_projects_from_file,
+    save_simulation_results_to_excel,
+    save_simulation_summary_to_excel,
+)
 from src.project import Project, SubProject
 from src.simulation import SimulationResult
+from src.statistics import ManagerSummary, SimulationSummary
 
 
 class TestImport(unittest.TestCase):
@@ -40,8 +46,6 @@ class TestImport(unittest.TestCase):
 
 class TestExport(unittest.TestCase):
     def test_export(self):
-        path = Path("resources", "tests", "output_test.xlsx")
-
         p1 = Portfolio([1, 1], [3, 2])
         p2 = Portfolio([2, 4], [2, 5])
         sim_res = SimulationResult(
@@ -52,6 +56,19 @@ class TestExport(unittest.TestCase):
             }
         )
 
-        save_simulation_results_to_excel(sim_res, path)
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory, "output_test.xlsx")
+            save_simulation_results_to_excel(sim_res, path)
+
+            self.assertTrue(path.is_file())
+
+    def test_export_summary(self):
+        summary = SimulationSummary({"manager_1": ManagerSummary(2)})
+        summary.add_iteration_result({"manager_1": Portfolio([1, 1], [3, 2])})
+        summary.add_iteration_result({"manager_1": Portfolio([2, 4], [2, 5])})
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory, "summary_test.xlsx")
+            save_simulation_summary_to_excel(summary, path)
 
-        self.assertTrue(path.is_file())
+            self.assertTrue(path.is_file())
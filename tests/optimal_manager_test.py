@@ -1,14 +1,17 @@
 import unittest
 from typing import List, Tuple
 
+from src.probability import TraversalLimits
 from src.project import Project, SubProject
 from src.project_manager import ProjectManager
-from src.strategy import traverse_probability_tree, OptimalStrategy
+from src.simulation import Simulation
+from src.strategy import traverse_probability_tree, OptimalStrategy, get_decision_key
 from src.utils.project_utils import (
     calculate_delta_investment,
     find_project_risk_conflicts,
 )
-from src.year import Year
+from src.year import Year, STANDARD_YEARS
+from tests.simulation_test import projects
 
 p1 = Project(
     1,
@@ -164,6 +167,60 @@ class CalculateExpectedInvestmentTest(unittest.TestCase):
         self.assertTrue(abs(calculated_expected - expected_investment) <= tolerance)
 
 
+class PruningTest(unittest.TestCase):
+    def setUp(self):
+        self.funds = [Year(8), Year(8), Year(8), Year(18), Year(38), Year(48)]
+        self.projects = [p1, p2, p3, p4, p5]
+        self.conflicts = find_project_risk_conflicts(self.projects, self.funds, 4)
+        self.value_comparison = [
+            (
+                conflict[0],
+                calculate_delta_investment([p1, p2, p3, p4], 1, conflict[0]),
+                calculate_delta_investment(self.projects, 1, conflict[0]),
+            )
+            for conflict in self.conflicts
+        ]
+
+    def traverse(self, limits: TraversalLimits | None = None):
+        return traverse_probability_tree(
+            self.conflicts,
+            None,
+            4,
+            self.funds,
+            self.projects,
+            self.value_comparison,
+            limits=limits,
+        )
+
+    def test_no_limits(self):
+        result = self.traverse()
+
+        self.assertEqual(0.0, result.pruned_probability)
+        self.assertEqual(0.0, result.error_bound)
+
+    def test_limits_within_error_bound(self):
+        exact = self.traverse()
+        self.assertGreater(len(self.conflicts), 1)
+
+        for limits in (
+            TraversalLimits(epsilon=0.05),
+            TraversalLimits(max_depth=1),
+            TraversalLimits(deadline=0.0),
+        ):
+            result = self.traverse(limits)
+
+            self.assertGreater(result.pruned_probability, 0.0)
+            self.assertLessEqual(result.expected_loss, exact.expected_loss + 1e-9)
+            self.assertLessEqual(
+                exact.expected_loss - result.expected_loss, result.error_bound + 1e-9
+            )
+            self.assertEqual(exact.existing_return, result.existing_return)
+
+    def test_invalid_depth(self):
+        with self.assertRaises(ValueError):
+            OptimalStrategy(max_conflict_depth=0)
+
+
 class AcceptanceTest(unittest.TestCase):
     def test_accept_1(self):
         optimal_manager = ProjectManager([p1, p2, p3, p4], [], [], OptimalStrategy())
@@ -175,3 +232,62 @@ class AcceptanceTest(unittest.TestCase):
             p5,
         )
         self.assertFalse(should_accept)
+
+
+class DecisionCacheTest(unittest.TestCase):
+    def test_same_decisions(self):
+        cached = OptimalStrategy()
+        uncached = OptimalStrategy(decision_cache_size=None)
+
+        results = [
+            Simulation(
+                STANDARD_YEARS,
+                40,
+                {"optimal_manager": ProjectManager([], [], [], strategy)},
+                projects,
+                1,
+                9,
+            ).run_simulation()
+            for strategy in (cached, uncached)
+        ]
+
+        self.assertEqual(results[0], results[1])
+        self.assertIsNone(uncached.decision_cache)
+        self.assertGreater(len(cached.decision_cache), 0)
+        self.assertGreater(cached.decision_cache.hit_rate, 0.0)
+
+    def test_cached_error_bound(self):
+        def run(strategy: OptimalStrategy):
+            Simulation(
+                STANDARD_YEARS,
+                40,
+                {"optimal_manager": ProjectManager([], [], [], strategy)},
+                projects,
+                1,
+                9,
+            ).run_simulation()
+
+        first = OptimalStrategy(epsilon=0.05)
+        run(first)
+        # A fresh strategy sharing the cache only makes cached decisions.
+        second = OptimalStrategy(epsilon=0.05)
+        second.decision_cache = first.decision_cache
+        run(second)
+
+        self.assertGreater(first.max_error_bound, 0.0)
+        self.assertEqual(first.max_error_bound, second.max_error_bound)
+
+    def test_key_ignores_project_order(self):
+        funds = [Year(18), Year(18), Year(18), Year(28), Year(48), Year(58)]
+
+        self.assertEqual(
+            get_decision_key(funds, [p1, p2, p3, p4], 4, p5),
+            get_decision_key(funds, [p4, p3, p2, p1], 4, p5),
+        )
+        self.assertNotEqual(
+            get_decision_key(funds, [p1, p2, p3, p4], 4, p5),
+            get_decision_key(funds, [p1, p2, p3, p4], 5, p5),
+        )
+
+    def test_time_budget_disables_cache(self):
+        self.assertIsNone(OptimalStrategy(time_budget=1.0).decision_cache)
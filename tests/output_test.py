@@ -0,0 +1,103 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from src.data import ManagerResult, Portfolio, RunMetadata, SimulationResult
+from src.file_handling import get_summary_frame
+from src.output import (
+    load_simulation_results,
+    load_simulation_summary,
+    save_simulation,
+)
+from src.statistics import ManagerSummary, SimulationSummary
+
+metadata = RunMetadata(42, 2, [23, 35], "abc", ["manager_1", "manager_2"])
+
+
+def create_result() -> SimulationResult:
+    return SimulationResult(
+        {
+            "manager_1": ManagerResult(
+                Portfolio([1, 1], [3, 2]), Portfolio([2, 4], [2, 5])
+            ),
+            "manager_2": ManagerResult(
+                Portfolio([5, 6], [0, 0]), Portfolio([7, 8], [1, 1])
+            ),
+        }
+    )
+
+
+class OutputTest(unittest.TestCase):
+    def test_round_trip(self):
+        with tempfile.TemporaryDirectory() as directory:
+            for extension in (".npz", ".npy", ".csv"):
+                path = Path(directory, "results" + extension)
+
+                save_simulation(create_result(), path, metadata)
+                loaded, loaded_metadata = load_simulation_results(path)
+
+                self.assertEqual(create_result(), loaded)
+                self.assertEqual(metadata, loaded_metadata)
+
+    def test_memory_map(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory, "results.npy")
+
+            save_simulation(create_result(), path, metadata)
+
+            results = np.load(path, mmap_mode="r")
+            self.assertEqual((2, 2, 2, 2), results.shape)
+            self.assertEqual([7, 8], results[1, 0, :, 1].tolist())
+
+    def test_format_override(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory, "results.out")
+
+            save_simulation(create_result(), path, metadata, ".csv")
+
+            self.assertTrue(path.read_text().startswith("# "))
+
+    def test_summary(self):
+        summary = SimulationSummary({"manager_1": ManagerSummary(2)})
+        summary.add_iteration_result({"manager_1": Portfolio([1, 1], [3, 2])})
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory, "summary.npz")
+
+            save_simulation(summary, path, metadata)
+
+            with np.load(path) as archive:
+                self.assertEqual(
+                    ["value", "value", "cash", "cash"], archive["metric"].tolist()
+                )
+
+    def test_summary_round_trip(self):
+        summary = SimulationSummary({"manager_1": ManagerSummary(2)})
+        summary.add_iteration_result({"manager_1": Portfolio([1, 1], [3, 2])})
+        summary.add_iteration_result({"manager_1": Portfolio([2, 4], [2, 5])})
+
+        with tempfile.TemporaryDirectory() as directory:
+            for extension in (".npz", ".csv"):
+                path = Path(directory, "summary" + extension)
+
+                save_simulation(summary, path, metadata)
+                loaded, loaded_metadata = load_simulation_summary(path)
+
+                pd.testing.assert_frame_equal(
+                    get_summary_frame(summary), loaded, check_dtype=False
+                )
+                self.assertEqual(metadata, loaded_metadata)
+                with self.assertRaises(ValueError):
+                    load_simulation_results(path)
+
+            results_path = Path(directory, "results.csv")
+            save_simulation(create_result(), results_path, metadata)
+            with self.assertRaises(ValueError):
+                load_simulation_summary(results_path)
+
+    def test_unsupported_format(self):
+        with self.assertRaises(ValueError):
+            save_simulation(create_result(), Path("results.txt"), metadata)
@@ -0,0 +1,147 @@
+import tempfile
+import unittest
+from fractions import Fraction
+from pathlib import Path
+
+from src.catalogue import ProjectCatalogue
+from src.parameters import ModelParameters
+from src.policy import (
+    CompiledOptimalStrategy,
+    compile_policy,
+    get_policy_hash,
+    load_or_compile_policy,
+    load_policy,
+    save_policy,
+)
+from src.project_manager import ProjectManager
+from src.simulation import Simulation
+from src.strategy import OptimalStrategy
+from src.year import STANDARD_YEARS
+from tests.simulation_test import projects
+
+catalogue = ProjectCatalogue.from_projects(projects)
+years = STANDARD_YEARS[:5]
+
+
+class CompiledPolicyTest(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.policy = compile_policy(catalogue, years, OptimalStrategy())
+
+    def run_strategy(self, strategy):
+        return Simulation(
+            years,
+            50,
+            {"optimal_manager": ProjectManager([], [], [], strategy)},
+            catalogue,
+            1,
+            4,
+        ).run_simulation()
+
+    def test_same_decisions(self):
+        strategy = CompiledOptimalStrategy(self.policy)
+
+        self.assertTrue(self.policy.complete)
+        self.assertEqual(
+            self.run_strategy(OptimalStrategy(decision_cache_size=None)),
+            self.run_strategy(strategy),
+        )
+        self.assertGreater(strategy.hits, 0)
+        self.assertEqual(0, strategy.misses)
+
+    def test_incomplete_policy_falls_back(self):
+        policy = compile_policy(catalogue, years, OptimalStrategy(), 10)
+        strategy = CompiledOptimalStrategy(policy)
+
+        self.assertFalse(policy.complete)
+        self.assertEqual(
+            self.run_strategy(OptimalStrategy(decision_cache_size=None)),
+            self.run_strategy(strategy),
+        )
+        self.assertGreater(strategy.misses, 0)
+
+    def test_stored_policy(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory, "policy.pkl")
+            strategy = OptimalStrategy()
+
+            policy = load_or_compile_policy(path, catalogue, years, strategy)
+            self.assertTrue(path.exists())
+
+            loaded = load_policy(path, get_policy_hash(catalogue, years, strategy))
+            self.assertEqual(policy, loaded)
+
+            # Other funds or strategy settings invalidate the stored policy.
+            self.assertIsNone(
+                load_policy(path, get_policy_hash(catalogue, STANDARD_YEARS, strategy))
+            )
+            self.assertIsNone(
+                load_policy(
+                    path,
+                    get_policy_hash(catalogue, years, OptimalStrategy(epsilon=0.01)),
+                )
+            )
+
+    def test_unreadable_policy(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory, "policy.pkl")
+            strategy = OptimalStrategy()
+            policy_hash = get_policy_hash(catalogue, years, strategy)
+
+            save_policy(self.policy, path)
+            path.write_bytes(path.read_bytes()[: path.stat().st_size // 2])
+            self.assertIsNone(load_policy(path, policy_hash))
+
+            # A truncated policy is compiled and stored again.
+            policy = load_or_compile_policy(path, catalogue, years, strategy)
+            self.assertEqual(policy, load_policy(path, policy_hash))
+            self.assertFalse(path.with_name(path.name + ".tmp").exists())
+
+    def test_other_settings(self):
+        CompiledOptimalStrategy(self.policy, decision_cache_size=None)
+
+        for settings in (
+            {"epsilon": 0.01},
+            {"max_conflict_depth": 2},
+            {"risk_pmf": ((Fraction(1, 2), 0), (Fraction(1, 2), 4))},
+            {"parameters": ModelParameters(sub_project_value=12)},
+        ):
+            with self.assertRaises(ValueError):
+                CompiledOptimalStrategy(self.policy, **settings)
+
+    def test_parameters(self):
+        parameters = ModelParameters(
+            sub_project_cost=8, project_length=4, risk_values=(0, 5)
+        )
+        short_catalogue = catalogue.with_project_length(4)
+        policy = compile_policy(
+            short_catalogue, years, OptimalStrategy(parameters=parameters)
+        )
+        strategy = CompiledOptimalStrategy(policy, parameters=parameters)
+
+        def run_strategy(strategy):
+            return Simulation(
+                years,
+                50,
+                {"optimal_manager": ProjectManager([], [], [], strategy)},
+                short_catalogue,
+                1,
+                4,
+                parameters=parameters,
+            ).run_simulation()
+
+        self.assertTrue(policy.complete)
+        self.assertEqual(
+            run_strategy(
+                OptimalStrategy(decision_cache_size=None, parameters=parameters)
+            ),
+            run_strategy(strategy),
+        )
+        self.assertEqual(0, strategy.misses)
+
+        with self.assertRaises(ValueError):
+            compile_policy(catalogue, years, OptimalStrategy(parameters=parameters))
+
+    def test_time_budget(self):
+        with self.assertRaises(ValueError):
+            compile_policy(catalogue, years, OptimalStrategy(time_budget=1.0))
@@ -0,0 +1,83 @@
+import random
+import unittest
+
+from src.utils.portfolio_index import PortfolioIndex
+from src.utils.project_utils import (
+    calculate_delta_investment,
+    calculate_delta_investments,
+    find_project_risk_conflicts,
+)
+from src.year import Year
+from tests.closure_test import random_project
+from tests.optimal_manager_test import p1, p2, p3, p4, p5
+
+
+class PortfolioIndexTest(unittest.TestCase):
+    def test_matches_project_utils(self):
+        generator = random.Random(11)
+
+        for _ in range(200):
+            current_year = generator.randint(1, 9)
+            projects = [
+                random_project(generator, generator.randint(1, current_year))
+                for _ in range(generator.randint(0, 8))
+            ]
+            funds = [Year(generator.randint(0, 40)) for _ in range(10 - current_year)]
+            index = PortfolioIndex.from_projects(projects, 9)
+
+            self.assertEqual(
+                find_project_risk_conflicts(projects, funds, current_year),
+                index.find_risk_conflicts(funds, current_year),
+            )
+            for year in range(1, 10):
+                self.assertEqual(
+                    calculate_delta_investment(projects, 1, year),
+                    index.calculate_delta_investment(1, year),
+                )
+
+    def test_with_project(self):
+        index = PortfolioIndex.from_projects([p1, p2, p3, p4], 9)
+        before = (list(index.active_counts), list(index.risk_counts))
+
+        candidate_index = index.with_project(p5)
+
+        self.assertEqual(before, (index.active_counts, index.risk_counts))
+        self.assertEqual(
+            PortfolioIndex.from_projects([p1, p2, p3, p4, p5], 9).risk_counts,
+            candidate_index.risk_counts,
+        )
+
+    def test_remove(self):
+        index = PortfolioIndex.from_projects([p1, p2, p3], 9)
+
+        index.remove(p2)
+
+        self.assertEqual(
+            PortfolioIndex.from_projects([p1, p3], 9).active_counts, index.active_counts
+        )
+
+
+class DeltaInvestmentTest(unittest.TestCase):
+    def test_batched(self):
+        generator = random.Random(5)
+        projects = [
+            random_project(generator, generator.randint(-2, 9)) for _ in range(12)
+        ]
+        index = PortfolioIndex.from_projects(projects, 9)
+
+        starting_years = [generator.randint(1, 9) for _ in range(50)]
+        current_years = [generator.randint(0, 9) for _ in range(50)]
+        expected = [
+            calculate_delta_investment(projects, start, end)
+            for start, end in zip(starting_years, current_years)
+        ]
+
+        self.assertEqual(
+            expected,
+            calculate_delta_investments(
+                projects, starting_years, current_years
+            ).tolist(),
+        )
+        self.assertEqual(
+            expected, index.calculate_delta_investments(starting_years, current_years)
+        )
@@ -0,0 +1,91 @@
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from src.project_manager import ProjectManager
+from src.result_cache import get_cached_iterations
+from src.strategy import OptimalStrategy
+from tests.simulation_test import create_simulation
+
+
+class ResultCacheTest(unittest.TestCase):
+    def run_cached(self, directory: Path, iterations: int, **kwargs):
+        """
+        :return: The results, and the (start, stop) of every batch of iterations that was run.
+        """
+        simulation = create_simulation(iterations, result_cache=directory, **kwargs)
+        run_iterations = simulation.run_iterations
+        batches = []
+
+        def record(start: int, stop: int):
+            batches.append((start, stop))
+            return run_iterations(start, stop)
+
+        with mock.patch.object(simulation, "run_iterations", record):
+            return simulation.run_simulation(), batches
+
+    def test_top_up(self):
+        with tempfile.TemporaryDirectory() as directory:
+            first_result, first_batches = self.run_cached(Path(directory), 150)
+            second_result, second_batches = self.run_cached(Path(directory), 320)
+
+            self.assertEqual([(0, 100), (100, 150)], first_batches)
+            self.assertEqual([(150, 250), (250, 320)], second_batches)
+
+        expected_result = create_simulation(320).run_simulation()
+        self.assertEqual(expected_result, second_result)
+        self.assertEqual(150, first_result.managers["greedy_manager"].count)
+
+    def test_fewer_iterations(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.run_cached(Path(directory), 200)
+            simulation_result, batches = self.run_cached(Path(directory), 50)
+
+            self.assertEqual([], batches)
+            [path] = Path(directory).glob("*.npz")
+            self.assertEqual(200, get_cached_iterations(Path(directory), path.stem))
+
+        expected_result = create_simulation(50).run_simulation()
+        self.assertEqual(expected_result, simulation_result)
+
+    def test_other_inputs(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.run_cached(Path(directory), 50)
+            _, batches = self.run_cached(Path(directory), 50, seed=8)
+            self.assertEqual([(0, 50)], batches)
+            _, batches = self.run_cached(
+                Path(directory), 50, common_random_numbers=True
+            )
+            self.assertEqual([(0, 50)], batches)
+
+            self.assertEqual(3, len(list(Path(directory).glob("*.npz"))))
+
+    def test_strategy_settings(self):
+        first_managers = {
+            "optimal_manager": ProjectManager([], [], [], OptimalStrategy())
+        }
+        second_managers = {
+            "optimal_manager": ProjectManager([], [], [], OptimalStrategy(epsilon=0.1))
+        }
+        third_managers = {
+            "optimal_manager": ProjectManager(
+                [], [], [], OptimalStrategy(decision_cache_size=None)
+            )
+        }
+
+        keys = [
+            create_simulation(1, managers).get_result_key()
+            for managers in (first_managers, second_managers, third_managers)
+        ]
+        self.assertNotEqual(keys[0], keys[1])
+        self.assertEqual(keys[0], keys[2])
+
+    def test_invalid(self):
+        with tempfile.TemporaryDirectory() as directory:
+            self.assertEqual(0, get_cached_iterations(Path(directory), "missing"))
+
+            with self.assertRaises(ValueError):
+                create_simulation(10, seed=None, result_cache=Path(directory))
+            with self.assertRaises(ValueError):
+                create_simulation(10, aggregate=True, result_cache=Path(directory))
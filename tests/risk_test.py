@@ -0,0 +1,73 @@
+import itertools
+import math
+import unittest
+from fractions import Fraction
+
+from src.probability import convolve_risk_pmf, get_risk_distribution
+from src.risk import (
+    NORMAL_RISK_PMF,
+    VOLATILE_RISK_PMF,
+    VOLATILE_RISK_VALUES,
+    get_maximum_risk_cost,
+    get_risk_pmf,
+)
+
+
+class RiskDistributionTest(unittest.TestCase):
+    def test_sums_to_one(self):
+        for risk_elements in range(0, 12):
+            distribution = convolve_risk_pmf(NORMAL_RISK_PMF, risk_elements)
+
+            self.assertEqual(
+                Fraction(1), sum(probability for probability, _ in distribution)
+            )
+            self.assertEqual(len(distribution), 2 * risk_elements + 1)
+
+    def test_single_element(self):
+        for probability, outcome in get_risk_distribution(1):
+            self.assertAlmostEqual(1 / 3, probability)
+        self.assertEqual(
+            [0, 3, 6], [outcome for _, outcome in get_risk_distribution(1)]
+        )
+
+    def test_matches_enumeration(self):
+        risk_elements = 4
+        counts = {}
+        for outcomes in itertools.product(VOLATILE_RISK_VALUES, repeat=risk_elements):
+            counts[sum(outcomes)] = counts.get(sum(outcomes), 0) + 1
+
+        expected = [
+            (count / len(VOLATILE_RISK_VALUES) ** risk_elements, outcome)
+            for outcome, count in sorted(counts.items())
+        ]
+        actual = get_risk_distribution(risk_elements, VOLATILE_RISK_PMF)
+
+        self.assertEqual(
+            [outcome for _, outcome in expected], [outcome for _, outcome in actual]
+        )
+        for (expected_probability, _), (probability, _) in zip(expected, actual):
+            self.assertAlmostEqual(expected_probability, probability)
+
+    def test_arbitrary_pmf(self):
+        risk_pmf = get_risk_pmf([(0.5, 0), (0.25, 10), (0.25, 10), (0.0, 99)])
+
+        self.assertEqual(((Fraction(1, 2), 0), (Fraction(1, 2), 10)), risk_pmf)
+        self.assertEqual(
+            [(0.25, 0), (0.5, 10), (0.25, 20)], get_risk_distribution(2, risk_pmf)
+        )
+        self.assertEqual(20, get_maximum_risk_cost(2, risk_pmf))
+
+    def test_large_risk_count(self):
+        distribution = get_risk_distribution(8)
+
+        self.assertTrue(
+            math.isclose(1.0, sum(probability for probability, _ in distribution))
+        )
+        self.assertEqual(48, distribution[-1][1])
+        self.assertEqual(48, get_maximum_risk_cost(8))
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            get_risk_distribution(-1)
+        with self.assertRaises(ValueError):
+            get_risk_pmf([(-0.5, 0), (1.5, 3)])
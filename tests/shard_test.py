@@ -0,0 +1,71 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.shard import (
+    load_shards,
+    merge_shards,
+    parse_shard,
+    run_shard,
+    save_shard,
+)
+from tests.simulation_test import create_simulation
+
+
+class ShardTest(unittest.TestCase):
+    def test_parse_shard(self):
+        self.assertEqual((2, 5), parse_shard("2/5"))
+        self.assertEqual((0, 1), parse_shard("0/1"))
+
+        for text in ("5/5", "1", "-1/3", "a/3", "1/0"):
+            with self.assertRaises(ValueError):
+                parse_shard(text)
+
+    def test_merge(self):
+        shards = [run_shard(create_simulation(17), index, 4) for index in (2, 0, 3, 1)]
+
+        simulation_result, metadata = merge_shards(shards)
+
+        self.assertEqual(create_simulation(17).run_simulation(), simulation_result)
+        self.assertEqual(create_simulation(17).get_metadata(), metadata)
+        self.assertEqual(5, shards[1].result.managers["greedy_manager"].count)
+
+    def test_more_shards_than_iterations(self):
+        shards = [run_shard(create_simulation(17), index, 20) for index in range(20)]
+
+        simulation_result, _ = merge_shards(shards)
+
+        self.assertEqual(create_simulation(17).run_simulation(), simulation_result)
+
+    def test_save_and_load(self):
+        simulation = create_simulation(17, common_random_numbers=True)
+
+        with tempfile.TemporaryDirectory() as directory:
+            for index in range(3):
+                save_shard(run_shard(simulation, index, 3), Path(directory))
+
+            shards = load_shards([Path(directory)])
+
+        self.assertEqual([0, 1, 2], [shard.shard_index for shard in shards])
+        simulation_result, _ = merge_shards(shards)
+        self.assertEqual(simulation.run_simulation(), simulation_result)
+
+    def test_invalid_shards(self):
+        shards = [run_shard(create_simulation(17), index, 3) for index in range(3)]
+
+        with self.assertRaises(ValueError):
+            merge_shards([])
+        with self.assertRaises(ValueError):
+            merge_shards(shards[:2])
+        with self.assertRaises(ValueError):
+            merge_shards(shards + [shards[1]])
+        with self.assertRaises(ValueError):
+            merge_shards(shards[:2] + [run_shard(create_simulation(17, seed=7), 2, 3)])
+        with self.assertRaises(ValueError):
+            merge_shards(shards[:2] + [run_shard(create_simulation(17), 2, 4)])
+
+    def test_invalid_simulation(self):
+        with self.assertRaises(ValueError):
+            run_shard(create_simulation(17, seed=None), 0, 2)
+        with self.assertRaises(ValueError):
+            run_shard(create_simulation(17, aggregate=True), 0, 2)
@@ -0,0 +1,57 @@
+import unittest
+from multiprocessing.shared_memory import SharedMemory
+
+import numpy as np
+
+from src.catalogue import ProjectCatalogue
+from src.shared_memory import SharedArrays, SharedCatalogue
+from src.simulation import Simulation
+from src.statistics import PrecisionTarget
+from src.year import STANDARD_YEARS
+from tests.simulation_test import create_managers, projects
+
+
+class SharedMemoryTest(unittest.TestCase):
+    def test_shared_array(self):
+        with SharedArrays() as shared_arrays:
+            shared_array, array = shared_arrays.create((3, 4), np.int64)
+            view = shared_array.attach()
+
+            view[1, 2] = 5
+            self.assertEqual(5, array[1, 2])
+            self.assertEqual(0, array.sum() - 5)
+
+        with self.assertRaises(FileNotFoundError):
+            SharedMemory(shared_array.name, track=False)
+
+    def test_shared_catalogue(self):
+        catalogue = ProjectCatalogue.from_projects(projects)
+
+        with SharedArrays() as shared_arrays:
+            shared_catalogue = SharedCatalogue.share(catalogue, shared_arrays)
+            attached_catalogue = shared_catalogue.attach()
+
+            self.assertEqual(catalogue.get_hash(), attached_catalogue.get_hash())
+            self.assertEqual(catalogue.to_projects(), attached_catalogue.to_projects())
+
+    def test_empty_array(self):
+        with SharedArrays() as shared_arrays:
+            shared_array, array = shared_arrays.create((0, 9), np.int64)
+
+            self.assertEqual((0, 9), shared_array.attach().shape)
+
+
+class SharedResultsTest(unittest.TestCase):
+    def test_parallel_batches(self):
+        precision = PrecisionTarget(
+            0.1, min_iterations=30, max_iterations=110, batch_size=25
+        )
+        serial = Simulation(
+            STANDARD_YEARS, 110, create_managers(), projects, 1, 4, precision=precision
+        )
+        parallel = Simulation(
+            STANDARD_YEARS, 110, create_managers(), projects, 3, 4, precision=precision
+        )
+
+        self.assertEqual(serial.run_simulation(), parallel.run_simulation())
+        self.assertIsNone(parallel.shared_results)
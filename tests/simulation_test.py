@@ -0,0 +1,149 @@
+import unittest
+from pathlib import Path
+
+import numpy as np
+
+from src.catalogue import ProjectCatalogue
+from src.data import get_paired_differences
+from src.file_handling import load_projects_from_file
+from src.project import Project
+from src.project_manager import ProjectManager
+from src.random_stream import DrawStream, RandomStream, ScenarioTape
+from src.simulation import Simulation
+from src.strategy import GreedyStrategy, MinusOneStrategy, OptimalStrategy
+from src.year import STANDARD_YEARS, Year
+
+projects = load_projects_from_file(Path("resources", "tests", "projects_test.xlsx"))
+
+
+def create_managers() -> dict[str, ProjectManager]:
+    return {
+        "greedy_manager": ProjectManager([], [], [], GreedyStrategy()),
+        "minus_one_manager": ProjectManager([], [], [], MinusOneStrategy()),
+    }
+
+
+def create_simulation(
+    iterations: int,
+    managers: dict[str, ProjectManager] | None = None,
+    years: list[Year] = STANDARD_YEARS,
+    catalogue: list[Project] | ProjectCatalogue = projects,
+    seed: int | None = 3,
+    **kwargs,
+) -> Simulation:
+    """
+    :param managers: The managers of the simulation, the managers of create_managers if None.
+    :return: A simulation of the test projects, which is seeded unless the seed is None.
+    """
+    if managers is None:
+        managers = create_managers()
+
+    return Simulation(years, iterations, managers, catalogue, seed=seed, **kwargs)
+
+
+class ParallelSimulationTest(unittest.TestCase):
+    def test_parallel_shape(self):
+        simulation = Simulation(STANDARD_YEARS, 7, create_managers(), projects, 3)
+
+        result = simulation.run_simulation()
+
+        self.assertEqual(["greedy_manager", "minus_one_manager"], list(result.managers))
+        for manager_result in result.managers.values():
+            for year in range(1, 10):
+                portfolio = getattr(manager_result, f"year_{year}")
+                self.assertEqual(7, len(portfolio.value))
+                self.assertEqual(7, len(portfolio.cash))
+
+    def test_invalid_workers(self):
+        with self.assertRaises(ValueError):
+            Simulation(STANDARD_YEARS, 7, create_managers(), projects, 0)
+
+    def test_optimal_parallel_matches_serial(self):
+        def create_optimal_managers() -> dict[str, ProjectManager]:
+            return {
+                "greedy_manager": ProjectManager([], [], [], GreedyStrategy()),
+                "optimal_manager": ProjectManager([], [], [], OptimalStrategy()),
+            }
+
+        serial = create_simulation(4, create_optimal_managers(), workers=1)
+        parallel = create_simulation(4, create_optimal_managers(), workers=2)
+
+        self.assertEqual(serial.run_simulation(), parallel.run_simulation())
+
+    def test_common_random_numbers_parallel_matches_serial(self):
+        serial = create_simulation(6, workers=1, common_random_numbers=True)
+        parallel = create_simulation(6, workers=3, common_random_numbers=True)
+
+        self.assertEqual(serial.run_simulation(), parallel.run_simulation())
+
+
+class SeededSimulationTest(unittest.TestCase):
+    def test_parallel_matches_serial(self):
+        serial = Simulation(STANDARD_YEARS, 6, create_managers(), projects, 1, 42)
+        parallel = Simulation(STANDARD_YEARS, 6, create_managers(), projects, 3, 42)
+
+        self.assertEqual(serial.run_simulation(), parallel.run_simulation())
+
+    def test_replay_iteration(self):
+        simulation = Simulation(STANDARD_YEARS, 5, create_managers(), projects, 1, 7)
+        result = simulation.run_simulation()
+
+        replayed = simulation.run_iteration(3)
+
+        for name, portfolio in replayed.items():
+            self.assertEqual(portfolio.value[8], result.managers[name].year_9.value[3])
+            self.assertEqual(portfolio.cash[8], result.managers[name].year_9.cash[3])
+
+    def test_seeds_differ(self):
+        first = Simulation(STANDARD_YEARS, 20, create_managers(), projects, 1, 1)
+        second = Simulation(STANDARD_YEARS, 20, create_managers(), projects, 1, 2)
+
+        self.assertNotEqual(first.run_simulation(), second.run_simulation())
+
+
+class CommonRandomNumbersTest(unittest.TestCase):
+    def test_same_draws(self):
+        managers = {
+            "first_manager": ProjectManager([], [], [], GreedyStrategy()),
+            "second_manager": ProjectManager([], [], [], GreedyStrategy()),
+        }
+        simulation = Simulation(STANDARD_YEARS, 10, managers, projects, 1, 3, True)
+
+        result = simulation.run_simulation()
+
+        self.assertEqual(
+            result.managers["first_manager"], result.managers["second_manager"]
+        )
+
+    def test_scenario_stream(self):
+        tape = ScenarioTape(3, 0)
+        first_reader, second_reader = tape.reader(), tape.reader()
+
+        self.assertIsInstance(first_reader, DrawStream)
+        self.assertNotIsInstance(first_reader, RandomStream)
+        self.assertEqual(
+            [first_reader.draw_risk_cost(range(100), 2) for _ in range(5)],
+            [second_reader.draw_risk_cost(range(100), 2) for _ in range(5)],
+        )
+
+    def test_paired_differences(self):
+        simulation = Simulation(
+            STANDARD_YEARS, 10, create_managers(), projects, 1, 3, True
+        )
+        result = simulation.run_simulation()
+
+        differences = get_paired_differences(result)
+
+        self.assertEqual(2 * 9, len(differences))
+        final_value = next(
+            row for row in differences if row.metric == "value" and row.year == 9
+        )
+        self.assertAlmostEqual(
+            np.mean(
+                np.subtract(
+                    result.managers["greedy_manager"].year_9.value,
+                    result.managers["minus_one_manager"].year_9.value,
+                )
+            ),
+            final_value.mean,
+        )
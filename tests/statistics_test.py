@@ -0,0 +1,223 @@
+import unittest
+
+import numpy as np
+
+from src.data import Portfolio
+from src.statistics import (
+    ManagerSummary,
+    PrecisionTarget,
+    QuantileSketch,
+    RunningStatistics,
+    SimulationSummary,
+)
+from src.simulation import Simulation
+from src.year import STANDARD_YEARS
+from tests.simulation_test import create_managers, projects
+
+
+class RunningStatisticsTest(unittest.TestCase):
+    def test_matches_numpy(self):
+        data = np.random.default_rng(1).integers(0, 500, size=(200, 9))
+        statistics = RunningStatistics(9)
+
+        for row in data:
+            statistics.add(row)
+
+        np.testing.assert_allclose(data.mean(axis=0), statistics.mean)
+        np.testing.assert_allclose(data.var(axis=0, ddof=1), statistics.variance)
+        np.testing.assert_array_equal(data.min(axis=0), statistics.minimum)
+        np.testing.assert_array_equal(data.max(axis=0), statistics.maximum)
+
+    def test_merge(self):
+        data = np.random.default_rng(2).integers(0, 500, size=(101, 3))
+        first = RunningStatistics(3)
+        second = RunningStatistics(3)
+
+        for row in data[:40]:
+            first.add(row)
+        for row in data[40:]:
+            second.add(row)
+        first.merge(second)
+
+        self.assertEqual(101, first.count)
+        np.testing.assert_allclose(data.mean(axis=0), first.mean)
+        np.testing.assert_allclose(data.var(axis=0, ddof=1), first.variance)
+
+
+class QuantileSketchTest(unittest.TestCase):
+    def test_quantiles(self):
+        data = np.random.default_rng(3).integers(0, 50, size=(1001, 2))
+        first = QuantileSketch(2)
+        second = QuantileSketch(2)
+
+        for row in data[:500]:
+            first.add(row)
+        for row in data[500:]:
+            second.add(row)
+        first.merge(second)
+
+        for q in (0.05, 0.5, 0.95):
+            np.testing.assert_array_equal(
+                np.quantile(data, q, axis=0, method="inverted_cdf"), first.quantile(q)
+            )
+
+
+class AggregateSimulationTest(unittest.TestCase):
+    def test_matches_results(self):
+        full = Simulation(STANDARD_YEARS, 12, create_managers(), projects, 1, 5)
+        aggregated = Simulation(
+            STANDARD_YEARS, 12, create_managers(), projects, 2, 5, aggregate=True
+        )
+
+        result = full.run_simulation()
+        summary = aggregated.run_simulation()
+
+        self.assertIsInstance(summary, SimulationSummary)
+        for name, manager in summary.managers.items():
+            self.assertEqual(12, manager.count)
+            np.testing.assert_allclose(
+                result.managers[name].value.mean(axis=0), manager.value.mean
+            )
+            np.testing.assert_allclose(
+                result.managers[name].cash.std(axis=0, ddof=1),
+                manager.cash.standard_deviation,
+            )
+
+    def test_rows(self):
+        summary = SimulationSummary({"manager": ManagerSummary(9)})
+        summary.add_iteration_result({"manager": Portfolio([1] * 9, [2] * 9)})
+
+        rows = summary.get_rows()
+
+        self.assertEqual(2 * 9, len(rows))
+        self.assertEqual(2.0, rows[9].mean)
+        self.assertEqual(1.0, rows[0].quantiles[0.5])
+
+
+class PrecisionTargetTest(unittest.TestCase):
+    def test_matches_fixed_run(self):
+        target = PrecisionTarget(
+            20.0, min_iterations=20, max_iterations=400, batch_size=20
+        )
+        simulation = Simulation(
+            STANDARD_YEARS, 0, create_managers(), projects, seed=5, precision=target
+        )
+        adaptive_result = simulation.run_simulation()
+
+        iterations = simulation.iteration_limit
+        self.assertTrue(20 <= iterations <= 400)
+        self.assertEqual(0, iterations % 20)
+        self.assertLessEqual(simulation.achieved_half_width, 20.0)
+        self.assertEqual(
+            target.get_half_width(adaptive_result), simulation.achieved_half_width
+        )
+
+        fixed_result = Simulation(
+            STANDARD_YEARS, iterations, create_managers(), projects, seed=5
+        ).run_simulation()
+        for name, manager_result in fixed_result.managers.items():
+            np.testing.assert_array_equal(
+                manager_result.value, adaptive_result.managers[name].value
+            )
+            np.testing.assert_array_equal(
+                manager_result.cash, adaptive_result.managers[name].cash
+            )
+
+        metadata = simulation.get_metadata()
+        self.assertEqual(iterations, metadata.iterations)
+        self.assertEqual(20.0, metadata.target_half_width)
+        self.assertEqual(simulation.achieved_half_width, metadata.achieved_half_width)
+
+    def test_maximum_iterations(self):
+        target = PrecisionTarget(
+            1e-6, min_iterations=10, max_iterations=35, batch_size=10
+        )
+        simulation = Simulation(
+            STANDARD_YEARS, 0, create_managers(), projects, seed=5, precision=target
+        )
+        simulation_result = simulation.run_simulation()
+
+        self.assertEqual(35, simulation.iteration_limit)
+        self.assertEqual(35, len(simulation_result.managers["greedy_manager"].value))
+        self.assertGreater(simulation.achieved_half_width, 1e-6)
+
+    def test_aggregate(self):
+        target = PrecisionTarget(
+            1e-6,
+            metric="cash",
+            year=3,
+            min_iterations=10,
+            max_iterations=30,
+            batch_size=10,
+        )
+        simulation = Simulation(
+            STANDARD_YEARS,
+            0,
+            create_managers(),
+            projects,
+            seed=5,
+            aggregate=True,
+            precision=target,
+        )
+        simulation_summary = simulation.run_simulation()
+
+        self.assertEqual(30, simulation.iteration_limit)
+        self.assertEqual(30, simulation_summary.managers["greedy_manager"].cash.count)
+
+        simulation_result = Simulation(
+            STANDARD_YEARS, 30, create_managers(), projects, seed=5
+        ).run_simulation()
+        standard_deviation = max(
+            float(np.std(manager_result.cash[:, 2], ddof=1))
+            for manager_result in simulation_result.managers.values()
+        )
+        self.assertAlmostEqual(
+            1.959964 * standard_deviation / np.sqrt(30),
+            simulation.achieved_half_width,
+            places=3,
+        )
+
+    def test_paired(self):
+        target = PrecisionTarget(
+            1e-6,
+            paired_managers=("greedy_manager", "minus_one_manager"),
+            min_iterations=10,
+            max_iterations=10,
+        )
+        simulation = Simulation(
+            STANDARD_YEARS,
+            0,
+            create_managers(),
+            projects,
+            seed=5,
+            common_random_numbers=True,
+            precision=target,
+        )
+        simulation_result = simulation.run_simulation()
+
+        differences = (
+            simulation_result.managers["greedy_manager"].value[:, -1].astype(np.int64)
+            - simulation_result.managers["minus_one_manager"].value[:, -1]
+        )
+        self.assertAlmostEqual(
+            1.959964 * float(np.std(differences, ddof=1)) / np.sqrt(10),
+            simulation.achieved_half_width,
+            places=3,
+        )
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            PrecisionTarget(0.0)
+        with self.assertRaises(ValueError):
+            PrecisionTarget(1.0, min_iterations=10, max_iterations=5)
+        with self.assertRaises(ValueError):
+            Simulation(
+                STANDARD_YEARS,
+                0,
+                create_managers(),
+                projects,
+                aggregate=True,
+                precision=PrecisionTarget(
+                    1.0, paired_managers=("greedy_manager", "minus_one_manager")
+                ),
+            )
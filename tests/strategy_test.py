@@ -0,0 +1,40 @@
+import random
+import unittest
+
+from src.catalogue import ProjectCatalogue
+from src.strategy import GreedyStrategy, MinusOneStrategy
+from src.utils.constants import SUB_PROJECT_COST, PROJECT_LENGTH
+from src.year import Year, copy_funds
+from tests.simulation_test import projects
+
+catalogue = ProjectCatalogue.from_projects(projects)
+
+
+class MaxAcceptableTest(unittest.TestCase):
+    def test_matches_should_accept_project(self):
+        generator = random.Random(3)
+
+        for strategy in (GreedyStrategy(), MinusOneStrategy()):
+            for _ in range(200):
+                funds = [
+                    Year(generator.randint(-10, 80))
+                    for _ in range(generator.randint(1, 9))
+                ]
+                expected = count_accepted(strategy, copy_funds(funds))
+
+                self.assertEqual(expected, strategy.max_acceptable(funds))
+
+
+def count_accepted(strategy, funds: list[Year]) -> int:
+    """
+    Counts the accepted projects by asking the strategy for every project, like run_strategy without the fast path.
+    """
+    accepted = 0
+    project = catalogue.create_project(0, 1)
+
+    while strategy.should_accept_project(funds, [], 1, project):
+        accepted += 1
+        for funds_year in funds[:PROJECT_LENGTH]:
+            funds_year.allocated_funds -= SUB_PROJECT_COST
+
+    return accepted
@@ -0,0 +1,159 @@
+import functools
+import tempfile
+import unittest
+from pathlib import Path
+
+from src.catalogue import ProjectCatalogue
+from src.parameters import ModelParameters
+from src.project_manager import ProjectManager
+from src.strategy import GreedyStrategy, MinusOneStrategy, OptimalStrategy
+from src.sweep import (
+    ParameterSweep,
+    SweepGrid,
+    load_sweep_results,
+    save_sweep_results,
+)
+from src.year import STANDARD_YEARS
+from tests.simulation_test import create_simulation, projects
+
+catalogue = ProjectCatalogue.from_projects(projects)
+
+strategies = {
+    "greedy_manager": GreedyStrategy,
+    "minus_one_manager": MinusOneStrategy,
+}
+
+
+class SweepGridTest(unittest.TestCase):
+    def test_points(self):
+        grid = SweepGrid.from_dict(
+            {
+                "funding_profiles": {"low": [10] * 9, "high": [60] * 9},
+                "sub_project_cost": [4, 5, 6],
+                "risk_values": [[0, 2, 4], [1]],
+            }
+        )
+        points = grid.get_points()
+
+        self.assertEqual(12, len(points))
+        self.assertEqual("low", points[0].funding_name)
+        self.assertEqual((10,) * 9, points[0].funding_profile)
+        self.assertEqual(
+            ModelParameters(sub_project_cost=4, risk_values=(0, 2, 4)),
+            points[0].parameters,
+        )
+        self.assertEqual(
+            ModelParameters(sub_project_cost=4, risk_values=(1,)), points[1].parameters
+        )
+        self.assertEqual("high", points[6].funding_name)
+
+    def test_defaults(self):
+        [point] = SweepGrid().get_points()
+
+        self.assertEqual(
+            [year.allocated_funds for year in STANDARD_YEARS],
+            list(point.funding_profile),
+        )
+        self.assertEqual(ModelParameters(), point.parameters)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            SweepGrid.from_dict({"sub_project_costs": [4]})
+        with self.assertRaises(ValueError):
+            SweepGrid.from_dict({"sub_project_cost": [0]}).get_points()
+
+
+class ParameterSweepTest(unittest.TestCase):
+    def run_point_simulation(self, point, managers, **kwargs):
+        return create_simulation(
+            23,
+            {
+                name: ProjectManager([], [], [], factory(parameters=point.parameters))
+                for name, factory in managers.items()
+            },
+            point.years,
+            catalogue.with_project_length(point.parameters.project_length),
+            seed=5,
+            parameters=point.parameters,
+            **kwargs,
+        ).run_simulation()
+
+    def test_matches_simulation(self):
+        points = SweepGrid(
+            funding_profiles={
+                "standard": (23, 35, 46, 58, 58, 58, 58, 58, 58),
+                "flat": (40,) * 6,
+            },
+            sub_project_cost=[5, 4],
+            project_length=[5, 3],
+            risk_values=[(0, 1, 2, 3, 4, 5, 6, 7, 8), (0, 3)],
+        ).get_points()
+        sweep = ParameterSweep(points, 23, strategies, catalogue, seed=5, shard_size=10)
+
+        sweep_result = sweep.run_sweep()
+
+        self.assertEqual(16, len(sweep_result.results))
+        for point, metadata, simulation_result in zip(
+            sweep_result.points, sweep_result.metadata, sweep_result.results
+        ):
+            self.assertEqual(
+                self.run_point_simulation(point, strategies), simulation_result
+            )
+            self.assertEqual(list(point.funding_profile), metadata.funding_profile)
+            self.assertEqual(
+                point.parameters.project_length,
+                metadata.model_parameters["project_length"],
+            )
+
+    def test_optimal_common_random_numbers(self):
+        optimal_strategies = {
+            "greedy_manager": GreedyStrategy,
+            "optimal_manager": functools.partial(OptimalStrategy, epsilon=0.01),
+        }
+        points = SweepGrid(sub_project_value=[10, 14], project_length=[4]).get_points()
+        sweep = ParameterSweep(
+            points,
+            23,
+            optimal_strategies,
+            catalogue,
+            seed=5,
+            common_random_numbers=True,
+        )
+
+        for point, simulation_result in zip(points, sweep.run_sweep().results):
+            self.assertEqual(
+                self.run_point_simulation(
+                    point, optimal_strategies, common_random_numbers=True
+                ),
+                simulation_result,
+            )
+
+    def test_parallel_matches_serial(self):
+        points = SweepGrid(sub_project_cost=[4, 5]).get_points()
+        serial = ParameterSweep(points, 23, strategies, catalogue, seed=5, shard_size=7)
+        parallel = ParameterSweep(points, 23, strategies, catalogue, 3, 5, shard_size=7)
+
+        self.assertEqual(serial.run_sweep().results, parallel.run_sweep().results)
+
+    def test_save_and_load(self):
+        points = SweepGrid(
+            funding_profiles={"flat": (40,) * 6}, risk_values=[(0, 3), (1, 2)]
+        ).get_points()
+        sweep_result = ParameterSweep(
+            points, 11, strategies, catalogue, seed=5
+        ).run_sweep()
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = Path(directory, "sweep.npz")
+            save_sweep_results(sweep_result, path)
+            loaded_result = load_sweep_results(path)
+
+        self.assertEqual(sweep_result.points, loaded_result.points)
+        self.assertEqual(sweep_result.results, loaded_result.results)
+        self.assertEqual(5, loaded_result.metadata[1].seed)
+
+    def test_invalid(self):
+        with self.assertRaises(ValueError):
+            ParameterSweep([], 10, strategies, catalogue, 0)
+        with self.assertRaises(ValueError):
+            ParameterSweep([], 10, strategies, catalogue, shard_size=0)